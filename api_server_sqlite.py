@@ -6,6 +6,7 @@ Provides endpoints for 3D graph visualization using local SQLite database
 """
 
 import os
+import re
 import sqlite3
 import json
 from flask import Flask, jsonify, request
@@ -13,19 +14,95 @@ from flask_cors import CORS
 from typing import Dict, List, Any, Optional
 import pandas as pd
 from utils.node_size import size_by_degree, size_by_popularity, compute_stats
-from collections import Counter
+from database.adapters import SQLiteAdapter, load_tool_relations, load_tool_synergies
+from database.connection import get_connection_manager
+from database.ingest_log import ingest_lag
+from database.snapshot import SnapshotReader, is_stale
+from database.shards import ShardedSQLiteAdapter, get_unified_manager, shard_schemas
+from database.trending import TREND_SORTS, load_metric_history
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend integration
 
 # Database path
 DB_PATH = os.path.join(os.path.dirname(__file__), 'database', 'ai_tools.db')
+INGEST_LOG_DIR = os.path.join(os.path.dirname(__file__), 'database', 'ingest_log')
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), 'database', 'snapshots')
+# Per-source shards (database/shards.py) instead of DB_PATH, when set
+SHARD_DIR = os.environ.get('AI_TOOLS_SHARD_DIR')
+
+snapshot_reader = SnapshotReader(SNAPSHOT_DIR)
+
+
+def current_snapshot() -> Optional[Dict[str, Any]]:
+    """
+    Manifest of the newest published snapshot of DB_PATH, if any (never with shards)
+    
+    None as well once DB_PATH was written after that snapshot was taken
+    (stages that don't publish one): the live database is read until the
+    pipeline publishes again.
+    """
+    if SHARD_DIR:
+        return None
+    manifest = snapshot_reader.current()
+    if manifest and manifest.get('source') == os.path.abspath(DB_PATH) and not is_stale(manifest):
+        return manifest
+    return None
+
 
 def get_db_connection():
-    """Get SQLite database connection"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # Enable column access by name
-    return conn
+    """
+    Get this request's SQLite connection (rows by column name)
+    
+    Reads go to the newest read-only snapshot when the pipeline has published
+    one (database/snapshot.py), so long write transactions never stall them;
+    otherwise to this thread's persistent WAL connection on the live database
+    (or on the unified view of the shards with AI_TOOLS_SHARD_DIR).
+    """
+    if current_snapshot() is not None:
+        return snapshot_reader.connection()
+    return live_connections().connection()
+
+
+def live_connections():
+    """Connection manager of the live database: DB_PATH, or the shards' unified view"""
+    if SHARD_DIR:
+        return get_unified_manager(SHARD_DIR)
+    return get_connection_manager(DB_PATH)
+
+
+@app.teardown_appcontext
+def release_db_connection(exception):
+    """Hand the request thread's connection back to the pool for the next request"""
+    snapshot_reader.release()
+    live_connections().release()
+
+EDGE_TYPE_COLUMNS = {
+    'same_domain': 'same_domain_count',
+    'video_audio': 'video_audio_count',
+    'semantic_similarity': 'semantic_similarity_count',
+    'weak': 'weak_count',
+}
+
+
+def load_degree(conn, tool_id: int) -> Dict[str, Any]:
+    """Degree, weighted degree and edge-type counts from ai_tool_degree (primary-key lookup)"""
+    row = conn.execute("SELECT * FROM ai_tool_degree WHERE tool_id = ?", (tool_id,)).fetchone()
+    if row is None:
+        return {'degree': 0, 'weighted_degree': 0.0, 'edge_type_counts': {}}
+    
+    edge_type_counts = {
+        edge_type: row[column] for edge_type, column in EDGE_TYPE_COLUMNS.items() if row[column]
+    }
+    other = row['degree'] - sum(edge_type_counts.values())
+    if other > 0:
+        edge_type_counts['other'] = other
+    return {
+        'degree': row['degree'],
+        'weighted_degree': round(row['weighted_degree'], 4),
+        'edge_type_counts': edge_type_counts
+    }
+
 
 @app.route('/api/node/<node_id>')
 def get_node(node_id: str):
@@ -37,9 +114,9 @@ def get_node(node_id: str):
         
         # Get base node data
         node_query = """
-        SELECT id, name, description, macro_domain, categories, 
+        SELECT id, name, description, macro_domain, 
                monthly_users, upvotes, rank, popularity, 
-               url, logo_url, price, source, features, platform
+               url, logo_url, price, source
         FROM ai_tool 
         WHERE id = ?
         """
@@ -49,38 +126,18 @@ def get_node(node_id: str):
         if not node:
             return jsonify({'error': 'Node not found'}), 404
         
-        # Convert to dict
+        # Convert to dict, with categories/features/platform from the normalised tables
         node_dict = dict(node)
-        
-        # Parse JSON fields
-        if node_dict['categories']:
-            try:
-                node_dict['categories'] = json.loads(node_dict['categories'])
-            except:
-                node_dict['categories'] = []
-        else:
-            node_dict['categories'] = []
-            
-        if node_dict['features']:
-            try:
-                node_dict['features'] = json.loads(node_dict['features'])
-            except:
-                node_dict['features'] = {}
-        else:
-            node_dict['features'] = {}
-            
-        if node_dict['platform']:
-            try:
-                node_dict['platform'] = json.loads(node_dict['platform'])
-            except:
-                node_dict['platform'] = []
-        else:
-            node_dict['platform'] = []
-        
-        # For now, we'll use mock synergy data since we don't have ai_synergy table yet
-        # In a real implementation, you'd query the ai_synergy table
-        degree = 5  # Mock degree
-        edge_type_counts = {'functional': 3, 'domain': 2}  # Mock edge types
+        node_dict.update(load_tool_relations(conn, [node_dict['id']])[node_dict['id']])
+        
+        # Degree and edge types kept by the ai_synergy triggers
+        degree_info = load_degree(conn, node_dict['id'])
+        degree = degree_info['degree']
+        edge_type_counts = degree_info['edge_type_counts']
+        top_connections = load_tool_synergies(conn, node_dict['id'], limit=10)
+        trend = conn.execute(
+            "SELECT velocity, acceleration FROM tool_trend WHERE tool_id = ?", (node_dict['id'],)
+        ).fetchone()
         community_id = 1  # Mock community
         
         # Calculate node sizes
@@ -105,6 +162,7 @@ def get_node(node_id: str):
             'macro_domain': node_dict['macro_domain'],
             'categories': node_dict['categories'],
             'degree': degree,
+            'weighted_degree': degree_info['weighted_degree'],
             'edge_type_counts': edge_type_counts,
             'community_id': community_id,
             'sizes': {
@@ -116,7 +174,9 @@ def get_node(node_id: str):
                 'monthly_users': node_dict['monthly_users'],
                 'upvotes': node_dict['upvotes'],
                 'rank': node_dict['rank'],
-                'popularity_score': node_dict['popularity']
+                'popularity_score': node_dict['popularity'],
+                'velocity': round(trend['velocity'], 6) if trend else 0.0,
+                'acceleration': round(trend['acceleration'], 6) if trend else 0.0
             },
             'details': {
                 'url': node_dict['url'],
@@ -128,11 +188,13 @@ def get_node(node_id: str):
             },
             'connections': {
                 'total': degree,
-                'top_connections': []  # Mock for now
+                'top_connections': top_connections
             }
         }
+        if request.args.get('history'):
+            # Values after each recorded change (database/trending.py)
+            response_data['popularity']['history'] = load_metric_history(conn, node_dict['id'])
         
-        conn.close()
         return jsonify(response_data)
         
     except Exception as e:
@@ -148,15 +210,36 @@ def get_all_nodes():
         limit = min(int(request.args.get('limit', 1000)), 5000)
         domain = request.args.get('domain')
         source = request.args.get('source')
+        category = request.args.get('category')
+        platform = request.args.get('platform')
+        sort = request.args.get('sort')
+        if sort and sort not in TREND_SORTS:
+            return jsonify({'error': f"sort must be one of: {', '.join(TREND_SORTS)}"}), 400
         
         conn = get_db_connection()
         
         # Build query
-        query = """
-        SELECT id, name, macro_domain, popularity, 
-               monthly_users, url, logo_url, price, source, categories
-        FROM ai_tool
-        """
+        if sort:
+            # Trending tools only, walked in idx_tool_trend_<sort> order
+            query = """
+            SELECT id, name, macro_domain, popularity, 
+                   monthly_users, url, logo_url, price, source,
+                   COALESCE(d.degree, 0) AS degree,
+                   ROUND(COALESCE(d.weighted_degree, 0), 4) AS weighted_degree,
+                   tt.velocity, tt.acceleration
+            FROM tool_trend tt
+            JOIN ai_tool ON ai_tool.id = tt.tool_id
+            LEFT JOIN ai_tool_degree d ON d.tool_id = ai_tool.id
+            """
+        else:
+            query = """
+            SELECT id, name, macro_domain, popularity, 
+                   monthly_users, url, logo_url, price, source,
+                   COALESCE(d.degree, 0) AS degree,
+                   ROUND(COALESCE(d.weighted_degree, 0), 4) AS weighted_degree
+            FROM ai_tool
+            LEFT JOIN ai_tool_degree d ON d.tool_id = ai_tool.id
+            """
         
         params = []
         conditions = []
@@ -167,31 +250,36 @@ def get_all_nodes():
         if source:
             conditions.append("source = ?")
             params.append(source)
+        if category:
+            # Comma-separated, matches any; served by idx_tool_category_category
+            conditions.append("""id IN (
+                SELECT tc.tool_id FROM category c
+                JOIN tool_category tc ON tc.category_id = c.id
+                WHERE c.name IN (SELECT value FROM json_each(?))
+            )""")
+            params.append(json.dumps([c.strip() for c in category.split(',') if c.strip()]))
+        if platform:
+            conditions.append("id IN (SELECT tool_id FROM tool_platform WHERE platform = ?)")
+            params.append(platform)
             
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
+        if sort:
+            query += f" ORDER BY tt.{sort} DESC"
             
         query += " LIMIT ?"
         params.append(limit)
         
         nodes = conn.execute(query, params).fetchall()
+        relations = load_tool_relations(conn, [node['id'] for node in nodes], fields=('categories',))
         
         # Convert to list of dicts and process
         nodes_list = []
         for node in nodes:
             node_dict = dict(node)
-            
-            # Parse categories JSON
-            if node_dict['categories']:
-                try:
-                    node_dict['categories'] = json.loads(node_dict['categories'])
-                except:
-                    node_dict['categories'] = []
-            else:
-                node_dict['categories'] = []
+            node_dict['categories'] = relations[node_dict['id']]['categories']
             
             # Calculate node sizes
-            node_dict['degree'] = 5  # Mock degree
             node_dict['degree_size'] = size_by_degree(node_dict['degree'])
             
             # Calculate popularity size
@@ -200,14 +288,15 @@ def get_all_nodes():
             
             nodes_list.append(node_dict)
         
-        conn.close()
-        
         return jsonify({
             'nodes': nodes_list,
             'total': len(nodes_list),
             'filters_applied': {
                 'domain': domain,
                 'source': source,
+                'category': category,
+                'platform': platform,
+                'sort': sort,
                 'limit': limit
             }
         })
@@ -216,38 +305,150 @@ def get_all_nodes():
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
 
+def build_match_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 MATCH expression
+    
+    Every word is quoted (so FTS5 operators in user input are plain text); the
+    last one is prefix-matched for search-as-you-type: "video gen" -> "video" "gen"*
+    """
+    terms = re.findall(r'\w+', text.lower())
+    if not terms:
+        return ''
+    return ' '.join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+
+
+@app.route('/api/search')
+def search_tools():
+    """
+    Ranked full-text search over name, description and categories
+    
+    Query params: q (required), page (1-based), per_page (max 100), domain
+    Ranking is bm25 with name matches weighted above categories and description.
+    """
+    try:
+        text = request.args.get('q', '').strip()
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = min(max(1, int(request.args.get('per_page', 20))), 100)
+        domain = request.args.get('domain')
+        
+        match = build_match_query(text)
+        if not match:
+            return jsonify({'error': 'Query parameter q is required'}), 400
+        
+        conn = get_db_connection()
+        
+        conditions = ["ai_tool_fts MATCH ?"]
+        params = [match]
+        if domain:
+            conditions.append("t.macro_domain = ?")
+            params.append(domain)
+        where = " AND ".join(conditions)
+        
+        # One search index per shard (bm25 statistics are per shard); otherwise just main
+        schemas = shard_schemas(conn)
+        
+        total = conn.execute("SELECT SUM(n) FROM (" + " UNION ALL ".join(f"""
+        SELECT COUNT(*) AS n FROM {schema}.ai_tool_fts
+        JOIN {schema}.ai_tool t ON t.id = ai_tool_fts.rowid
+        WHERE {where}
+        """ for schema in schemas) + ")", params * len(schemas)).fetchone()[0]
+        
+        rows = conn.execute(" UNION ALL ".join(f"""
+        SELECT t.id, t.name, t.macro_domain, t.popularity, t.url, t.logo_url, t.price,
+               highlight(ai_tool_fts, 0, '<mark>', '</mark>') AS name_highlight,
+               snippet(ai_tool_fts, 1, '<mark>', '</mark>', '…', 16) AS snippet,
+               bm25(ai_tool_fts, 10.0, 1.0, 4.0) AS score
+        FROM {schema}.ai_tool_fts
+        JOIN {schema}.ai_tool t ON t.id = ai_tool_fts.rowid
+        WHERE {where}
+        """ for schema in schemas) + """
+        ORDER BY score
+        LIMIT ? OFFSET ?
+        """, params * len(schemas) + [per_page, (page - 1) * per_page]).fetchall()
+        
+        relations = load_tool_relations(conn, [row['id'] for row in rows], fields=('categories',))
+        
+        results = []
+        for row in rows:
+            result = dict(row)
+            # bm25 is lower-is-better; expose higher-is-better
+            result['score'] = round(-result['score'], 4)
+            result['categories'] = relations[result['id']]['categories']
+            results.append(result)
+        
+        return jsonify({
+            'results': results,
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'pages': (total + per_page - 1) // per_page,
+            'query': text
+        })
+        
+    except sqlite3.OperationalError as e:
+        return jsonify({'error': f'Search unavailable: {str(e)}'}), 503
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+
 @app.route('/api/graph/edges')
 def get_edges():
     """
     Get edge data for graph visualization
-    Mock implementation for now since we don't have ai_synergy table
+    Strongest edges first (idx_ai_synergy_strength); ?tool_id= restricts to one tool's edges
     """
     try:
         limit = min(int(request.args.get('limit', 2000)), 10000)
         min_strength = float(request.args.get('min_strength', 0.3))
+        tool_id = request.args.get('tool_id', type=int)
         
-        # Mock edges data
-        edges = [
-            {'tool_id_1': 1, 'tool_id_2': 2, 'strength': 0.8, 'edge_type': 'functional'},
-            {'tool_id_1': 1, 'tool_id_2': 3, 'strength': 0.6, 'edge_type': 'domain'},
-            {'tool_id_1': 2, 'tool_id_2': 4, 'strength': 0.7, 'edge_type': 'functional'},
-        ]
-        
-        # Filter by strength
-        filtered_edges = [e for e in edges if e['strength'] >= min_strength]
+        conn = get_db_connection()
         
-        edge_type_stats = Counter(edge['edge_type'] for edge in filtered_edges)
+        if tool_id is not None:
+            # Both halves are range scans on the covering (tool_id_x, strength) indexes
+            source = """
+            SELECT tool_id_1, tool_id_2, strength, edge_type FROM ai_synergy
+            WHERE tool_id_1 = ? AND strength >= ?
+            UNION ALL
+            SELECT tool_id_1, tool_id_2, strength, edge_type FROM ai_synergy
+            WHERE tool_id_2 = ? AND strength >= ?
+            """
+            params = [tool_id, min_strength, tool_id, min_strength]
+        else:
+            source = """
+            SELECT tool_id_1, tool_id_2, strength, edge_type FROM ai_synergy
+            WHERE strength >= ?
+            """
+            params = [min_strength]
+        
+        edges = conn.execute(f"""
+        SELECT tool_id_1, tool_id_2, strength, edge_type FROM ({source})
+        ORDER BY strength DESC
+        LIMIT ?
+        """, params + [limit]).fetchall()
+        
+        # Statistics over every edge passing the filter, not just the returned page
+        type_rows = conn.execute(f"""
+        SELECT edge_type, COUNT(*) AS count, SUM(strength) AS strength_sum
+        FROM ({source})
+        GROUP BY edge_type
+        """, params).fetchall()
+        
+        total = sum(row['count'] for row in type_rows)
+        strength_sum = sum(row['strength_sum'] for row in type_rows)
         
         return jsonify({
-            'edges': filtered_edges[:limit],
-            'total': len(filtered_edges),
+            'edges': [dict(edge) for edge in edges],
+            'total': total,
             'statistics': {
-                'edge_type_distribution': dict(edge_type_stats),
-                'avg_strength': sum(e['strength'] for e in filtered_edges) / len(filtered_edges) if filtered_edges else 0,
+                'edge_type_distribution': {row['edge_type'] or 'unknown': row['count'] for row in type_rows},
+                'avg_strength': strength_sum / total if total else 0,
                 'min_strength_filter': min_strength
             },
             'filters_applied': {
                 'min_strength': min_strength,
+                'tool_id': tool_id,
                 'limit': limit
             }
         })
@@ -285,8 +486,6 @@ def get_communities():
                 'domain_diversity': 1
             })
         
-        conn.close()
-        
         return jsonify({
             'communities': communities,
             'total_communities': len(communities),
@@ -326,11 +525,22 @@ def get_graph_statistics():
         GROUP BY source
         """).fetchall()
         
-        # Mock edge statistics (would be real with ai_synergy table)
-        edge_count = 50  # Mock
-        avg_strength = 0.65  # Mock
-        
-        conn.close()
+        # Edge statistics from ai_synergy
+        edge_stats = conn.execute("""
+        SELECT COUNT(*) AS edge_count,
+               AVG(strength) AS avg_strength,
+               COUNT(*) FILTER (WHERE strength >= 0.7) AS strong_edges,
+               COUNT(*) FILTER (WHERE strength >= 0.4 AND strength < 0.7) AS medium_edges,
+               COUNT(*) FILTER (WHERE strength < 0.4) AS weak_edges
+        FROM ai_synergy
+        """).fetchone()
+        edge_type_stats = conn.execute("""
+        SELECT edge_type, COUNT(*) AS count
+        FROM ai_synergy
+        GROUP BY edge_type
+        """).fetchall()
+        edge_count = edge_stats['edge_count']
+        avg_strength = round(edge_stats['avg_strength'] or 0, 4)
         
         return jsonify({
             'graph_overview': {
@@ -344,11 +554,11 @@ def get_graph_statistics():
                 'source_distribution': {row['source']: row['count'] for row in source_stats}
             },
             'edge_statistics': {
-                'edge_type_distribution': {'functional': 30, 'domain': 20},  # Mock
+                'edge_type_distribution': {row['edge_type'] or 'unknown': row['count'] for row in edge_type_stats},
                 'strength_distribution': {
-                    'strong_edges': 15,
-                    'medium_edges': 25,
-                    'weak_edges': 10
+                    'strong_edges': edge_stats['strong_edges'],
+                    'medium_edges': edge_stats['medium_edges'],
+                    'weak_edges': edge_stats['weak_edges']
                 }
             },
             'community_statistics': {
@@ -363,28 +573,38 @@ def get_graph_statistics():
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
 
+def snapshot_info() -> Optional[Dict[str, Any]]:
+    """Version, stage and age of the snapshot being served (None when reading the live database)"""
+    manifest = current_snapshot()
+    if manifest is None:
+        return None
+    return {key: manifest[key] for key in ('version', 'stage', 'created_at', 'tools', 'edges')}
+
+
 @app.route('/api/health')
 def health_check():
     """Health check endpoint"""
     try:
         conn = get_db_connection()
         count = conn.execute("SELECT COUNT(*) FROM ai_tool").fetchone()[0]
-        conn.close()
         
         return jsonify({
             'status': 'healthy',
             'message': 'AI Tools Graph API is running (SQLite)',
             'database': {
-                'type': 'SQLite',
-                'path': DB_PATH,
-                'total_tools': count
+                'type': 'SQLite (sharded)' if SHARD_DIR else 'SQLite',
+                'path': SHARD_DIR or DB_PATH,
+                'total_tools': count,
+                'snapshot': snapshot_info()
             },
             'endpoints': [
                 '/api/node/<id>',
                 '/api/graph/nodes',
                 '/api/graph/edges', 
+                '/api/search',
                 '/api/communities',
-                '/api/graph/statistics'
+                '/api/graph/statistics',
+                '/api/ingest/status'
             ]
         })
     except Exception as e:
@@ -394,6 +614,15 @@ def health_check():
         }), 500
 
 
+@app.route('/api/ingest/status')
+def get_ingest_status():
+    """Ingest log drainer lag (records/bytes not yet applied, age of the oldest)"""
+    try:
+        return jsonify(ingest_lag(DB_PATH, INGEST_LOG_DIR))
+    except Exception as e:
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
@@ -409,14 +638,21 @@ if __name__ == '__main__':
     print("=" * 50)
     print("📊 Available endpoints:")
     print("   GET /api/node/<id>        - Get node details")
-    print("   GET /api/graph/nodes      - Get all nodes")
-    print("   GET /api/graph/edges      - Get edges")
+    print("   GET /api/graph/nodes      - Get all nodes (?domain, ?source, ?category, ?platform)")
+    print("   GET /api/graph/edges      - Get edges (?min_strength, ?tool_id, ?limit)")
+    print("   GET /api/search?q=...     - Full-text search (ranked, paginated)")
     print("   GET /api/communities      - Get communities")
     print("   GET /api/graph/statistics - Get graph stats")
+    print("   GET /api/ingest/status    - Ingest log lag")
     print("   GET /api/health           - Health check")
     print()
-    print("💾 Database: SQLite")
-    print(f"📁 Database path: {DB_PATH}")
+    print("💾 Database: SQLite" + (" (per-source shards)" if SHARD_DIR else ""))
+    print(f"📁 Database path: {SHARD_DIR or DB_PATH}")
+    snapshot = current_snapshot()
+    if snapshot:
+        print(f"📸 Serving snapshot v{snapshot['version']} ({snapshot['stage']}, {snapshot['created_at']})")
+    else:
+        print(f"📸 No current snapshot in {SNAPSHOT_DIR}; reading the live database")
     print()
     print("🔗 Example URLs:")
     print("   http://localhost:5000/api/health")
@@ -424,4 +660,7 @@ if __name__ == '__main__':
     print("   http://localhost:5000/api/communities")
     print()
     
+    # Creates missing tables/indexes (ai_synergy included) and backfills the normalised category tables
+    ShardedSQLiteAdapter(SHARD_DIR) if SHARD_DIR else SQLiteAdapter(DB_PATH)
+    
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
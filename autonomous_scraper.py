@@ -24,6 +24,8 @@ from scrapers.toolify import ToolifyScraper
 # from scrapers.topai_tools import TopAIToolsScraper  # Removed due to blocking/errors
 from scrapers.phygital_library import PhygitalLibraryScraper
 from database.adapters import SQLiteAdapter
+from database.ingest_log import IngestLogWriter, IngestLogDrainer, DEFAULT_LOG_DIR
+from database.snapshot import publish_snapshot
 
 # Setup logging
 logging.basicConfig(
@@ -37,10 +39,16 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class AutonomousScraper:
-    def __init__(self, target_count=1000):
+    def __init__(self, target_count=1000, ingest_log_dir=DEFAULT_LOG_DIR):
         self.target_count = target_count
         self.db = SQLiteAdapter('database/ai_tools.db')
         
+        # Tools go to the append-only ingest log; a single drainer writes them to SQLite.
+        # The read-only snapshot for the API is published once scraping ends
+        # (publish_snapshot()), not per drain: each one copies the whole database
+        self.ingest_log = IngestLogWriter(ingest_log_dir)
+        self.drainer = IngestLogDrainer(log_dir=ingest_log_dir, adapter=self.db)
+        
         # Initialize all scrapers (theresanaiforthat last - requires Selenium)
         # topai_tools removed due to blocking/errors
         self.scrapers = {
@@ -83,6 +91,27 @@ class AutonomousScraper:
         logger.info(f"Waiting {delay:.1f}s ({delay_type})...")
         time.sleep(delay)
 
+    def drain_ingest_log(self):
+        """Apply logged tools now, unless a dedicated drainer process is running"""
+        try:
+            result = self.drainer.drain_if_available()
+            if result is None:
+                lag = self.drainer.lag()
+                logger.info(f"Drainer running elsewhere, lag: {lag['pending_records']} records")
+            elif result['applied'] or result['failed']:
+                logger.info(f"Drained {result['applied']} tools into database "
+                            f"({result['failed']} failed) in {result['elapsed_ms']:.0f} ms")
+        except Exception as e:
+            logger.error(f"Error draining ingest log: {e}")
+
+    def publish_snapshot(self):
+        """Publish a read-only snapshot for the API at the end of the scraping stage"""
+        try:
+            manifest = publish_snapshot(self.db.db_path, stage='scrape')
+            logger.info(f"📸 Published snapshot v{manifest['version']} ({manifest['tools']} tools)")
+        except Exception as e:
+            logger.error(f"Error publishing snapshot: {e}")
+
     def run_scraper(self, name, scraper, max_tools_per_site=200):
         """Run a single scraper with error handling"""
         logger.info(f"🚀 Starting scraper: {name}")
@@ -128,27 +157,20 @@ class AutonomousScraper:
 
             logger.info(f"Found {len(tools)} tools from {name}")
             
-            # Add tools to database
-            for i, tool in enumerate(tools):
-                try:
-                    # Add source info
-                    tool.source = f"{name}_autonomous"
-                    tool.last_scraped = datetime.now()
-                    
-                    # Insert into database
-                    self.db.upsert_ai_tool(tool)
-                    tools_added += 1
-                    
-                    if i % 10 == 0:  # Log progress every 10 tools
-                        logger.info(f"Added {i+1}/{len(tools)} tools from {name}")
-                    
-                    # Small delay between tools
-                    if i < len(tools) - 1:
-                        time.sleep(random.uniform(0.5, 1.5))
-                        
-                except Exception as e:
-                    logger.error(f"Error adding tool {tool.name}: {e}")
-                    self.stats['errors'] += 1
+            # Append tools to the ingest log (one fsync for the whole batch)
+            scraped_at = datetime.now()
+            for tool in tools:
+                tool.source = f"{name}_autonomous"
+                tool.last_scraped = scraped_at
+            
+            try:
+                tools_added = self.ingest_log.append_many(tools)
+                logger.info(f"Logged {tools_added} tools from {name}")
+            except Exception as e:
+                logger.error(f"Error writing {name} tools to ingest log: {e}")
+                self.stats['errors'] += 1
+            
+            self.drain_ingest_log()
 
         except Exception as e:
             logger.error(f"Error running scraper {name}: {e}")
@@ -247,17 +269,24 @@ def main():
     print("Logs will be saved to: autonomous_scraping.log")
     print("-" * 50)
     
+    scraper = None
     try:
         scraper = AutonomousScraper(target_count=target)
         scraper.run_full_autonomous_scraping()
         
     except KeyboardInterrupt:
         print("\n⏹️  Scraping stopped by user")
-        print("Progress has been saved to database")
+        print("Progress has been saved to the ingest log")
         
     except Exception as e:
         print(f"\n💥 Unexpected error: {e}")
         print("Check autonomous_scraping.log for details")
+    
+    finally:
+        if scraper:
+            scraper.ingest_log.close()
+            scraper.drain_ingest_log()
+            scraper.publish_snapshot()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: keyword-overlap candidate pairs vs blocked top-k candidates
+
+Synthetic tools shaped like the scraped data: 90% carry a "General"
+category (one keyword bucket holding almost every tool), the rest of the
+categories come from a few dozen topics. Reports, per size:
+
+- exhaustive: _filter_pairs_by_category_overlap (every pair sharing any
+  category word, built in a Python set); skipped above --max-exhaustive
+- top-k: _top_k_candidate_pairs with CANDIDATE_TOP_K, the eligible pairs its
+  upper bounds pruned, and how many of the exhaustive strong pairs
+  (strength >= 0.7) it kept when both ran
+
+Usage:
+    python benchmarks/candidate_pairs.py [sizes...] [--max-exhaustive N]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.adapters import SQLiteAdapter
+from synergy.build_synergy import CANDIDATE_TOP_K, EdgeScoringEngine, ToolData
+
+TOPICS = (
+    "image generation, video editing, audio transcription, music creation, code assistant, "
+    "writing copy, marketing email, seo content, data analytics, research papers, chatbot support, "
+    "design logos, presentation slides, voice cloning, avatar video, meeting notes, legal documents, "
+    "finance reports, sales outreach, productivity automation, translation language, resume career"
+).split(', ')
+DOMAINS = ['NLP', 'VIDEO', 'AUDIO', 'IMAGE', 'CODE', 'OTHER']
+
+
+def make_tools(count: int, rng: np.random.Generator) -> list:
+    tools = []
+    for i in range(count):
+        topic = TOPICS[int(rng.integers(len(TOPICS)))]
+        categories = ['General'] if rng.random() < 0.9 else []
+        if rng.random() < 0.5:
+            categories.append(topic.title())
+        words = topic.split() + [TOPICS[int(j)].split()[0] for j in rng.integers(len(TOPICS), size=6)]
+        tools.append(ToolData(
+            id=i + 1,
+            name=f"Tool {i}",
+            description=' '.join(rng.permutation(words)),
+            macro_domain=DOMAINS[int(rng.integers(len(DOMAINS)))],
+            categories=categories,
+            monthly_users=None if i % 5 == 0 else int(rng.integers(0, 5_000_000)),
+            popularity=0.0
+        ))
+    return tools
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('sizes', nargs='*', type=int, default=[5000, 50000])
+    parser.add_argument('--max-exhaustive', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        engine = EdgeScoringEngine(SQLiteAdapter(str(Path(tmp) / 'bench.db')))
+
+    print(f"🔍 Candidate pairs (top {CANDIDATE_TOP_K} per tool)")
+    print("=" * 60)
+    for size in args.sizes:
+        tools = make_tools(size, np.random.default_rng(size))
+        tfidf_matrix = engine._compute_tfidf_matrix([tool.description for tool in tools])
+        pop_norm = engine._calculate_popularity_normalization(tools)
+        tool_arrays = engine._tool_arrays(tools, pop_norm, tfidf_matrix)
+
+        strong = None
+        if size <= args.max_exhaustive:
+            started = time.perf_counter()
+            pairs = np.asarray(engine._filter_pairs_by_category_overlap(tools), dtype=np.int64).reshape(-1, 2)
+            elapsed = time.perf_counter() - started
+            strength, _ = engine._score_pair_block(pairs[:, 0], pairs[:, 1], tfidf_matrix, tool_arrays, pop_norm)
+            strong = {tuple(pair) for pair in pairs[strength >= 0.7].tolist()}
+            print(f"{size:>7,} exhaustive: {len(pairs):>12,} pairs  {elapsed:6.2f}s")
+
+        started = time.perf_counter()
+        candidates, pruned = engine._top_k_candidate_pairs(
+            tools, tfidf_matrix, tool_arrays, pop_norm, CANDIDATE_TOP_K
+        )
+        elapsed = time.perf_counter() - started
+        kept = f"  strong kept {len(strong & set(candidates)):,}/{len(strong):,}" if strong is not None else ''
+        print(f"{size:>7,} top-k:      {len(candidates):>12,} pairs  {elapsed:6.2f}s  "
+              f"({pruned:,} pruned by bounds){kept}")
+
+
+if __name__ == "__main__":
+    main()
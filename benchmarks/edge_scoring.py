@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-pair vs vectorised block scoring in EdgeScoringEngine
+
+Builds N synthetic tools (descriptions drawn from a small vocabulary, a few
+macro domains, monthly_users with gaps) and M random candidate pairs, then:
+
+- scores a sample of the pairs with the per-pair methods
+  (_calculate_edge_strength + _classify_edge_type) and extrapolates to M
+- scores all M pairs with _score_pair_block / _classify_edge_types in blocks
+  of SCORING_BLOCK_SIZE
+- checks that both agree on the sample (strength and edge type)
+
+Usage:
+    python benchmarks/edge_scoring.py [num_tools] [num_pairs]
+"""
+
+import contextlib
+import io
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.adapters import SQLiteAdapter
+from synergy.build_synergy import EDGE_TYPES, SCORING_BLOCK_SIZE, EdgeScoringEngine, ToolData
+
+WORDS = (
+    "video audio image text chat writing code generate edit summarize translate voice music "
+    "design marketing email seo data analytics research assistant automation workflow avatar "
+    "transcription presentation resume legal finance sales support meeting notes podcast"
+).split()
+DOMAINS = ['NLP', 'VIDEO', 'AUDIO', 'IMAGE', 'CODE', 'OTHER', '']
+SAMPLE_PAIRS = 20_000
+
+
+def make_tools(count: int, rng: random.Random) -> list:
+    return [
+        ToolData(
+            id=i + 1,
+            name=f"Tool {i}",
+            description=' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 25))),
+            macro_domain=rng.choice(DOMAINS),
+            categories=[],
+            monthly_users=None if i % 7 == 0 else rng.randint(0, 5_000_000),
+            popularity=0.0
+        )
+        for i in range(count)
+    ]
+
+
+def main():
+    num_tools = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    num_pairs = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    rng = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        engine = EdgeScoringEngine(SQLiteAdapter(str(Path(tmp) / 'bench.db')))
+
+    tools = make_tools(num_tools, rng)
+    left = np.array([rng.randrange(num_tools) for _ in range(num_pairs)], dtype=np.int64)
+    right = (left + 1 + np.array([rng.randrange(num_tools - 1) for _ in range(num_pairs)])) % num_tools
+    pairs = np.stack([np.minimum(left, right), np.maximum(left, right)], axis=1)
+
+    started = time.perf_counter()
+    tfidf_matrix = engine._compute_tfidf_matrix([tool.description for tool in tools])
+    pop_norm = engine._calculate_popularity_normalization(tools)
+    tool_arrays = engine._tool_arrays(tools, pop_norm, tfidf_matrix)
+    setup_s = time.perf_counter() - started
+
+    print(f"🕸️ Edge scoring: {num_tools:,} tools, {num_pairs:,} candidate pairs")
+    print("=" * 60)
+    print(f"{'TF-IDF + normalisation':>24}: {setup_s:7.2f}s")
+
+    sample = pairs[:SAMPLE_PAIRS]
+    started = time.perf_counter()
+    scalar = []
+    for idx1, idx2 in sample.tolist():
+        strength = engine._calculate_edge_strength(
+            tools[idx1], tools[idx2], tfidf_matrix[idx1], tfidf_matrix[idx2], pop_norm
+        )
+        edge_type = engine._classify_edge_type(
+            tools[idx1], tools[idx2], tfidf_matrix[idx1], tfidf_matrix[idx2], strength
+        )
+        scalar.append((strength, edge_type))
+    per_pair_s = (time.perf_counter() - started) / len(sample)
+    print(f"{'per-pair (extrapolated)':>24}: {per_pair_s * num_pairs:7.2f}s  "
+          f"({per_pair_s * 1e6:.0f} µs/pair over {len(sample):,} pairs)")
+
+    started = time.perf_counter()
+    kept = 0
+    for start in range(0, num_pairs, SCORING_BLOCK_SIZE):
+        rows1, rows2 = pairs[start:start + SCORING_BLOCK_SIZE, 0], pairs[start:start + SCORING_BLOCK_SIZE, 1]
+        strength, semantic = engine._score_pair_block(rows1, rows2, tfidf_matrix, tool_arrays, pop_norm)
+        keep = strength >= engine.STRENGTH_THRESHOLD
+        engine._classify_edge_types(rows1[keep], rows2[keep], semantic[keep], tool_arrays)
+        kept += int(keep.sum())
+    block_s = time.perf_counter() - started
+    print(f"{'vectorised blocks':>24}: {block_s:7.2f}s  ({kept:,} edges kept)")
+
+    strength, semantic = engine._score_pair_block(sample[:, 0], sample[:, 1], tfidf_matrix, tool_arrays, pop_norm)
+    edge_types = engine._classify_edge_types(sample[:, 0], sample[:, 1], semantic, tool_arrays)
+    max_diff = max(abs(s - v) for (s, _), v in zip(scalar, strength.tolist()))
+    mismatched_types = sum(
+        1 for (s, t), code in zip(scalar, edge_types.tolist())
+        if s >= engine.STRENGTH_THRESHOLD and t != EDGE_TYPES[code]
+    )
+    print(f"{'agreement on sample':>24}: max |Δstrength| {max_diff:.2e}, {mismatched_types} edge types differ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fitted TF-IDF vs the streaming hashed featuriser
+
+Builds N synthetic descriptions (tfidf_memory.make_descriptions) and
+reports, for each featuriser, wall time and, in a second run, peak traced
+memory (numpy and scipy buffers included; tracing slows Python code, so
+the two are measured apart):
+
+- tfidf: _compute_tfidf_matrix over the whole list (fit_transform)
+- hashed: HashedFeaturizer.update over pages of STREAM_PAGE_SIZE
+  descriptions, generated page by page, then matrix()
+- hashed +1%: a second update after 1% new tools are appended (only they
+  are hashed; the document-frequency counter absorbs them without a refit)
+
+Usage:
+    python benchmarks/hashed_features.py [num_tools]
+"""
+
+import contextlib
+import io
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tfidf_memory import make_descriptions
+from database.adapters import SQLiteAdapter
+from synergy.build_synergy import EdgeScoringEngine
+from synergy.hashed_features import STREAM_PAGE_SIZE, HashedFeaturizer
+
+
+def pages(seed: int, count: int, first_id: int = 1):
+    """Descriptions generated one page at a time, like a keyset walk over ai_tool"""
+    rng = np.random.default_rng(seed)
+    for start in range(0, count, STREAM_PAGE_SIZE):
+        size = min(STREAM_PAGE_SIZE, count - start)
+        yield [{'id': first_id + start + i, 'description': description}
+               for i, description in enumerate(make_descriptions(size, rng))]
+
+
+def measure(label: str, run, prepare=lambda: None) -> None:
+    """Time run(prepare()), then trace the peak memory of a second, identically prepared run"""
+    state = prepare()
+    started = time.perf_counter()
+    matrix = run(state)
+    elapsed = time.perf_counter() - started
+    state = prepare()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>10}: {elapsed:6.2f}s  peak {peak / 2**20:7.1f} MB  "
+          f"{matrix.shape[0]:,} rows, {matrix.nnz:,} non-zeros")
+
+
+def main():
+    num_tools = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    added = max(1, num_tools // 100)
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        engine = EdgeScoringEngine(SQLiteAdapter(str(Path(tmp) / 'bench.db')))
+
+    print(f"#️⃣ Featurisers: {num_tools:,} tools")
+    print("=" * 60)
+    descriptions = [row['description'] for page in pages(7, num_tools) for row in page]
+    measure('tfidf', lambda _: engine._compute_tfidf_matrix(descriptions))
+    del descriptions
+
+    def streamed(count: int):
+        def run(featurizer: HashedFeaturizer):
+            featurizer.update(pages(7, count))
+            updates.append(featurizer.last_stats)
+            return featurizer.matrix(featurizer.tool_ids.tolist())
+        return run
+
+    def updated():
+        featurizer = HashedFeaturizer(None)
+        featurizer.update(pages(7, num_tools))
+        return featurizer
+
+    updates = []
+    measure('hashed', streamed(num_tools), lambda: HashedFeaturizer(None))
+    measure('hashed +1%', streamed(num_tools + added), updated)
+    print(f"            (second update hashed {updates[-1]['hashed']:,}, reused {updates[-1]['reused']:,})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: HTTP round trips per 1,000 tools for the Supabase merger
+
+Runs SupabaseMerger.merge_and_upsert_tools (per-tool path) and
+SupabaseMerger.merge_and_upsert_tools_bulk (batched path) against the local
+PostgREST stand-in and reports requests and wall time per 1,000 tools.
+
+Half of each batch already exists in the database (so it exercises lookups,
+updates and unchanged-timestamp bumps), the other half is new.
+
+Usage:
+    python benchmarks/merge_round_trips.py [num_tools]
+"""
+
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.postgrest_standin import PostgRESTStandIn
+from merge.merge_and_upsert import SupabaseMerger
+from scrapers.common import AITool
+
+
+def make_tools(count: int, offset: int = 0, source: str = 'benchmark') -> list:
+    """Generate synthetic tools with unique URLs and names"""
+    return [
+        AITool(
+            ext_id=f"tool-{i}",
+            name=f"Benchmark Tool {i}",
+            description=f"Synthetic tool number {i} used for round-trip benchmarks",
+            price='Free',
+            popularity=float(i % 100),
+            categories=['benchmark', f"group {i % 10}"],
+            source=source,
+            macro_domain='NLP',
+            url=f"https://example.com/tools/{i}",
+            monthly_users=1000 + i,
+            platform=['web'],
+            features={'free_tier': True},
+        )
+        for i in range(offset, offset + count)
+    ]
+
+
+def run_case(label: str, num_tools: int, bulk: bool) -> dict:
+    """Seed half of the tools, then merge the full batch and count requests"""
+    with PostgRESTStandIn() as server:
+        with contextlib.redirect_stdout(io.StringIO()):
+            merger = SupabaseMerger(url=server.url, key=server.key)
+            merger.merge_and_upsert_tools_bulk(make_tools(num_tools // 2))
+
+        # Existing half gets a new description so it counts as an update
+        tools = make_tools(num_tools)
+        for tool in tools[: num_tools // 4]:
+            tool.description += " (updated)"
+
+        server.reset_counters()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            if bulk:
+                stats = merger.merge_and_upsert_tools_bulk(tools)
+            else:
+                stats = merger.merge_and_upsert_tools(tools)
+        elapsed = time.perf_counter() - start
+
+        return {
+            'label': label,
+            'stats': stats,
+            'requests': server.request_count,
+            'by_method': dict(server.requests_by_method),
+            'seconds': elapsed,
+        }
+
+
+def main():
+    num_tools = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    scale = 1000 / num_tools
+
+    print(f"🏁 Supabase merge round trips ({num_tools} tools, local PostgREST stand-in)")
+    print("=" * 60)
+    for label, bulk in (('per-tool', False), ('bulk', True)):
+        result = run_case(label, num_tools, bulk)
+        print(f"{result['label']:>9}: {result['requests'] * scale:8.1f} requests / 1k tools"
+              f"  {result['seconds'] * scale:6.2f}s / 1k tools  {result['by_method']}")
+        print(f"           stats: {result['stats']}")
+
+
+if __name__ == "__main__":
+    main()
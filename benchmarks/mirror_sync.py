@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: HTTP requests for a full pull vs an incremental mirror sync
+
+Loads N tools and ~5N edges into the local PostgREST stand-in, then compares:
+
+- full pull: what load_scoring_tools + the community detector did before,
+  KeysetPaginator walks of every tool and every edge
+- first mirror sync (full reload into database/mirror.py's SQLite copy)
+- incremental sync after updating and deleting 1% of the tools and edges
+
+Usage:
+    python benchmarks/mirror_sync.py [num_tools]
+"""
+
+import contextlib
+import io
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from supabase import create_client
+
+from database.mirror import SupabaseMirror
+from database.pagination import KeysetPaginator
+from database.postgrest_standin import PostgRESTStandIn
+
+
+def seed(client, num_tools: int, rng: random.Random) -> None:
+    for start in range(0, num_tools, 1000):
+        client.table('ai_tool').insert([
+            {'ext_id': f"tool-{i}", 'name': f"Mirror Tool {i}", 'description': f"Synthetic tool {i}",
+             'source': 'benchmark', 'macro_domain': 'NLP', 'popularity': float(i % 100),
+             'categories': ['benchmark', f"group {i % 10}"]}
+            for i in range(start, min(num_tools, start + 1000))
+        ]).execute()
+
+    pairs = {tuple(sorted(rng.sample(range(1, num_tools + 1), 2))) for _ in range(5 * num_tools)}
+    pairs = sorted(pairs)
+    for start in range(0, len(pairs), 1000):
+        client.table('ai_synergy').insert([
+            {'tool_id_1': a, 'tool_id_2': b, 'strength': round(rng.random(), 3), 'edge_type': 'weak'}
+            for a, b in pairs[start:start + 1000]
+        ]).execute()
+
+
+def main():
+    num_tools = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = random.Random(5)
+
+    with PostgRESTStandIn(max_rows=1000) as server, tempfile.TemporaryDirectory() as tmp:
+        client = create_client(server.url, server.key)
+        seed(client, num_tools, rng)
+
+        print(f"🪞 Supabase reads for {num_tools:,} tools (PostgREST stand-in)")
+        print("=" * 60)
+
+        server.reset_counters()
+        started = time.perf_counter()
+        tools = KeysetPaginator(client, 'ai_tool', 'id, name, description, macro_domain, categories').fetch_all()
+        edges = KeysetPaginator(client, 'ai_synergy', 'id, tool_id_1, tool_id_2, strength').fetch_all()
+        print(f"{'full pull':>18}: {server.request_count:5d} requests  "
+              f"{time.perf_counter() - started:6.2f}s  ({len(tools):,} tools, {len(edges):,} edges)")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            mirror = SupabaseMirror(client, str(Path(tmp) / 'mirror.db'), overlap_seconds=0)
+        for label in ('first mirror sync', 'unchanged'):
+            server.reset_counters()
+            result = mirror.sync()
+            print(f"{label:>18}: {server.request_count:5d} requests  {result['elapsed_ms'] / 1000:6.2f}s  "
+                  f"({result['ai_tool']:,} tools, {result['ai_synergy']:,} edges)")
+
+        changed = rng.sample(range(1, num_tools + 1), num_tools // 100)
+        for tool_id in changed[: len(changed) // 2]:
+            client.table('ai_tool').update({'popularity': 1.0}).eq('id', tool_id).execute()
+        client.table('ai_tool').delete().in_('id', changed[len(changed) // 2:]).execute()
+        client.table('ai_synergy').delete().in_('id', [e['id'] for e in edges[: len(edges) // 100]]).execute()
+
+        server.reset_counters()
+        result = mirror.sync()
+        print(f"{'1% changed':>18}: {server.request_count:5d} requests  {result['elapsed_ms'] / 1000:6.2f}s  "
+              f"({result['ai_tool']:,} tools, {result['mirror_tombstone']:,} deletes)")
+
+
+if __name__ == "__main__":
+    main()
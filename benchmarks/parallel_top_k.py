@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: top-k candidate pass in one process vs a process pool
+
+Builds the synthetic tools of benchmarks/candidate_pairs.py and runs
+_top_k_candidate_pairs with each worker count. Row blocks go to a
+ProcessPoolExecutor that memory-maps the shared matrices. Reports, per
+worker count:
+
+- wall time and speedup over one worker
+- whether the candidate pairs and pruned count are identical to the
+  single-process run (the merge is deterministic)
+
+Speedup is bounded by the cores actually available (os.cpu_count()).
+
+Usage:
+    python benchmarks/parallel_top_k.py [num_tools] [--workers 1 2 4 ...]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from candidate_pairs import make_tools
+from database.adapters import SQLiteAdapter
+from synergy.build_synergy import CANDIDATE_TOP_K, EdgeScoringEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('num_tools', nargs='?', type=int, default=20000)
+    parser.add_argument('--workers', nargs='+', type=int,
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        engine = EdgeScoringEngine(SQLiteAdapter(str(Path(tmp) / 'bench.db')))
+
+    tools = make_tools(args.num_tools, np.random.default_rng(args.num_tools))
+    tfidf_matrix = engine._compute_tfidf_matrix([tool.description for tool in tools])
+    pop_norm = engine._calculate_popularity_normalization(tools)
+    tool_arrays = engine._tool_arrays(tools, pop_norm, tfidf_matrix)
+
+    print(f"🧵 Top-k candidate pass: {args.num_tools:,} tools, top {CANDIDATE_TOP_K}, "
+          f"{os.cpu_count()} CPU(s)")
+    print("=" * 60)
+    baseline = None
+    for workers in args.workers:
+        started = time.perf_counter()
+        result = engine._top_k_candidate_pairs(
+            tools, tfidf_matrix, tool_arrays, pop_norm, CANDIDATE_TOP_K, workers=workers
+        )
+        elapsed = time.perf_counter() - started
+        if baseline is None:
+            baseline = (result, elapsed)
+        same = 'identical' if result == baseline[0] else 'DIFFERENT'
+        print(f"{workers:>3} worker(s): {elapsed:7.2f}s  x{baseline[1] / elapsed:4.2f}  "
+              f"{len(result[0]):,} pairs, {result[1]:,} pruned ({same})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/search latency over a synthetic SQLite database
+
+Builds a temporary database with N tools whose descriptions draw words from a
+Zipf-distributed vocabulary (a few very common words, a long tail of rare
+ones), then times ranked, paginated /api/search requests through the Flask
+test client for common words, rare words, multi-word queries and prefixes.
+
+Usage:
+    python benchmarks/search_latency.py [num_tools]
+"""
+
+import contextlib
+import io
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.adapters import SQLiteAdapter
+from scrapers.common import AITool
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ra', 'so', 'tu', 'vi', 'xe', 'zo', 'bra', 'cli', 'dro', 'fen', 'gra']
+
+
+def make_vocabulary(size: int, seed: int = 7) -> list:
+    """Deterministic pseudo-words, most frequent first"""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_search_tools(count: int, vocabulary: list, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+    tools = []
+    for i in range(count):
+        words = rng.choices(vocabulary, weights=weights, k=30)
+        tools.append(AITool(
+            ext_id=f"search-{i}",
+            name=f"{words[0].title()} {words[1].title()} {i}",
+            description=' '.join(words),
+            price='Free',
+            popularity=float(i % 100),
+            categories=rng.sample(vocabulary[:200], 2),
+            source='benchmark',
+            url=f"https://example.com/search/{i}",
+        ))
+    return tools
+
+
+def main():
+    num_tools = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    vocabulary = make_vocabulary(5000)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'search.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            adapter = SQLiteAdapter(db_path)
+
+        started = time.perf_counter()
+        with adapter.transaction():
+            for tool in make_search_tools(num_tools, vocabulary):
+                adapter.upsert_ai_tool(tool)
+        print(f"🏗️  Loaded {num_tools} tools in {time.perf_counter() - started:.1f}s")
+
+        import api_server_sqlite
+        api_server_sqlite.DB_PATH = db_path
+        client = api_server_sqlite.app.test_client()
+
+        queries = {
+            'common word': vocabulary[0],
+            'mid-frequency word': vocabulary[50],
+            'rare word': vocabulary[3000],
+            'two words': f"{vocabulary[5]} {vocabulary[40]}",
+            'prefix (3 chars)': vocabulary[120][:3],
+            'two words + prefix': f"{vocabulary[5]} {vocabulary[300][:4]}",
+        }
+
+        print(f"🔎 /api/search over {num_tools} tools (20 per page, median of 20 runs)")
+        print("=" * 60)
+        for label, query in queries.items():
+            timings = []
+            for _ in range(20):
+                start = time.perf_counter()
+                response = client.get('/api/search', query_string={'q': query, 'page': 2})
+                timings.append((time.perf_counter() - start) * 1000)
+            total = response.get_json().get('total')
+            print(f"{label:>20}: {statistics.median(timings):7.2f} ms  ({total} matches, q={query!r})")
+
+
+if __name__ == "__main__":
+    main()
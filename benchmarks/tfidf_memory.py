@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: peak memory of the synergy builder's TF-IDF matrix, dense vs sparse
+
+Fits EdgeScoringEngine's vectorizer on N synthetic descriptions (default
+50,000; words drawn from a Zipf-like vocabulary so most of the 1,000
+features are used), then scores M random candidate pairs in blocks:
+
+- dense: the matrix as it used to be returned (.toarray()), pairs scored
+  with row-wise einsum on dense row copies
+- sparse: _compute_tfidf_matrix's CSR matrix, pairs scored with
+  _pair_similarities
+
+Peak memory is measured with tracemalloc (numpy and scipy buffers are
+traced), from just before the fit to the end of scoring.
+
+Usage:
+    python benchmarks/tfidf_memory.py [num_tools] [num_pairs]
+"""
+
+import contextlib
+import io
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.adapters import SQLiteAdapter
+from synergy.build_synergy import SCORING_BLOCK_SIZE, EdgeScoringEngine
+
+VOCABULARY_SIZE = 5000
+
+
+def make_descriptions(count: int, rng: np.random.Generator) -> list:
+    words = np.array([f"term{i}" for i in range(VOCABULARY_SIZE)])
+    ranks = np.minimum(rng.zipf(1.3, size=(count, 30)), VOCABULARY_SIZE) - 1
+    lengths = rng.integers(8, 30, size=count)
+    return [' '.join(words[ranks[i, :lengths[i]]]) for i in range(count)]
+
+
+def run_case(label: str, dense: bool, descriptions: list, pairs: np.ndarray) -> None:
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        engine = EdgeScoringEngine(SQLiteAdapter(str(Path(tmp) / 'bench.db')))
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    matrix = engine._compute_tfidf_matrix(descriptions)
+    if dense:
+        matrix = matrix.toarray()
+        matrix_bytes = matrix.nbytes
+    else:
+        matrix_bytes = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    fitted = time.perf_counter()
+
+    total = 0.0
+    for start in range(0, len(pairs), SCORING_BLOCK_SIZE):
+        rows1, rows2 = pairs[start:start + SCORING_BLOCK_SIZE, 0], pairs[start:start + SCORING_BLOCK_SIZE, 1]
+        if dense:
+            similarity = np.einsum('ij,ij->i', matrix[rows1], matrix[rows2])
+        else:
+            similarity = engine._pair_similarities(matrix, rows1, rows2)
+        total += float(similarity.sum())
+    scored = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:>8}: matrix {matrix_bytes / 2**20:7.1f} MB  peak {peak / 2**20:7.1f} MB  "
+          f"fit {fitted - started:5.2f}s  score {scored - fitted:5.2f}s  (Σ similarity {total:.1f})")
+
+
+def main():
+    num_tools = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    num_pairs = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    rng = np.random.default_rng(11)
+
+    descriptions = make_descriptions(num_tools, rng)
+    left = rng.integers(0, num_tools, size=num_pairs)
+    right = (left + rng.integers(1, num_tools, size=num_pairs)) % num_tools
+    pairs = np.stack([np.minimum(left, right), np.maximum(left, right)], axis=1)
+
+    print(f"🧮 TF-IDF memory: {num_tools:,} tools, {num_pairs:,} candidate pairs")
+    print("=" * 60)
+    run_case('dense', True, descriptions, pairs)
+    run_case('sparse', False, descriptions, pairs)
+
+
+if __name__ == "__main__":
+    main()
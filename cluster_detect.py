@@ -27,6 +27,7 @@ from dotenv import load_dotenv
 import networkx as nx
 from dataclasses import dataclass
 import math
+from database.pagination import KeysetPaginator
 
 # Load environment variables
 load_dotenv()
@@ -56,7 +57,13 @@ class CommunityStats:
 class LouvainCommunityDetector:
     """Louvain algorithm implementation for AI tools graph"""
     
-    def __init__(self):
+    def __init__(self, mirror_path: Optional[str] = None):
+        """
+        Args:
+            mirror_path: Read the graph from an incrementally synced local
+                         SQLite mirror (database/mirror.py) instead of paging
+                         every tool and edge over HTTP
+        """
         self.url = os.getenv("SUPABASE_URL")
         self.key = os.getenv("SUPABASE_KEY")
         
@@ -66,6 +73,11 @@ class LouvainCommunityDetector:
         self.supabase: Client = create_client(self.url, self.key)
         print(f"✅ Connected to Supabase for community detection")
         
+        self.mirror = None
+        if mirror_path:
+            from database.mirror import SupabaseMirror
+            self.mirror = SupabaseMirror(self.supabase, mirror_path)
+        
         # Algorithm parameters
         self.resolution = 1.0  # Resolution parameter for modularity
         self.min_community_size = 3  # Minimum size for meaningful communities
@@ -135,16 +147,42 @@ class LouvainCommunityDetector:
         
         return stats
     
+    def _mirror_connection(self):
+        """Connection to the local mirror after bringing it up to date"""
+        result = self.mirror.sync()
+        print(f"🪞 Mirror synced in {result['requests']} requests"
+              f"{' (full reload)' if result['full'] else ''}")
+        return self.mirror.adapter.connections.connection()
+    
     def _load_graph_data(self) -> Dict[str, any]:
         """Load graph nodes and edges from database"""
         try:
+            if self.mirror is not None:
+                conn = self._mirror_connection()
+                nodes = {
+                    row['id']: {
+                        'name': row['name'] or '',
+                        'macro_domain': row['macro_domain'] or 'OTHER',
+                        'popularity': row['popularity'] or 0.0,
+                        'monthly_users': row['monthly_users'] or 0
+                    }
+                    for row in conn.execute(
+                        "SELECT id, name, macro_domain, popularity, monthly_users FROM ai_tool ORDER BY id")
+                }
+                edges = [
+                    GraphEdge(node1=row[0], node2=row[1], weight=row[2], edge_type=row[3] or 'unspecified')
+                    for row in conn.execute(
+                        "SELECT tool_id_1, tool_id_2, strength, edge_type FROM ai_synergy ORDER BY id")
+                ]
+                return {'nodes': nodes, 'edges': edges}
+            
             # Load nodes (tools)
-            nodes_response = self.supabase.table('ai_tool').select(
-                'id, name, macro_domain, popularity, monthly_users'
-            ).execute()
+            nodes_paginator = KeysetPaginator(
+                self.supabase, 'ai_tool', 'id, name, macro_domain, popularity, monthly_users'
+            )
             
             nodes = {}
-            for item in nodes_response.data:
+            for item in nodes_paginator:
                 nodes[item['id']] = {
                     'name': item.get('name', ''),
                     'macro_domain': item.get('macro_domain', 'OTHER'),
@@ -153,12 +191,12 @@ class LouvainCommunityDetector:
                 }
             
             # Load edges (synergies)
-            edges_response = self.supabase.table('ai_synergy').select(
-                'tool_id_1, tool_id_2, strength, edge_type'
-            ).execute()
+            edges_paginator = KeysetPaginator(
+                self.supabase, 'ai_synergy', 'id, tool_id_1, tool_id_2, strength, edge_type'
+            )
             
             edges = []
-            for item in edges_response.data:
+            for item in edges_paginator:
                 edges.append(GraphEdge(
                     node1=item['tool_id_1'],
                     node2=item['tool_id_2'],
@@ -504,11 +542,13 @@ class LouvainCommunityDetector:
         
         try:
             # Get community distribution
-            response = self.supabase.table('ai_tool').select(
-                'community_id, macro_domain, popularity'
-            ).execute()
-            
-            data = response.data
+            if self.mirror is not None:
+                data = [dict(row) for row in self._mirror_connection().execute(
+                    "SELECT id, community_id, macro_domain, popularity FROM ai_tool ORDER BY id")]
+            else:
+                data = KeysetPaginator(
+                    self.supabase, 'ai_tool', 'id, community_id, macro_domain, popularity'
+                ).fetch_all()
             
             # Count communities
             communities = [item['community_id'] for item in data if item['community_id'] is not None]
@@ -541,25 +581,31 @@ class LouvainCommunityDetector:
             return {}
 
 
-def detect_communities() -> Dict[str, any]:
+def detect_communities(mirror_path: Optional[str] = None) -> Dict[str, any]:
     """
     Convenience function to run community detection
     
+    Args:
+        mirror_path: Optional local mirror to read the graph from (database/mirror.py)
+    
     Returns:
         Dictionary with detection results and statistics
     """
-    detector = LouvainCommunityDetector()
+    detector = LouvainCommunityDetector(mirror_path)
     return detector.detect_communities()
 
 
-def get_community_stats() -> Dict[str, any]:
+def get_community_stats(mirror_path: Optional[str] = None) -> Dict[str, any]:
     """
     Get statistics about detected communities
     
+    Args:
+        mirror_path: Optional local mirror to read from (database/mirror.py)
+    
     Returns:
         Dictionary with community statistics
     """
-    detector = LouvainCommunityDetector()
+    detector = LouvainCommunityDetector(mirror_path)
     return detector.get_community_statistics()
 
 
@@ -6,10 +6,18 @@ Allows easy switching between local development and production databases
 import json
 import sqlite3
 import os
+import time
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from datetime import datetime
 from scrapers.common import AITool
+from database.connection import get_connection_manager
+from database.content_hash import (
+    compute_field_hashes, combine_field_hashes, parse_field_hashes, changed_fields
+)
+from database.trending import compact_metric_points, refresh_trends
 
 
 class DatabaseAdapter(ABC):
@@ -21,15 +29,28 @@ class DatabaseAdapter(ABC):
         pass
     
     @abstractmethod
-    def insert_tool(self, tool: AITool, content_hash: str) -> bool:
+    def insert_tool(self, tool: AITool, content_hash: str,
+                    field_hashes: Optional[Dict[str, str]] = None) -> bool:
         """Insert a new tool"""
         pass
     
     @abstractmethod
-    def update_tool(self, tool_id: int, tool: AITool, content_hash: str) -> bool:
+    def update_tool(self, tool_id: int, tool: AITool, content_hash: str,
+                    field_hashes: Optional[Dict[str, str]] = None) -> bool:
         """Update an existing tool"""
         pass
     
+    @abstractmethod
+    def update_tool_fields(self, tool_id: int, tool: AITool, fields: List[str],
+                           content_hash: str, field_hashes: Dict[str, str]) -> bool:
+        """Update only the given columns (plus hashes and last_scraped)"""
+        pass
+    
+    @abstractmethod
+    def touch_last_scraped(self, tool_ids: List[int], scraped_at: Optional[datetime] = None) -> int:
+        """Bump last_scraped for unchanged tools with one set-based statement"""
+        pass
+    
     @abstractmethod
     def find_duplicate_tool(self, tool: AITool) -> Optional[Dict[str, Any]]:
         """Find duplicate tool by URL or name"""
@@ -49,14 +70,101 @@ class DatabaseAdapter(ABC):
     def validate_no_duplicates(self) -> Dict[str, Any]:
         """Validate no duplicates exist"""
         pass
+    
+    @abstractmethod
+    def cleanup_duplicates(self) -> Dict[str, Any]:
+        """Remove duplicate tools by (ext_id, source), keeping the oldest"""
+        pass
+    
+    # True when transaction() rolls back every write inside the block on error
+    transactional = False
+    
+    def transaction(self):
+        """Group the calls inside the block into one transaction where supported"""
+        return nullcontext()
+    
+    def record_sources(self, records: List[Tuple[int, AITool]]) -> int:
+        """Link (source, ext_id) of scraped tools to the tool they merged into, where supported"""
+        return 0
+    
+    # Synergy graph (synergy/build_synergy.py)
+    
+    @abstractmethod
+    def load_scoring_tools(self) -> List[Dict[str, Any]]:
+        """id, name, description, macro_domain, categories, monthly_users, popularity of every tool"""
+        pass
+    
+    def iter_tool_descriptions(self, page_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Pages of {id, description} of every tool, in id order
+        
+        Errors propagate: a silently truncated stream would look like deleted tools.
+        """
+        tools = self.load_scoring_tools()
+        for start in range(0, len(tools), page_size):
+            yield [{'id': tool['id'], 'description': tool.get('description')}
+                   for tool in tools[start:start + page_size]]
+    
+    @abstractmethod
+    def clear_synergies(self) -> int:
+        """Delete every edge before a full recalculation"""
+        pass
+    
+    @abstractmethod
+    def insert_synergies(self, edges: List[Dict[str, Any]]) -> int:
+        """Insert edges (tool_id_1 < tool_id_2, strength, edge_type); returns rows written"""
+        pass
+    
+    @abstractmethod
+    def load_synergies(self) -> List[Dict[str, Any]]:
+        """Every edge: id, tool_id_1, tool_id_2, strength, edge_type"""
+        pass
+    
+    @abstractmethod
+    def update_synergies(self, edges: List[Dict[str, Any]]) -> int:
+        """Re-score existing edges by id (strength, edge_type); returns rows written"""
+        pass
+    
+    @abstractmethod
+    def delete_synergies(self, edge_ids: List[int]) -> int:
+        """Delete edges by id; returns rows deleted"""
+        pass
+    
+    @abstractmethod
+    def load_synergy_state(self) -> Dict[int, str]:
+        """{tool_id: scoring hash} of the tools as the last synergy run scored them"""
+        pass
+    
+    @abstractmethod
+    def save_synergy_state(self, hashes: Dict[int, str], removed: Optional[List[int]] = None,
+                           replace: bool = False) -> None:
+        """Store scoring hashes (all of them when replace), forgetting the removed tool ids"""
+        pass
+    
+    @abstractmethod
+    def get_tool_synergies(self, tool_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """Strongest edges of one tool with the related tool's id, name and description"""
+        pass
+    
+    @abstractmethod
+    def get_synergy_summary(self) -> Dict[str, Any]:
+        """Edge count, strength min/avg/max and counts per strength band"""
+        pass
+    
+    @abstractmethod
+    def refresh_tool_degree(self) -> None:
+        """Bring per-tool degree aggregates up to date after edges changed"""
+        pass
 
 
 class SQLiteAdapter(DatabaseAdapter):
     """SQLite database adapter for local development"""
     
+    transactional = True
+    
     def __init__(self, db_path: str = "database/ai_tools.db"):
         self.db_path = db_path
-        self.connection = None
+        self.connections = get_connection_manager(db_path)
         self._ensure_database_exists()
     
     def _ensure_database_exists(self):
@@ -66,35 +174,74 @@ class SQLiteAdapter(DatabaseAdapter):
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
             
             # Create database and run schema
-            conn = sqlite3.connect(self.db_path)
+            conn = self.connections.connection()
             
             # Read and execute schema
-            schema_path = "database/sqlite_schema.sql"
+            schema_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sqlite_schema.sql")
             if os.path.exists(schema_path):
                 with open(schema_path, 'r') as f:
                     schema_sql = f.read()
                     conn.executescript(schema_sql)
             
-            conn.close()
+            self._apply_migrations(conn)
+            self.sync_derived_tables(conn)
             print(f"✅ SQLite database ready at: {self.db_path}")
             
         except Exception as e:
             print(f"❌ Error creating SQLite database: {e}")
     
+    # Columns added after the first schema version: name -> SQL type
+    MIGRATION_COLUMNS = {
+        'field_hashes': 'TEXT',
+        'community_id': 'INTEGER',  # cluster_detect.py, kept by database/mirror.py
+    }
+    
+    def _apply_migrations(self, conn: sqlite3.Connection) -> None:
+        """Add columns missing from databases created with an older schema"""
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(ai_tool)")}
+        for column, column_type in self.MIGRATION_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE ai_tool ADD COLUMN {column} {column_type}")
+        conn.commit()
+    
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """This thread's persistent connection; commits on exit unless inside transaction()"""
+        conn = self.connections.connection()
+        if self.connections.in_transaction():
+            yield conn
+            return
+        
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    
+    def transaction(self):
+        """
+        Run every adapter call inside the block in one write transaction
+        
+        Used by the ingest drainer to apply thousands of upserts with a single
+        commit. Rolls back if the block raises.
+        """
+        return self.connections.transaction()
+    
     def connect(self) -> bool:
         """Test SQLite connection"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.execute("SELECT COUNT(*) FROM ai_tool")
-            count = cursor.fetchone()[0]
-            conn.close()
+            with self._connection() as conn:
+                cursor = conn.execute("SELECT COUNT(*) FROM ai_tool")
+                count = cursor.fetchone()[0]
             print(f"✅ SQLite connected: {count} tools in database")
             return True
         except Exception as e:
             print(f"❌ SQLite connection failed: {e}")
             return False
     
-    def _tool_to_dict(self, tool: AITool, content_hash: str) -> Dict[str, Any]:
+    def _tool_to_dict(self, tool: AITool, content_hash: str,
+                      field_hashes: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """Convert AITool to SQLite-compatible dict"""
         return {
             'ext_id': tool.ext_id,
@@ -115,18 +262,29 @@ class SQLiteAdapter(DatabaseAdapter):
             'maturity': tool.maturity,
             'platform': json.dumps(tool.platform) if tool.platform else None,
             'features': json.dumps(tool.features) if tool.features else None,
-            'last_scraped': tool.last_scraped.isoformat() if tool.last_scraped else None
+            'last_scraped': tool.last_scraped.isoformat() if tool.last_scraped else None,
+            'field_hashes': json.dumps(field_hashes, sort_keys=True) if field_hashes else None
         }
     
-    def _dict_to_tool(self, data: Dict[str, Any]) -> AITool:
-        """Convert SQLite dict to AITool"""
+    def _dict_to_tool(self, data: Dict[str, Any],
+                      relations: Optional[Dict[str, Any]] = None) -> AITool:
+        """Convert SQLite dict to AITool (list/dict fields from load_relations() when given)"""
+        if relations is not None:
+            categories = relations['categories']
+            platform = relations['platform'] or None
+            features = relations['features'] or None
+        else:
+            categories = json.loads(data.get('categories', '[]')) if data.get('categories') else []
+            platform = json.loads(data.get('platform', '[]')) if data.get('platform') else None
+            features = json.loads(data.get('features', '{}')) if data.get('features') else None
+        
         return AITool(
             ext_id=data.get('ext_id', ''),
             name=data.get('name', ''),
             description=data.get('description', ''),
             price=data.get('price', ''),
             popularity=data.get('popularity', 0),
-            categories=json.loads(data.get('categories', '[]')) if data.get('categories') else [],
+            categories=categories,
             source=data.get('source', ''),
             macro_domain=data.get('macro_domain', 'OTHER'),
             url=data.get('url'),
@@ -136,39 +294,247 @@ class SQLiteAdapter(DatabaseAdapter):
             monthly_users=data.get('monthly_users'),
             editor_score=data.get('editor_score'),
             maturity=data.get('maturity'),
-            platform=json.loads(data.get('platform', '[]')) if data.get('platform') else None,
-            features=json.loads(data.get('features', '{}')) if data.get('features') else None,
+            platform=platform,
+            features=features,
             last_scraped=datetime.fromisoformat(data.get('last_scraped')) if data.get('last_scraped') else None
         )
     
-    def insert_tool(self, tool: AITool, content_hash: str) -> bool:
-        """Insert a new tool"""
+    # JSON columns mirrored into category/tool_category, tool_platform and tool_feature
+    RELATION_FIELDS = ('categories', 'platform', 'features')
+    
+    def _write_relations(self, conn: sqlite3.Connection, tool_id: int, tool: AITool,
+                         fields=RELATION_FIELDS) -> None:
+        """Replace the normalised rows of one tool for the given JSON fields"""
+        if 'categories' in fields:
+            conn.execute("DELETE FROM tool_category WHERE tool_id = ?", (tool_id,))
+            names = list(dict.fromkeys(str(c) for c in tool.categories or [] if c))
+            conn.executemany(
+                "INSERT INTO tool_category (tool_id, category_id, position) VALUES (?, ?, ?)",
+                [(tool_id, self._category_id(conn, name), position) for position, name in enumerate(names)]
+            )
+        
+        if 'platform' in fields:
+            conn.execute("DELETE FROM tool_platform WHERE tool_id = ?", (tool_id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO tool_platform (tool_id, platform) VALUES (?, ?)",
+                [(tool_id, str(platform)) for platform in tool.platform or [] if platform]
+            )
+        
+        if 'features' in fields:
+            conn.execute("DELETE FROM tool_feature WHERE tool_id = ?", (tool_id,))
+            conn.executemany(
+                "INSERT INTO tool_feature (tool_id, feature, value) VALUES (?, ?, ?)",
+                [(tool_id, str(feature), json.dumps(value, sort_keys=True))
+                 for feature, value in (tool.features or {}).items()]
+            )
+    
+    def _category_id(self, conn: sqlite3.Connection, name: str) -> int:
+        """Id of a category, creating it (and its keywords) on first use"""
+        row = conn.execute("SELECT id FROM category WHERE name = ?", (name,)).fetchone()
+        if row:
+            return row[0]
+        
+        category_id = conn.execute("INSERT INTO category (name) VALUES (?)", (name,)).lastrowid
+        conn.executemany(
+            "INSERT OR IGNORE INTO category_keyword (category_id, keyword) VALUES (?, ?)",
+            [(category_id, keyword) for keyword in set(name.lower().split())]
+        )
+        return category_id
+    
+    def sync_derived_tables(self, conn: Optional[sqlite3.Connection] = None) -> None:
+        """
+        Bring the tables derived from ai_tool/ai_synergy up to date
+        
+        Tool identities, normalised categories/platforms/features, the search
+        index and the degree aggregates; used on open and after bulk loads that bypass the
+        adapter (e.g. database/columnar.py imports).
+        """
+        conn = conn or self.connections.connection()
+        self._sync_identities(conn)
+        self._sync_missing_relations(conn)
+        self._sync_search_index(conn)
+        self._sync_tool_degree(conn)
+    
+    def _sync_identities(self, conn: sqlite3.Connection) -> int:
+        """Backfill tool_identity/tool_source_record for tools the insert trigger did not see"""
+        identities = conn.execute("SELECT COUNT(*) FROM tool_identity").fetchone()[0]
+        total = conn.execute("SELECT COUNT(*) FROM ai_tool").fetchone()[0]
+        if identities == total:
+            return 0
+        
+        added = conn.execute("""
+            INSERT INTO tool_identity (tool_id, url_key, name_key)
+            SELECT id, NULLIF(lower(trim(url)), ''), NULLIF(lower(trim(name)), '')
+            FROM ai_tool t WHERE NOT EXISTS (SELECT 1 FROM tool_identity i WHERE i.tool_id = t.id)
+        """).rowcount
+        conn.execute("""
+            INSERT OR IGNORE INTO tool_source_record (source, ext_id, tool_id)
+            SELECT source, ext_id, id FROM ai_tool
+        """)
+        conn.commit()
+        return added
+    
+    def _sync_missing_relations(self, conn: sqlite3.Connection) -> int:
+        """Backfill normalised rows for tools written before the tables existed (or by raw SQL)"""
+        rows = conn.execute("""
+            SELECT id, categories, platform, features FROM ai_tool t
+            WHERE (categories IS NOT NULL AND categories NOT IN ('', '[]')
+                   AND NOT EXISTS (SELECT 1 FROM tool_category tc WHERE tc.tool_id = t.id))
+               OR (platform IS NOT NULL AND platform NOT IN ('', '[]')
+                   AND NOT EXISTS (SELECT 1 FROM tool_platform tp WHERE tp.tool_id = t.id))
+               OR (features IS NOT NULL AND features NOT IN ('', '{}')
+                   AND NOT EXISTS (SELECT 1 FROM tool_feature tf WHERE tf.tool_id = t.id))
+        """).fetchall()
+        
+        for row in rows:
+            try:
+                self._write_relations(conn, row['id'], self._dict_to_tool(dict(row)))
+            except (TypeError, ValueError):
+                continue  # unparseable JSON: leave the tool without normalised rows
+        conn.commit()
+        return len(rows)
+    
+    def _sync_search_index(self, conn: sqlite3.Connection) -> None:
+        """Rebuild ai_tool_fts when it does not cover every tool (new index, rows added before it)"""
+        try:
+            indexed = conn.execute("SELECT COUNT(*) FROM ai_tool_fts_docsize").fetchone()[0]
+        except sqlite3.OperationalError:
+            return  # SQLite built without FTS5
+        total = conn.execute("SELECT COUNT(*) FROM ai_tool").fetchone()[0]
+        if indexed != total:
+            conn.execute("INSERT INTO ai_tool_fts (ai_tool_fts) VALUES ('rebuild')")
+            conn.commit()
+    
+    def _sync_tool_degree(self, conn: sqlite3.Connection) -> bool:
+        """
+        Rebuild ai_tool_degree from ai_synergy when the totals disagree
+        
+        The triggers keep it current; this covers edges written before the
+        table existed. Returns True if it was rebuilt.
+        """
+        counted = conn.execute("SELECT COALESCE(SUM(degree), 0) FROM ai_tool_degree").fetchone()[0]
+        edges = conn.execute("SELECT COUNT(*) FROM ai_synergy").fetchone()[0]
+        if counted == 2 * edges:
+            return False
+        
+        conn.execute("DELETE FROM ai_tool_degree")
+        conn.execute("""
+            INSERT INTO ai_tool_degree (
+                tool_id, degree, weighted_degree,
+                same_domain_count, video_audio_count, semantic_similarity_count, weak_count
+            )
+            SELECT tool_id, COUNT(*), SUM(strength),
+                   SUM(edge_type IS 'same_domain'), SUM(edge_type IS 'video_audio'),
+                   SUM(edge_type IS 'semantic_similarity'), SUM(edge_type IS 'weak')
+            FROM (
+                SELECT tool_id_1 AS tool_id, strength, edge_type FROM ai_synergy
+                UNION ALL
+                SELECT tool_id_2, strength, edge_type FROM ai_synergy
+            )
+            GROUP BY tool_id
+        """)
+        conn.commit()
+        return True
+    
+    def load_relations(self, tool_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Categories, platforms and features for many tools (see load_tool_relations)"""
+        with self._connection() as conn:
+            return load_tool_relations(conn, tool_ids)
+    
+    def get_tool_ids_by_category(self, categories: List[str], match_all: bool = False) -> List[int]:
+        """Ids of tools in any (or all) of the given categories, via idx_tool_category_category"""
+        if not categories:
+            return []
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            with self._connection() as conn:
+                rows = conn.execute("""
+                    SELECT tc.tool_id FROM category c
+                    JOIN tool_category tc ON tc.category_id = c.id
+                    WHERE c.name IN (SELECT value FROM json_each(?))
+                    GROUP BY tc.tool_id
+                    HAVING COUNT(*) >= ?
+                    ORDER BY tc.tool_id
+                """, (json.dumps(list(categories)), len(set(categories)) if match_all else 1)).fetchall()
+            return [row[0] for row in rows]
+        
+        except Exception as e:
+            print(f"❌ SQLite category filter failed: {e}")
+            return []
+    
+    def category_overlap_pairs(self, max_keyword_tools: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Tool id pairs (id1 < id2) sharing at least one category keyword
+        
+        Same candidates as EdgeScoringEngine._filter_pairs_by_category_overlap,
+        computed as an indexed self-join in SQLite. Keywords shared by more than
+        max_keyword_tools tools are skipped when given.
+        """
+        try:
+            with self._connection() as conn:
+                conn.execute("DROP TABLE IF EXISTS temp.tool_keyword")
+                conn.execute("""
+                    CREATE TEMP TABLE tool_keyword AS
+                    SELECT DISTINCT ck.keyword, tc.tool_id
+                    FROM tool_category tc
+                    JOIN category_keyword ck ON ck.category_id = tc.category_id
+                """)
+                conn.execute("CREATE INDEX temp.idx_tool_keyword ON tool_keyword(keyword, tool_id)")
+                
+                keyword_filter = ""
+                params: List[Any] = []
+                if max_keyword_tools is not None:
+                    keyword_filter = """
+                        WHERE a.keyword IN (
+                            SELECT keyword FROM tool_keyword
+                            GROUP BY keyword HAVING COUNT(*) <= ?
+                        )
+                    """
+                    params.append(max_keyword_tools)
+                
+                # Plain tuples: no sqlite3.Row per pair
+                cursor = conn.cursor()
+                cursor.row_factory = None
+                pairs = cursor.execute(f"""
+                    SELECT a.tool_id, b.tool_id
+                    FROM tool_keyword a
+                    JOIN tool_keyword b ON b.keyword = a.keyword AND b.tool_id > a.tool_id
+                    {keyword_filter}
+                    GROUP BY a.tool_id, b.tool_id
+                """, params).fetchall()
+                conn.execute("DROP TABLE temp.tool_keyword")
             
-            tool_data = self._tool_to_dict(tool, content_hash)
+            return pairs
+        
+        except Exception as e:
+            print(f"❌ SQLite category overlap failed: {e}")
+            return []
+    
+    def insert_tool(self, tool: AITool, content_hash: str,
+                    field_hashes: Optional[Dict[str, str]] = None) -> bool:
+        """Insert a new tool"""
+        try:
+            tool_data = self._tool_to_dict(tool, content_hash, field_hashes)
             
             columns = ', '.join(tool_data.keys())
             placeholders = ', '.join(['?' for _ in tool_data])
             
             sql = f"INSERT INTO ai_tool ({columns}) VALUES ({placeholders})"
-            conn.execute(sql, list(tool_data.values()))
-            conn.commit()
-            conn.close()
+            with self._connection() as conn:
+                tool_id = conn.execute(sql, list(tool_data.values())).lastrowid
+                self._write_relations(conn, tool_id, tool)
+                self._write_source_records(conn, [(tool_id, tool)])
             
             return True
-            
+        
         except Exception as e:
             print(f"❌ SQLite insert failed: {e}")
             return False
     
-    def update_tool(self, tool_id: int, tool: AITool, content_hash: str) -> bool:
+    def update_tool(self, tool_id: int, tool: AITool, content_hash: str,
+                    field_hashes: Optional[Dict[str, str]] = None) -> bool:
         """Update an existing tool"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            tool_data = self._tool_to_dict(tool, content_hash)
+            tool_data = self._tool_to_dict(tool, content_hash, field_hashes)
             tool_data['updated_at'] = datetime.now().isoformat()
             
             # Remove ext_id and source from update (shouldn't change)
@@ -178,47 +544,124 @@ class SQLiteAdapter(DatabaseAdapter):
             sql = f"UPDATE ai_tool SET {set_clause} WHERE id = ?"
             
             values = list(tool_data.values()) + [tool_id]
-            conn.execute(sql, values)
-            conn.commit()
-            conn.close()
+            with self._connection() as conn:
+                conn.execute(sql, values)
+                self._write_relations(conn, tool_id, tool)
             
             return True
-            
+        
         except Exception as e:
             print(f"❌ SQLite update failed: {e}")
             return False
     
-    def find_duplicate_tool(self, tool: AITool) -> Optional[Dict[str, Any]]:
-        """Find duplicate tool by URL or name"""
+    def update_tool_fields(self, tool_id: int, tool: AITool, fields: List[str],
+                           content_hash: str, field_hashes: Dict[str, str]) -> bool:
+        """Update only the columns whose field hash changed"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            full_data = self._tool_to_dict(tool, content_hash, field_hashes)
+            tool_data = {field: full_data[field] for field in fields}
+            tool_data['content_hash'] = content_hash
+            tool_data['field_hashes'] = full_data['field_hashes']
+            tool_data['last_scraped'] = full_data['last_scraped']
+            tool_data['updated_at'] = datetime.now().isoformat()
             
-            # Search by URL first (more specific)
-            if tool.url:
-                cursor = conn.execute(
-                    "SELECT * FROM ai_tool WHERE LOWER(url) = LOWER(?) LIMIT 1",
-                    (tool.url,)
+            set_clause = ', '.join([f"{k} = ?" for k in tool_data.keys()])
+            sql = f"UPDATE ai_tool SET {set_clause} WHERE id = ?"
+            
+            with self._connection() as conn:
+                conn.execute(sql, list(tool_data.values()) + [tool_id])
+                self._write_relations(
+                    conn, tool_id, tool, [f for f in fields if f in self.RELATION_FIELDS]
                 )
-                result = cursor.fetchone()
-                if result:
-                    conn.close()
-                    return dict(result)
             
-            # Search by name if no URL match
-            if tool.name:
+            return True
+        
+        except Exception as e:
+            print(f"❌ SQLite partial update failed: {e}")
+            return False
+    
+    def touch_last_scraped(self, tool_ids: List[int], scraped_at: Optional[datetime] = None) -> int:
+        """Bump last_scraped for all given tools in a single UPDATE"""
+        if not tool_ids:
+            return 0
+        try:
+            scraped_at = scraped_at or datetime.now()
+            with self._connection() as conn:
                 cursor = conn.execute(
-                    "SELECT * FROM ai_tool WHERE LOWER(name) = LOWER(?) LIMIT 1",
-                    (tool.name,)
+                    "UPDATE ai_tool SET last_scraped = ? WHERE id IN (SELECT value FROM json_each(?))",
+                    (scraped_at.isoformat(), json.dumps(list(tool_ids)))
                 )
-                result = cursor.fetchone()
-                if result:
-                    conn.close()
-                    return dict(result)
+                touched = cursor.rowcount
             
-            conn.close()
-            return None
+            return touched
+        
+        except Exception as e:
+            print(f"❌ SQLite timestamp update failed: {e}")
+            return 0
+    
+    def _write_source_records(self, conn: sqlite3.Connection, records: List[Tuple[int, AITool]]) -> int:
+        """Upsert tool_source_record rows: (source, ext_id) -> tool id plus the raw scraped tool"""
+        rows = [
+            (tool.source, tool.ext_id, tool_id, source_record_json(tool),
+             tool.last_scraped.isoformat() if tool.last_scraped else datetime.now().isoformat())
+            for tool_id, tool in records
+            if tool.source and tool.ext_id
+        ]
+        conn.executemany("""
+            INSERT INTO tool_source_record (source, ext_id, tool_id, record, last_seen)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (source, ext_id) DO UPDATE SET
+                tool_id = excluded.tool_id,
+                record = excluded.record,
+                last_seen = excluded.last_seen
+        """, rows)
+        return len(rows)
+    
+    def record_sources(self, records: List[Tuple[int, AITool]]) -> int:
+        """Store the raw records of merged/unchanged tools so repeat scrapes resolve by (source, ext_id)"""
+        if not records:
+            return 0
+        try:
+            with self._connection() as conn:
+                return self._write_source_records(conn, records)
+        
+        except Exception as e:
+            print(f"❌ SQLite source record update failed: {e}")
+            return 0
+    
+    def find_duplicate_tool(self, tool: AITool) -> Optional[Dict[str, Any]]:
+        """
+        Find the canonical tool of a scraped record
+        
+        A (source, ext_id) seen before resolves through tool_source_record's
+        primary key; otherwise the normalised URL, then name, in tool_identity.
+        """
+        try:
+            with self._connection() as conn:
+                if tool.source and tool.ext_id:
+                    result = conn.execute("""
+                        SELECT t.* FROM tool_source_record r
+                        JOIN ai_tool t ON t.id = r.tool_id
+                        WHERE r.source = ? AND r.ext_id = ?
+                    """, (tool.source, tool.ext_id)).fetchone()
+                    if result:
+                        return dict(result)
+                
+                # Search by URL first (more specific), then by name
+                for column, value in (('url_key', tool.url), ('name_key', tool.name)):
+                    if not value:
+                        continue
+                    result = conn.execute(f"""
+                        SELECT t.* FROM tool_identity i
+                        JOIN ai_tool t ON t.id = i.tool_id
+                        WHERE i.{column} = NULLIF(lower(trim(?)), '')
+                        ORDER BY i.tool_id LIMIT 1
+                    """, (value,)).fetchone()
+                    if result:
+                        return dict(result)
             
+            return None
+        
         except Exception as e:
             print(f"❌ SQLite duplicate search failed: {e}")
             return None
@@ -226,18 +669,16 @@ class SQLiteAdapter(DatabaseAdapter):
     def get_existing_tool(self, ext_id: str, source: str) -> Optional[Dict[str, Any]]:
         """Get tool by ext_id and source"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            
-            cursor = conn.execute(
-                "SELECT * FROM ai_tool WHERE ext_id = ? AND source = ? LIMIT 1",
-                (ext_id, source)
-            )
-            result = cursor.fetchone()
-            conn.close()
+            with self._connection() as conn:
+                cursor = conn.execute("""
+                    SELECT t.* FROM tool_source_record r
+                    JOIN ai_tool t ON t.id = r.tool_id
+                    WHERE r.source = ? AND r.ext_id = ?
+                """, (source, ext_id))
+                result = cursor.fetchone()
             
             return dict(result) if result else None
-            
+        
         except Exception as e:
             print(f"❌ SQLite get existing failed: {e}")
             return None
@@ -245,43 +686,39 @@ class SQLiteAdapter(DatabaseAdapter):
     def get_statistics(self) -> Dict[str, Any]:
         """Get database statistics"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            
-            # Total tools
-            cursor = conn.execute("SELECT COUNT(*) as count FROM ai_tool")
-            total_tools = cursor.fetchone()['count']
-            
-            # By source
-            cursor = conn.execute("""
-                SELECT source, COUNT(*) as count 
-                FROM ai_tool 
-                GROUP BY source 
-                ORDER BY count DESC
-            """)
-            by_source = {row['source']: row['count'] for row in cursor.fetchall()}
-            
-            # By domain
-            cursor = conn.execute("""
-                SELECT macro_domain, COUNT(*) as count 
-                FROM ai_tool 
-                GROUP BY macro_domain 
-                ORDER BY count DESC
-            """)
-            by_domain = {row['macro_domain']: row['count'] for row in cursor.fetchall()}
-            
-            # Recent activity
-            cursor = conn.execute("""
-                SELECT DATE(last_scraped) as date, COUNT(*) as count
-                FROM ai_tool 
-                WHERE last_scraped IS NOT NULL
-                GROUP BY DATE(last_scraped)
-                ORDER BY date DESC
-                LIMIT 7
-            """)
-            recent_activity = {row['date']: row['count'] for row in cursor.fetchall()}
-            
-            conn.close()
+            with self._connection() as conn:
+                # Total tools
+                cursor = conn.execute("SELECT COUNT(*) as count FROM ai_tool")
+                total_tools = cursor.fetchone()['count']
+                
+                # By source
+                cursor = conn.execute("""
+                    SELECT source, COUNT(*) as count
+                    FROM ai_tool
+                    GROUP BY source
+                    ORDER BY count DESC
+                """)
+                by_source = {row['source']: row['count'] for row in cursor.fetchall()}
+                
+                # By domain
+                cursor = conn.execute("""
+                    SELECT macro_domain, COUNT(*) as count
+                    FROM ai_tool
+                    GROUP BY macro_domain
+                    ORDER BY count DESC
+                """)
+                by_domain = {row['macro_domain']: row['count'] for row in cursor.fetchall()}
+                
+                # Recent activity
+                cursor = conn.execute("""
+                    SELECT DATE(last_scraped) as date, COUNT(*) as count
+                    FROM ai_tool
+                    WHERE last_scraped IS NOT NULL
+                    GROUP BY DATE(last_scraped)
+                    ORDER BY date DESC
+                    LIMIT 7
+                """)
+                recent_activity = {row['date']: row['count'] for row in cursor.fetchall()}
             
             return {
                 'total_tools': total_tools,
@@ -291,62 +728,60 @@ class SQLiteAdapter(DatabaseAdapter):
                 'database_type': 'SQLite',
                 'database_path': self.db_path
             }
-            
+        
         except Exception as e:
             print(f"❌ SQLite statistics failed: {e}")
             return {'error': str(e)}
     
     def upsert_ai_tool(self, tool) -> bool:
         """Upsert (insert or update) a tool with automatic deduplication"""
-        import hashlib
-        
-        # Generate content hash
-        content_data = f"{tool.name}{tool.description}{tool.price}{tool.popularity}"
-        content_hash = hashlib.md5(content_data.encode()).hexdigest()
+        # Per-field hashes: only changed columns are rewritten
+        field_hashes = compute_field_hashes(tool)
+        content_hash = combine_field_hashes(field_hashes)
         
         # Check for existing tool
         existing_tool = self.find_duplicate_tool(tool)
         
         if existing_tool:
+            self.record_sources([(existing_tool['id'], tool)])
+            fields = changed_fields(parse_field_hashes(existing_tool.get('field_hashes')), field_hashes)
+            if not fields:
+                return self.touch_last_scraped([existing_tool['id']], tool.last_scraped) > 0
             # Update existing tool
-            return self.update_tool(existing_tool['id'], tool, content_hash)
+            return self.update_tool_fields(existing_tool['id'], tool, fields, content_hash, field_hashes)
         else:
             # Insert new tool
-            return self.insert_tool(tool, content_hash)
+            return self.insert_tool(tool, content_hash, field_hashes)
     
     def validate_no_duplicates(self) -> Dict[str, Any]:
         """Validate no duplicates exist"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            
-            # Check URL duplicates
-            cursor = conn.execute("""
-                SELECT LOWER(url) as url, COUNT(*) as count, GROUP_CONCAT(id) as ids
-                FROM ai_tool 
-                WHERE url IS NOT NULL AND url != ''
-                GROUP BY LOWER(url)
-                HAVING count > 1
-                LIMIT 10
-            """)
-            url_conflicts = [dict(row) for row in cursor.fetchall()]
-            
-            # Check name duplicates
-            cursor = conn.execute("""
-                SELECT LOWER(name) as name, COUNT(*) as count, GROUP_CONCAT(id) as ids
-                FROM ai_tool 
-                WHERE name IS NOT NULL AND name != ''
-                GROUP BY LOWER(name)
-                HAVING count > 1
-                LIMIT 10
-            """)
-            name_conflicts = [dict(row) for row in cursor.fetchall()]
-            
-            # Total count
-            cursor = conn.execute("SELECT COUNT(*) as count FROM ai_tool")
-            total_tools = cursor.fetchone()['count']
-            
-            conn.close()
+            with self._connection() as conn:
+                # Check URL duplicates
+                cursor = conn.execute("""
+                    SELECT LOWER(url) as url, COUNT(*) as count, GROUP_CONCAT(id) as ids
+                    FROM ai_tool
+                    WHERE url IS NOT NULL AND url != ''
+                    GROUP BY LOWER(url)
+                    HAVING count > 1
+                    LIMIT 10
+                """)
+                url_conflicts = [dict(row) for row in cursor.fetchall()]
+                
+                # Check name duplicates
+                cursor = conn.execute("""
+                    SELECT LOWER(name) as name, COUNT(*) as count, GROUP_CONCAT(id) as ids
+                    FROM ai_tool
+                    WHERE name IS NOT NULL AND name != ''
+                    GROUP BY LOWER(name)
+                    HAVING count > 1
+                    LIMIT 10
+                """)
+                name_conflicts = [dict(row) for row in cursor.fetchall()]
+                
+                # Total count
+                cursor = conn.execute("SELECT COUNT(*) as count FROM ai_tool")
+                total_tools = cursor.fetchone()['count']
             
             validation_result = {
                 'total_tools': total_tools,
@@ -359,15 +794,336 @@ class SQLiteAdapter(DatabaseAdapter):
             }
             
             return validation_result
-            
+        
         except Exception as e:
             print(f"❌ SQLite validation failed: {e}")
             return {'error': str(e)}
+    
+    
+    def cleanup_duplicates(self) -> Dict[str, Any]:
+        """Remove duplicate tools by (ext_id, source) with a single set-based DELETE"""
+        try:
+            started = time.perf_counter()
+            with self._connection() as conn:
+                cursor = conn.execute("""
+                    DELETE FROM ai_tool
+                    WHERE id IN (
+                        SELECT id FROM (
+                            SELECT id, ROW_NUMBER() OVER (
+                                PARTITION BY ext_id, source ORDER BY id
+                            ) AS rn
+                            FROM ai_tool
+                        )
+                        WHERE rn > 1
+                    )
+                """)
+                removed = cursor.rowcount
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            
+            print(f"✅ SQLite cleanup: removed {removed} duplicates in {elapsed_ms:.1f} ms")
+            return {
+                'removed': removed,
+                'elapsed_ms': round(elapsed_ms, 2),
+                'database_type': 'SQLite'
+            }
+        
+        except Exception as e:
+            print(f"❌ SQLite cleanup failed: {e}")
+            return {'error': str(e), 'removed': 0}
+    
+    def load_scoring_tools(self) -> List[Dict[str, Any]]:
+        """Every tool with the columns EdgeScoringEngine needs, in id order"""
+        try:
+            with self._connection() as conn:
+                rows = conn.execute("""
+                    SELECT id, name, description, macro_domain, monthly_users, popularity
+                    FROM ai_tool ORDER BY id
+                """).fetchall()
+                tools = [dict(row) for row in rows]
+                relations = load_tool_relations(conn, [tool['id'] for tool in tools], fields=('categories',))
+            
+            for tool in tools:
+                tool['categories'] = relations[tool['id']]['categories']
+            return tools
+        
+        except Exception as e:
+            print(f"❌ SQLite tool load failed: {e}")
+            return []
+    
+    def iter_tool_descriptions(self, page_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """Pages of {id, description} in id order (keyset: one page of text in memory at a time)"""
+        last_id = -2 ** 63
+        while True:
+            with self._connection() as conn:
+                rows = conn.execute("""
+                    SELECT id, description FROM ai_tool WHERE id > ? ORDER BY id LIMIT ?
+                """, (last_id, page_size)).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            yield [dict(row) for row in rows]
+    
+    def clear_synergies(self) -> int:
+        """Delete every edge (and the degree aggregates, so the per-row triggers find nothing to update)"""
+        try:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM ai_tool_degree")
+                return conn.execute("DELETE FROM ai_synergy").rowcount
+        except Exception as e:
+            print(f"❌ SQLite synergy cleanup failed: {e}")
+            if self.connections.in_transaction():
+                raise  # roll the caller's transaction back instead of committing a partial graph
+            return 0
+    
+    def insert_synergies(self, edges: List[Dict[str, Any]]) -> int:
+        """Insert (or re-score) edges with one executemany; pairs are stored with tool_id_1 < tool_id_2"""
+        if not edges:
+            return 0
+        rows = [
+            (min(edge['tool_id_1'], edge['tool_id_2']), max(edge['tool_id_1'], edge['tool_id_2']),
+             edge['strength'], edge.get('edge_type'))
+            for edge in edges
+        ]
+        try:
+            with self._connection() as conn:
+                conn.executemany("""
+                    INSERT INTO ai_synergy (tool_id_1, tool_id_2, strength, edge_type)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (tool_id_1, tool_id_2) DO UPDATE SET
+                        strength = excluded.strength,
+                        edge_type = excluded.edge_type
+                """, rows)
+            return len(rows)
+        
+        except Exception as e:
+            print(f"❌ SQLite synergy insert failed: {e}")
+            if self.connections.in_transaction():
+                raise
+            return 0
+    
+    def load_synergies(self) -> List[Dict[str, Any]]:
+        """Every edge, in id order"""
+        try:
+            with self._connection() as conn:
+                rows = conn.execute("""
+                    SELECT id, tool_id_1, tool_id_2, strength, edge_type FROM ai_synergy ORDER BY id
+                """).fetchall()
+            return [dict(row) for row in rows]
+        except Exception as e:
+            print(f"❌ SQLite synergy load failed: {e}")
+            return []
+    
+    def update_synergies(self, edges: List[Dict[str, Any]]) -> int:
+        """Re-score edges by id (the degree triggers move their weight and type counts)"""
+        if not edges:
+            return 0
+        try:
+            with self._connection() as conn:
+                conn.executemany(
+                    "UPDATE ai_synergy SET strength = ?, edge_type = ? WHERE id = ?",
+                    [(edge['strength'], edge.get('edge_type'), edge['id']) for edge in edges]
+                )
+            return len(edges)
+        except Exception as e:
+            print(f"❌ SQLite synergy update failed: {e}")
+            if self.connections.in_transaction():
+                raise
+            return 0
+    
+    def delete_synergies(self, edge_ids: List[int]) -> int:
+        """Delete edges by id"""
+        if not edge_ids:
+            return 0
+        try:
+            with self._connection() as conn:
+                return conn.execute(
+                    "DELETE FROM ai_synergy WHERE id IN (SELECT value FROM json_each(?))",
+                    (json.dumps([int(edge_id) for edge_id in edge_ids]),)
+                ).rowcount
+        except Exception as e:
+            print(f"❌ SQLite synergy delete failed: {e}")
+            if self.connections.in_transaction():
+                raise
+            return 0
+    
+    def load_synergy_state(self) -> Dict[int, str]:
+        """Scoring hashes from ai_synergy_tool_state"""
+        try:
+            with self._connection() as conn:
+                return dict(conn.execute("SELECT tool_id, scoring_hash FROM ai_synergy_tool_state").fetchall())
+        except Exception as e:
+            print(f"❌ SQLite synergy state load failed: {e}")
+            return {}
+    
+    def save_synergy_state(self, hashes: Dict[int, str], removed: Optional[List[int]] = None,
+                           replace: bool = False) -> None:
+        """Upsert scoring hashes into ai_synergy_tool_state"""
+        try:
+            with self._connection() as conn:
+                if replace:
+                    conn.execute("DELETE FROM ai_synergy_tool_state")
+                conn.executemany("DELETE FROM ai_synergy_tool_state WHERE tool_id = ?",
+                                 [(tool_id,) for tool_id in removed or []])
+                conn.executemany("""
+                    INSERT INTO ai_synergy_tool_state (tool_id, scoring_hash) VALUES (?, ?)
+                    ON CONFLICT (tool_id) DO UPDATE SET
+                        scoring_hash = excluded.scoring_hash,
+                        scored_at = CURRENT_TIMESTAMP
+                """, list(hashes.items()))
+        except Exception as e:
+            print(f"❌ SQLite synergy state save failed: {e}")
+            if self.connections.in_transaction():
+                raise
+    
+    def get_tool_synergies(self, tool_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """Strongest edges of one tool (see load_tool_synergies)"""
+        try:
+            with self._connection() as conn:
+                return load_tool_synergies(conn, tool_id, limit)
+        except Exception as e:
+            print(f"❌ SQLite synergy lookup failed for {tool_id}: {e}")
+            return []
+    
+    def get_synergy_summary(self) -> Dict[str, Any]:
+        """Edge statistics in one aggregate query"""
+        try:
+            with self._connection() as conn:
+                row = conn.execute("""
+                    SELECT COUNT(*) AS total_edges,
+                           AVG(strength) AS avg_strength,
+                           MIN(strength) AS min_strength,
+                           MAX(strength) AS max_strength,
+                           COUNT(*) FILTER (WHERE strength >= 0.7) AS strong_edges,
+                           COUNT(*) FILTER (WHERE strength >= 0.4 AND strength < 0.7) AS medium_edges,
+                           COUNT(*) FILTER (WHERE strength >= 0.25 AND strength < 0.4) AS weak_edges
+                    FROM ai_synergy
+                """).fetchone()
+            
+            return {
+                'total_edges': row['total_edges'],
+                'avg_strength': row['avg_strength'] or 0,
+                'min_strength': row['min_strength'] or 0,
+                'max_strength': row['max_strength'] or 0,
+                'distribution': {
+                    'strong_edges': row['strong_edges'],
+                    'medium_edges': row['medium_edges'],
+                    'weak_edges': row['weak_edges']
+                }
+            }
+        
+        except Exception as e:
+            print(f"❌ SQLite synergy statistics failed: {e}")
+            return {}
+    
+    def refresh_tool_degree(self) -> None:
+        """ai_tool_degree is maintained by triggers; only repair it if it drifted"""
+        try:
+            if self.connections.in_transaction():
+                return  # checked after the surrounding transaction instead
+            with self._connection() as conn:
+                if self._sync_tool_degree(conn):
+                    print("🔄 Rebuilt ai_tool_degree from ai_synergy")
+        except Exception as e:
+            print(f"⚠️ Error checking ai_tool_degree: {e}")
+    
+    def refresh_trends(self) -> Dict[str, Any]:
+        """Rescore the tools whose popularity history changed and downsample old history (database/trending.py)"""
+        try:
+            with self._connection() as conn:
+                result = refresh_trends(conn)
+                result['history_rows_merged'] = compact_metric_points(conn)
+            return result
+        except Exception as e:
+            print(f"⚠️ Error refreshing trends: {e}")
+            return {}
+
+
+def source_record_json(tool: AITool) -> str:
+    """A scraped tool as stored in tool_source_record.record"""
+    data = asdict(tool)
+    data['last_scraped'] = tool.last_scraped.isoformat() if tool.last_scraped else None
+    return json.dumps(data, sort_keys=True, default=str)
+
+
+def load_tool_synergies(conn: sqlite3.Connection, tool_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Strongest edges of one tool, from either end of the pair
+    
+    Each half of the UNION is a range scan on a covering (tool_id_x, strength)
+    index; only the `limit` related tools are joined to ai_tool.
+    """
+    rows = conn.execute("""
+        SELECT e.related_id, e.strength, e.edge_type, t.name, t.description
+        FROM (
+            SELECT tool_id_2 AS related_id, strength, edge_type FROM ai_synergy WHERE tool_id_1 = ?
+            UNION ALL
+            SELECT tool_id_1, strength, edge_type FROM ai_synergy WHERE tool_id_2 = ?
+            ORDER BY strength DESC
+            LIMIT ?
+        ) e
+        JOIN ai_tool t ON t.id = e.related_id
+        ORDER BY e.strength DESC
+    """, (tool_id, tool_id, limit)).fetchall()
+    
+    return [
+        {
+            'strength': row['strength'],
+            'edge_type': row['edge_type'],
+            'related_tool_id': row['related_id'],
+            'related_tool': {'id': row['related_id'], 'name': row['name'], 'description': row['description']}
+        }
+        for row in rows
+    ]
+
+
+def load_tool_relations(conn: sqlite3.Connection, tool_ids: List[int],
+                        fields=SQLiteAdapter.RELATION_FIELDS) -> Dict[int, Dict[str, Any]]:
+    """
+    Categories, platforms and features for many tools from the normalised tables
+    
+    Returns {tool_id: {'categories': [...], 'platform': [...], 'features': {...}}}
+    with one indexed query per table instead of json.loads per row.
+    """
+    relations = {
+        tool_id: {'categories': [], 'platform': [], 'features': {}} for tool_id in tool_ids
+    }
+    if not relations:
+        return relations
+    
+    ids_json = json.dumps(list(relations))
+    if 'categories' in fields:
+        for tool_id, name in conn.execute("""
+            SELECT tc.tool_id, c.name FROM tool_category tc
+            JOIN category c ON c.id = tc.category_id
+            WHERE tc.tool_id IN (SELECT value FROM json_each(?))
+            ORDER BY tc.tool_id, tc.position
+        """, (ids_json,)):
+            relations[tool_id]['categories'].append(name)
+    
+    if 'platform' in fields:
+        for tool_id, platform in conn.execute("""
+            SELECT tool_id, platform FROM tool_platform
+            WHERE tool_id IN (SELECT value FROM json_each(?))
+        """, (ids_json,)):
+            relations[tool_id]['platform'].append(platform)
+    
+    if 'features' in fields:
+        for tool_id, feature, value in conn.execute("""
+            SELECT tool_id, feature, value FROM tool_feature
+            WHERE tool_id IN (SELECT value FROM json_each(?))
+        """, (ids_json,)):
+            relations[tool_id]['features'][feature] = json.loads(value) if value is not None else None
+    
+    return relations
 
 
 class SupabaseAdapter(DatabaseAdapter):
     """Supabase database adapter for production"""
     
+    # Ids per delete filter (kept well under URL length limits) and state rows per upsert
+    SYNERGY_ID_CHUNK_SIZE = 100
+    SYNERGY_STATE_CHUNK_SIZE = 500
+    
     def __init__(self):
         from dotenv import load_dotenv
         load_dotenv()
@@ -393,17 +1149,30 @@ class SupabaseAdapter(DatabaseAdapter):
             print(f"❌ Supabase connection failed: {e}")
             return False
     
-    def insert_tool(self, tool: AITool, content_hash: str) -> bool:
+    def insert_tool(self, tool: AITool, content_hash: str,
+                    field_hashes: Optional[Dict[str, str]] = None) -> bool:
         """Insert a new tool"""
         # Placeholder implementation - would use existing SupabaseMerger logic
         print("⚠️ Supabase insert not implemented due to connection issues")
         return False
     
-    def update_tool(self, tool_id: int, tool: AITool, content_hash: str) -> bool:
+    def update_tool(self, tool_id: int, tool: AITool, content_hash: str,
+                    field_hashes: Optional[Dict[str, str]] = None) -> bool:
         """Update an existing tool"""
         print("⚠️ Supabase update not implemented due to connection issues")
         return False
     
+    def update_tool_fields(self, tool_id: int, tool: AITool, fields: List[str],
+                           content_hash: str, field_hashes: Dict[str, str]) -> bool:
+        """Update only the given columns"""
+        print("⚠️ Supabase partial update not implemented due to connection issues")
+        return False
+    
+    def touch_last_scraped(self, tool_ids: List[int], scraped_at: Optional[datetime] = None) -> int:
+        """Bump last_scraped for unchanged tools"""
+        print("⚠️ Supabase timestamp update not implemented due to connection issues")
+        return 0
+    
     def find_duplicate_tool(self, tool: AITool) -> Optional[Dict[str, Any]]:
         """Find duplicate tool by URL or name"""
         print("⚠️ Supabase find_duplicate not implemented due to connection issues")
@@ -421,6 +1190,191 @@ class SupabaseAdapter(DatabaseAdapter):
     def validate_no_duplicates(self) -> Dict[str, Any]:
         """Validate no duplicates exist"""
         return {'error': 'Supabase not available due to connection issues'}
+    
+    def cleanup_duplicates(self) -> Dict[str, Any]:
+        """Remove duplicate tools (see SupabaseMerger.cleanup_duplicates)"""
+        return {'error': 'Supabase not available due to connection issues', 'removed': 0}
+    
+    def _client(self):
+        """Supabase client, created on first use"""
+        if self.supabase is None:
+            from supabase import create_client
+            self.supabase = create_client(self.url, self.key)
+        return self.supabase
+    
+    def load_scoring_tools(self) -> List[Dict[str, Any]]:
+        """Every tool with the columns EdgeScoringEngine needs (keyset-paginated)"""
+        from database.pagination import KeysetPaginator
+        try:
+            paginator = KeysetPaginator(
+                self._client(), 'ai_tool',
+                'id, name, description, macro_domain, categories, monthly_users, popularity'
+            )
+            return paginator.fetch_all()
+        except Exception as e:
+            print(f"❌ Error loading tools: {e}")
+            return []
+    
+    def iter_tool_descriptions(self, page_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """Pages of {id, description} in id order (keyset-paginated)"""
+        from database.pagination import KeysetPaginator
+        yield from KeysetPaginator(self._client(), 'ai_tool', 'id, description', page_size=page_size).pages()
+    
+    def clear_synergies(self) -> int:
+        """Delete every edge (errors propagate: there is no transaction to roll back)"""
+        try:
+            response = self._client().table('ai_synergy').delete().gte('id', 0).execute()
+            return len(response.data) if response.data else 0
+        except Exception as e:
+            print(f"❌ Error cleaning synergies: {e}")
+            raise
+    
+    def insert_synergies(self, edges: List[Dict[str, Any]]) -> int:
+        """Insert one batch of edges"""
+        if not edges:
+            return 0
+        try:
+            response = self._client().table('ai_synergy').insert(edges).execute()
+            return len(response.data) if response.data else 0
+        except Exception as e:
+            print(f"❌ Error inserting edge batch: {e}")
+            raise
+    
+    def load_synergies(self) -> List[Dict[str, Any]]:
+        """Every edge (keyset-paginated)"""
+        from database.pagination import KeysetPaginator
+        try:
+            return KeysetPaginator(
+                self._client(), 'ai_synergy', 'id, tool_id_1, tool_id_2, strength, edge_type'
+            ).fetch_all()
+        except Exception as e:
+            print(f"❌ Error loading edges: {e}")
+            return []
+    
+    def update_synergies(self, edges: List[Dict[str, Any]]) -> int:
+        """Re-score edges with one upsert on the primary key"""
+        if not edges:
+            return 0
+        try:
+            response = self._client().table('ai_synergy').upsert([
+                {key: edge[key] for key in ('id', 'tool_id_1', 'tool_id_2', 'strength', 'edge_type')}
+                for edge in edges
+            ]).execute()
+            return len(response.data) if response.data else 0
+        except Exception as e:
+            print(f"❌ Error updating edge batch: {e}")
+            raise
+    
+    def delete_synergies(self, edge_ids: List[int]) -> int:
+        """Delete edges by id, SYNERGY_ID_CHUNK_SIZE ids per request"""
+        removed = 0
+        try:
+            for start in range(0, len(edge_ids), self.SYNERGY_ID_CHUNK_SIZE):
+                chunk = list(edge_ids[start:start + self.SYNERGY_ID_CHUNK_SIZE])
+                response = self._client().table('ai_synergy').delete().in_('id', chunk).execute()
+                removed += len(response.data) if response.data else 0
+        except Exception as e:
+            print(f"❌ Error deleting edges ({removed} removed before the failure): {e}")
+            raise
+        return removed
+    
+    def load_synergy_state(self) -> Dict[int, str]:
+        """Scoring hashes from ai_synergy_tool_state (keyset-paginated)"""
+        from database.pagination import KeysetPaginator
+        try:
+            paginator = KeysetPaginator(
+                self._client(), 'ai_synergy_tool_state', 'tool_id, scoring_hash', key='tool_id'
+            )
+            return {row['tool_id']: row['scoring_hash'] for row in paginator}
+        except Exception as e:
+            print(f"❌ Error loading synergy state: {e}")
+            return {}
+    
+    def save_synergy_state(self, hashes: Dict[int, str], removed: Optional[List[int]] = None,
+                           replace: bool = False) -> None:
+        """Upsert scoring hashes into ai_synergy_tool_state"""
+        try:
+            client = self._client()
+            if replace:
+                client.table('ai_synergy_tool_state').delete().gte('tool_id', 0).execute()
+            removed = list(removed or [])
+            for start in range(0, len(removed), self.SYNERGY_ID_CHUNK_SIZE):
+                client.table('ai_synergy_tool_state').delete() \
+                    .in_('tool_id', removed[start:start + self.SYNERGY_ID_CHUNK_SIZE]).execute()
+            rows = [{'tool_id': tool_id, 'scoring_hash': value} for tool_id, value in hashes.items()]
+            for start in range(0, len(rows), self.SYNERGY_STATE_CHUNK_SIZE):
+                client.table('ai_synergy_tool_state') \
+                    .upsert(rows[start:start + self.SYNERGY_STATE_CHUNK_SIZE], on_conflict='tool_id').execute()
+        except Exception as e:
+            print(f"❌ Error saving synergy state: {e}")
+            raise
+    
+    def get_tool_synergies(self, tool_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """Strongest edges of one tool, queried from both ends of the pair"""
+        try:
+            client = self._client()
+            response1 = client.table('ai_synergy').select(
+                'strength, edge_type, tool_id_2, ai_tool!ai_synergy_tool_id_2_fkey(id, name, description)'
+            ).eq('tool_id_1', tool_id).order('strength', desc=True).limit(limit).execute()
+            
+            response2 = client.table('ai_synergy').select(
+                'strength, edge_type, tool_id_1, ai_tool!ai_synergy_tool_id_1_fkey(id, name, description)'
+            ).eq('tool_id_2', tool_id).order('strength', desc=True).limit(limit).execute()
+            
+            synergies = []
+            for item in response1.data:
+                synergies.append({
+                    'strength': item['strength'],
+                    'edge_type': item.get('edge_type'),
+                    'related_tool_id': item['tool_id_2'],
+                    'related_tool': item['ai_tool']
+                })
+            for item in response2.data:
+                synergies.append({
+                    'strength': item['strength'],
+                    'edge_type': item.get('edge_type'),
+                    'related_tool_id': item['tool_id_1'],
+                    'related_tool': item['ai_tool']
+                })
+            
+            synergies.sort(key=lambda x: x['strength'], reverse=True)
+            return synergies[:limit]
+        
+        except Exception as e:
+            print(f"❌ Error getting tool synergies for {tool_id}: {e}")
+            return []
+    
+    def get_synergy_summary(self) -> Dict[str, Any]:
+        """Edge statistics from the strength column, streamed page by page"""
+        from database.pagination import KeysetPaginator
+        try:
+            client = self._client()
+            total_response = client.table('ai_synergy').select('id', count='exact').limit(1).execute()
+            
+            # Not capped at max-rows
+            strengths = []
+            for chunk in KeysetPaginator(client, 'ai_synergy', 'id, strength').column_chunks():
+                strengths.extend(chunk['strength'])
+            
+            return {
+                'total_edges': total_response.count,
+                'avg_strength': sum(strengths) / len(strengths) if strengths else 0,
+                'min_strength': min(strengths) if strengths else 0,
+                'max_strength': max(strengths) if strengths else 0,
+                'distribution': {
+                    'strong_edges': len([s for s in strengths if s >= 0.7]),
+                    'medium_edges': len([s for s in strengths if 0.4 <= s < 0.7]),
+                    'weak_edges': len([s for s in strengths if 0.25 <= s < 0.4])
+                }
+            }
+        
+        except Exception as e:
+            print(f"❌ Error getting edge statistics: {e}")
+            return {}
+    
+    def refresh_tool_degree(self) -> None:
+        """Nothing to refresh: ai_tool_degree is kept current by statement triggers (supabase_schema_updates.sql)"""
+        pass
 
 
 def create_database_adapter(use_sqlite: bool = True) -> DatabaseAdapter:
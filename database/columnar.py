@@ -0,0 +1,350 @@
+"""
+Columnar snapshots of ai_tool and ai_synergy (Parquet, via pyarrow)
+
+Moving data between environments used to mean shipping the SQLite file or
+re-running the scrapers, and ProgressMonitor.export_for_frontend writes every
+row as indented JSON. export_parquet() writes one Parquet file per table
+instead:
+
+- typed columns: integers, floats, microsecond timestamps (not text)
+- low-cardinality text (source, macro_domain, price, maturity, edge_type) and
+  the categories/platform lists are dictionary-encoded
+- zstd compression, one row group per record batch
+
+Rows are streamed from SQLite in record batches of ``batch_size`` rows and
+read back the same way by import_parquet(), so memory stays bounded by the
+batch size on both sides. An import replaces the target's tools and edges
+(ids are kept, so edges stay valid) and then rebuilds the derived tables
+(tool identities, normalised categories, search index, degree aggregates).
+
+pyarrow is optional: without it both functions print a message and return.
+
+Usage:
+    python -m database.columnar export --db database/ai_tools.db --dir database/export
+    python -m database.columnar import --db /tmp/fresh.db --dir database/export
+"""
+
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from database.adapters import SQLiteAdapter, load_tool_relations
+
+
+DEFAULT_DB_PATH = 'database/ai_tools.db'
+DEFAULT_EXPORT_DIR = 'database/export'
+BATCH_SIZE = 50_000
+COMPRESSION = 'zstd'
+COMPRESSION_LEVEL = 3
+FORMAT_VERSION = 2
+MANIFEST_FILE = 'manifest.json'
+
+# tool_platform is keyed (tool_id, platform) and keeps no position, so the
+# platform list is read from its JSON column to come back in stored order
+ORDERED_FROM_JSON = ('platform',)
+
+# (column, kind) in file order. Kinds:
+#   int / float / text   plain typed column
+#   dict                 dictionary-encoded text
+#   dict_list            list of dictionary-encoded text (from the normalised tables, or
+#                        from the JSON column for those in ORDERED_FROM_JSON)
+#   ts                   timestamp[us], written back as 'YYYY-MM-DD HH:MM:SS[.ffffff]' (CURRENT_TIMESTAMP)
+#   ts_iso               timestamp[us], written back as ISO 8601 with a 'T' (AITool.last_scraped)
+TOOL_COLUMNS: List[Tuple[str, str]] = [
+    ('id', 'int'),
+    ('ext_id', 'text'),
+    ('name', 'text'),
+    ('description', 'text'),
+    ('price', 'dict'),
+    ('popularity', 'float'),
+    ('categories', 'dict_list'),
+    ('source', 'dict'),
+    ('macro_domain', 'dict'),
+    ('content_hash', 'text'),
+    ('created_at', 'ts'),
+    ('updated_at', 'ts'),
+    ('url', 'text'),
+    ('logo_url', 'text'),
+    ('rank', 'int'),
+    ('upvotes', 'int'),
+    ('monthly_users', 'int'),
+    ('editor_score', 'float'),
+    ('maturity', 'dict'),
+    ('platform', 'dict_list'),
+    ('features', 'text'),  # JSON object, values of mixed types
+    ('last_scraped', 'ts_iso'),
+    ('field_hashes', 'text'),
+    ('community_id', 'int'),  # cluster_detect.py; missing from older exports
+]
+
+SYNERGY_COLUMNS: List[Tuple[str, str]] = [
+    ('id', 'int'),
+    ('tool_id_1', 'int'),
+    ('tool_id_2', 'int'),
+    ('strength', 'float'),
+    ('edge_type', 'dict'),
+    ('created_at', 'ts'),
+]
+
+TABLES = {'ai_tool': TOOL_COLUMNS, 'ai_synergy': SYNERGY_COLUMNS}
+
+# Text timestamps are parsed and formatted in Python: SQLite's julianday()
+# only resolves milliseconds, and microseconds must survive a round trip
+_TS_SEPARATORS = {'ts': ' ', 'ts_iso': 'T'}
+
+
+def _parse_ts(value: Any) -> Any:
+    """Stored timestamp text -> datetime (None when empty or unparseable)"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _format_ts(value: Any, kind: str) -> Any:
+    """datetime -> the text the adapter stores for this kind of column"""
+    return value.isoformat(sep=_TS_SEPARATORS[kind]) if value is not None else None
+
+
+# Per-row triggers that maintain derived tables on insert. A bulk import drops
+# them for the load and rebuilds the derived tables set-based afterwards
+# (about half the import time at 30k tools / 300k edges).
+BULK_LOAD_TRIGGERS = ('ai_tool_fts_insert', 'ai_tool_identity_insert', 'ai_synergy_degree_insert')
+
+
+def _arrow_schema(pa, columns: List[Tuple[str, str]]):
+    types = {
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'text': pa.string(),
+        'dict': pa.dictionary(pa.int32(), pa.string()),
+        'dict_list': pa.list_(pa.dictionary(pa.int32(), pa.string())),
+        'ts': pa.timestamp('us'),
+        'ts_iso': pa.timestamp('us'),
+    }
+    return pa.schema([pa.field(name, types[kind]) for name, kind in columns])
+
+
+def _select_sql(table: str, columns: List[Tuple[str, str]]) -> str:
+    """SELECT of the stored columns (lists come from the normalised tables, not the JSON)"""
+    exprs = []
+    for name, kind in columns:
+        if kind == 'dict_list' and name not in ORDERED_FROM_JSON:
+            continue
+        exprs.append(name)
+    return f"SELECT {', '.join(exprs)} FROM {table} ORDER BY id"
+
+
+def _to_batch(pa, schema, columns: List[Tuple[str, str]], rows: List[tuple],
+              relations: Dict[int, Dict[str, Any]]):
+    """One record batch from SQLite rows (ids first) plus the tools' list columns"""
+    stored = list(zip(*rows))
+    ids = stored[0]
+    arrays = []
+    position = 0
+    for name, kind in columns:
+        if kind == 'dict_list':
+            if name in ORDERED_FROM_JSON:
+                lists = [json.loads(value) if value else [] for value in stored[position]]
+                position += 1
+            else:
+                lists = [relations[tool_id][name] for tool_id in ids]
+            offsets, values = [0], []
+            for items in lists:
+                values.extend(str(item) for item in items)
+                offsets.append(len(values))
+            arrays.append(pa.ListArray.from_arrays(
+                pa.array(offsets, pa.int32()),
+                pa.array(values, pa.string()).dictionary_encode()
+            ))
+            continue
+
+        values = stored[position]
+        position += 1
+        if kind == 'dict':
+            arrays.append(pa.array(values, pa.string()).dictionary_encode())
+        elif kind in _TS_SEPARATORS:
+            arrays.append(pa.array([_parse_ts(v) for v in values], schema.field(name).type))
+        else:
+            arrays.append(pa.array(values, schema.field(name).type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_parquet(db_path: str = DEFAULT_DB_PATH, out_dir: str = DEFAULT_EXPORT_DIR,
+                   batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Stream ai_tool and ai_synergy into <out_dir>/<table>.parquet
+
+    Args:
+        db_path: SQLite database to export
+        out_dir: Output directory (files are replaced atomically)
+        batch_size: Rows per record batch / row group
+
+    Returns:
+        Manifest with row counts, bytes and timings per table ({} without pyarrow)
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        print(f"❌ pyarrow not installed (pip install pyarrow): {e}")
+        return {}
+
+    directory = Path(out_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    adapter = SQLiteAdapter(db_path)
+    conn = adapter.connections.connection()
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'source': os.path.abspath(db_path),
+        'exported_at': datetime.now().isoformat(),
+        'compression': COMPRESSION,
+        'tables': {}
+    }
+
+    for table, columns in TABLES.items():
+        started = time.perf_counter()
+        schema = _arrow_schema(pa, columns)
+        list_fields = tuple(name for name, kind in columns
+                            if kind == 'dict_list' and name not in ORDERED_FROM_JSON)
+        path = directory / f"{table}.parquet"
+        tmp_path = directory / f".{table}.parquet.tmp"
+
+        cursor = conn.cursor()
+        cursor.row_factory = None  # plain tuples
+        cursor.execute(_select_sql(table, columns))
+
+        rows_written = 0
+        with pq.ParquetWriter(str(tmp_path), schema, compression=COMPRESSION,
+                              compression_level=COMPRESSION_LEVEL) as writer:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                relations = load_tool_relations(conn, [row[0] for row in rows], fields=list_fields) \
+                    if list_fields else {}
+                batch = _to_batch(pa, schema, columns, rows, relations)
+                writer.write_table(pa.Table.from_batches([batch]), row_group_size=batch_size)
+                rows_written += len(rows)
+            if rows_written == 0:
+                writer.write_table(schema.empty_table())
+        os.replace(tmp_path, path)
+
+        manifest['tables'][table] = {
+            'file': path.name,
+            'rows': rows_written,
+            'bytes': path.stat().st_size,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+        print(f"📦 Exported {rows_written:,} rows of {table} "
+              f"({path.stat().st_size / 1024 / 1024:.1f} MB) in "
+              f"{manifest['tables'][table]['elapsed_ms']:.0f} ms")
+
+    with open(directory / MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def import_parquet(db_path: str, in_dir: str = DEFAULT_EXPORT_DIR,
+                   batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Replace the tools and edges of db_path with a snapshot written by export_parquet()
+
+    Runs in one transaction with the per-row insert triggers of the search
+    index, tool identities and degree aggregates dropped (and re-created
+    before the commit), then rebuilds the identities, the normalised
+    category/platform/feature tables, the search index and the degree
+    aggregates in bulk. Source records of the replaced tools are dropped.
+    Columns a file lacks (exports written before a column was added) are
+    left to their defaults.
+
+    Returns:
+        Rows imported per table and elapsed time ({} without pyarrow)
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        print(f"❌ pyarrow not installed (pip install pyarrow): {e}")
+        return {}
+
+    directory = Path(in_dir)
+    started = time.perf_counter()
+    adapter = SQLiteAdapter(db_path)
+    result: Dict[str, Any] = {}
+
+    with adapter.transaction() as conn:
+        placeholders = ', '.join('?' * len(BULK_LOAD_TRIGGERS))
+        triggers = conn.execute(
+            f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})",
+            BULK_LOAD_TRIGGERS
+        ).fetchall()
+        for name, _ in triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+
+        # Edges first, so the degree triggers have nothing left to update
+        conn.execute("DELETE FROM ai_tool_degree")
+        conn.execute("DELETE FROM ai_synergy")
+        conn.execute("DELETE FROM ai_tool")
+        conn.execute("DELETE FROM tool_identity")
+        conn.execute("DELETE FROM tool_source_record")
+
+        for table, columns in TABLES.items():
+            parquet_file = pq.ParquetFile(str(directory / f"{table}.parquet"))
+            present = set(parquet_file.schema_arrow.names)
+            columns = [(name, kind) for name, kind in columns if name in present]
+            names = [name for name, _ in columns]
+            sql = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+
+            rows_read = 0
+            for batch in parquet_file.iter_batches(batch_size=batch_size, columns=names):
+                values = []
+                for name, kind in columns:
+                    column = batch.column(name)
+                    if kind in _TS_SEPARATORS:
+                        values.append([_format_ts(v, kind) for v in column.to_pylist()])
+                    elif kind == 'dict_list':
+                        # Same JSON the adapter writes for these columns
+                        values.append([json.dumps(v) if v else None for v in column.to_pylist()])
+                    else:
+                        values.append(column.to_pylist())
+                conn.executemany(sql, zip(*values))
+                rows_read += batch.num_rows
+            result[table] = rows_read
+
+        for _, sql in triggers:
+            conn.execute(sql)
+
+    # The search index, identities and ai_tool_degree are now behind ai_tool/ai_synergy
+    adapter.sync_derived_tables()
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"📥 Imported {result['ai_tool']:,} tools and {result['ai_synergy']:,} edges "
+          f"in {result['elapsed_ms']:.0f} ms")
+    return result
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Parquet snapshots of ai_tool and ai_synergy')
+    parser.add_argument('action', choices=['export', 'import'])
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='SQLite database path')
+    parser.add_argument('--dir', default=DEFAULT_EXPORT_DIR, help='Parquet directory')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per record batch')
+    args = parser.parse_args()
+
+    if args.action == 'export':
+        export_parquet(args.db, args.dir, args.batch_size)
+    else:
+        import_parquet(args.db, args.dir, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Connection management for the SQLite backend
+
+Every component used to open (and close) a fresh sqlite3 connection per call,
+in the default rollback-journal mode, so each call paid for opening the file,
+re-parsing the schema and re-preparing its statements, and readers blocked
+writers. SQLiteConnectionManager keeps one persistent connection per thread,
+configured with:
+
+- journal_mode=WAL: readers and the single writer no longer block each other
+- synchronous=NORMAL: durable at checkpoints, no fsync per commit in WAL mode
+- cache_size: 64 MiB page cache per connection
+- mmap_size: 256 MiB of the file read through memory-mapped I/O
+- busy_timeout: wait for a lock instead of failing with "database is locked"
+- cached_statements: prepared statements are reused across calls
+
+Connections released by a thread (e.g. at the end of a Flask request) go to a
+small idle pool and are handed to the next thread instead of being closed.
+
+Usage:
+    manager = get_connection_manager('database/ai_tools.db')
+    rows = manager.connection().execute("SELECT ...").fetchall()
+    with manager.transaction() as conn:
+        conn.execute("UPDATE ...")
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+
+BUSY_TIMEOUT = 30.0
+CACHE_SIZE_KIB = 64 * 1024
+MMAP_SIZE = 256 * 1024 * 1024
+CACHED_STATEMENTS = 256
+MAX_IDLE_CONNECTIONS = 8
+
+
+class SQLiteConnectionManager:
+    """Per-thread persistent SQLite connections with WAL and tuned pragmas"""
+
+    def __init__(self, db_path: str, busy_timeout: float = BUSY_TIMEOUT,
+                 cache_size_kib: int = CACHE_SIZE_KIB, mmap_size: int = MMAP_SIZE,
+                 cached_statements: int = CACHED_STATEMENTS,
+                 max_idle: int = MAX_IDLE_CONNECTIONS):
+        """
+        Args:
+            db_path: SQLite database file
+            busy_timeout: Seconds to wait for a lock held by another connection
+            cache_size_kib: Page cache per connection
+            mmap_size: Bytes of the database file to memory-map
+            cached_statements: Prepared statements kept per connection
+            max_idle: Released connections kept for reuse by other threads
+        """
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self.max_idle = max_idle
+
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._idle: List[sqlite3.Connection] = []
+        self._all: List[sqlite3.Connection] = []
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection (opened on first use)"""
+        if self._pid != os.getpid():
+            # Connections must not cross fork(); start over in the child
+            self._reset()
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._open()
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    def _open(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Thread affinity is enforced by the manager, so connections may be
+        # handed to another thread through the idle pool
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            cached_statements=self.cached_statements,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    def in_transaction(self) -> bool:
+        """True inside transaction() on this thread"""
+        return getattr(self._local, 'depth', 0) > 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        One write transaction on this thread's connection
+
+        Takes the write lock up front (BEGIN IMMEDIATE) so concurrent writers
+        wait on busy_timeout instead of failing mid-transaction. Nested blocks
+        join the outer transaction.
+        """
+        conn = self.connection()
+        if self.in_transaction():
+            yield conn
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._local.depth = 0
+
+    def release(self) -> None:
+        """Return this thread's connection to the idle pool (e.g. after a request)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+            self._all.remove(conn)
+        conn.close()
+
+    def close(self) -> None:
+        """Close every connection opened by this manager"""
+        with self._lock:
+            connections, self._all, self._idle = self._all, [], []
+        self._local = threading.local()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def pragmas(self) -> Dict[str, object]:
+        """Effective settings of this thread's connection"""
+        conn = self.connection()
+        names = ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'busy_timeout')
+        return {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in names}
+
+
+_managers: Dict[str, SQLiteConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(db_path: str, **kwargs) -> SQLiteConnectionManager:
+    """Shared manager per database file (options apply on first creation only)"""
+    key = os.path.abspath(db_path)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = SQLiteConnectionManager(db_path, **kwargs)
+            _managers[key] = manager
+        return manager
@@ -0,0 +1,99 @@
+"""
+Canonical per-field content hashing for AI tools
+
+Each hashed field of an AITool is reduced to a canonical JSON value (lists
+sorted and de-duplicated, dict keys sorted, numbers normalised) and hashed on
+its own. The per-field hashes are stored alongside the row (field_hashes) and
+combined into the row-level content_hash, so a merge can tell exactly which
+columns changed and update only those.
+
+Usage:
+    hashes = compute_field_hashes(tool)
+    content_hash = combine_field_hashes(hashes)
+    changed = changed_fields(parse_field_hashes(row['field_hashes']), hashes)
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+from scrapers.common import AITool
+
+
+def _text(value: Any) -> Optional[str]:
+    return value if value else None
+
+
+def _int(value: Any) -> Optional[int]:
+    return int(value) if value is not None else None
+
+
+def _float(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _string_set(value: Any) -> List[str]:
+    return sorted({str(item) for item in value}) if value else []
+
+
+def _mapping(value: Any) -> Optional[Dict[str, Any]]:
+    return dict(value) if value else None
+
+
+# Field name -> canonicaliser. Field names match ai_tool column names.
+HASHED_FIELDS = {
+    'name': _text,
+    'description': _text,
+    'price': _text,
+    'popularity': _float,
+    'categories': _string_set,
+    'macro_domain': _text,
+    'url': _text,
+    'logo_url': _text,
+    'rank': _int,
+    'upvotes': _int,
+    'monthly_users': _int,
+    'editor_score': _float,
+    'maturity': _text,
+    'platform': _string_set,
+    'features': _mapping,
+}
+
+
+def canonical_field_values(tool: AITool) -> Dict[str, Any]:
+    """Return the canonical value of every hashed field"""
+    return {field: canonicalise(getattr(tool, field, None)) for field, canonicalise in HASHED_FIELDS.items()}
+
+
+def _hash_value(value: Any) -> str:
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.md5(encoded.encode('utf-8')).hexdigest()[:16]
+
+
+def compute_field_hashes(tool: AITool) -> Dict[str, str]:
+    """Hash each field independently of dict order and list order"""
+    return {field: _hash_value(value) for field, value in canonical_field_values(tool).items()}
+
+
+def combine_field_hashes(field_hashes: Dict[str, str]) -> str:
+    """Derive the row-level content hash from the per-field hashes"""
+    combined = '|'.join(f"{field}={field_hashes[field]}" for field in sorted(field_hashes))
+    return hashlib.md5(combined.encode('utf-8')).hexdigest()
+
+
+def parse_field_hashes(value: Any) -> Dict[str, str]:
+    """Read stored field hashes (JSON text in SQLite, object in Supabase)"""
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        return value
+    try:
+        parsed = json.loads(value)
+        return parsed if isinstance(parsed, dict) else {}
+    except (TypeError, ValueError):
+        return {}
+
+
+def changed_fields(old_hashes: Dict[str, str], new_hashes: Dict[str, str]) -> List[str]:
+    """Fields whose hash differs; every field counts as changed when nothing is stored"""
+    return [field for field in HASHED_FIELDS if old_hashes.get(field) != new_hashes.get(field)]
@@ -0,0 +1,603 @@
+"""
+Append-only ingest log between scrapers and the SQLite database
+
+Scrapers used to upsert tools straight into database/ai_tools.db one row at a
+time, while the monitor and the API read the same file, which ends in
+``database is locked`` under load. With the ingest log:
+
+- any number of scraper processes append tools to the log (IngestLogWriter);
+  each process writes its own segment files, so writers never contend
+- a single drainer (IngestLogDrainer, guarded by a lock file) applies the
+  records to SQLite in large transactions and checkpoints its byte offset per
+  segment in the same transaction, so every record is applied exactly once
+- the drainer lag (pending records/bytes, age of the oldest pending record)
+  is available as a metric through ingest_lag()
+
+Segments are JSON-lines files named ``seg-<start ms>-<pid>-<seq>``. A segment
+is written as ``.open.jsonl`` and renamed to ``.jsonl`` when sealed (size
+limit reached or writer closed). Records are fsync'ed in batches: every
+``fsync_every`` records, after ``fsync_interval`` seconds, or once per
+append_many() call. Only complete lines are drained, so a torn last line from
+a crashed writer is never applied.
+
+Usage:
+    with IngestLogWriter() as log:
+        log.append_many(tools)
+
+    python -m database.ingest_log drain     # run the single writer
+    python -m database.ingest_log status    # print the lag
+
+Whenever the drainer has applied records and caught up, it rescores trending
+tools (database/trending.py) and, with ``snapshot_dir`` set, publishes a
+read-only snapshot for the API (database/snapshot.py).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from database.connection import get_connection_manager
+from database.snapshot import DEFAULT_SNAPSHOT_DIR, publish_snapshot
+from scrapers.common import AITool
+
+
+DEFAULT_LOG_DIR = 'database/ingest_log'
+DEFAULT_DB_PATH = 'database/ai_tools.db'
+
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+FSYNC_EVERY_RECORDS = 200
+FSYNC_INTERVAL = 1.0
+DRAIN_BATCH_SIZE = 5000
+
+RECORD_VERSION = 1
+OPEN_SUFFIX = '.open.jsonl'
+SEALED_SUFFIX = '.jsonl'
+LOCK_FILE = 'drainer.lock'
+
+_AITOOL_FIELDS = {f.name for f in fields(AITool)}
+
+
+def tool_to_record(tool: AITool, op: str = 'upsert_tool') -> Dict[str, Any]:
+    """Serialise an AITool into a log record"""
+    data = asdict(tool)
+    data['last_scraped'] = tool.last_scraped.isoformat() if tool.last_scraped else None
+    return {'v': RECORD_VERSION, 'op': op, 'ts': time.time(), 'tool': data}
+
+
+def record_to_tool(record: Dict[str, Any]) -> AITool:
+    """Rebuild the AITool stored in a log record"""
+    data = {k: v for k, v in record['tool'].items() if k in _AITOOL_FIELDS}
+    if data.get('last_scraped'):
+        data['last_scraped'] = datetime.fromisoformat(data['last_scraped'])
+    return AITool(**data)
+
+
+def _segment_name(path: Path) -> str:
+    """Segment key without the open/sealed suffix"""
+    name = path.name
+    for suffix in (OPEN_SUFFIX, SEALED_SUFFIX):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def _segment_pid(name: str) -> Optional[int]:
+    try:
+        return int(name.split('-')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == 'nt':
+        # os.kill(pid, 0) terminates the process on Windows; assume alive
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _fsync_dir(path: Path) -> None:
+    """Persist a rename/create in the directory entry (no-op where unsupported)"""
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class IngestLogWriter:
+    """Append tools to this process's own log segments"""
+
+    def __init__(self, log_dir: str = DEFAULT_LOG_DIR, segment_max_bytes: int = SEGMENT_MAX_BYTES,
+                 fsync_every: int = FSYNC_EVERY_RECORDS, fsync_interval: float = FSYNC_INTERVAL):
+        """
+        Args:
+            log_dir: Directory shared by all writers and the drainer
+            segment_max_bytes: Seal the current segment once it grows past this size
+            fsync_every: fsync after this many unsynced records
+            fsync_interval: fsync when the oldest unsynced record is this many seconds old
+        """
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+
+        self.writer_id = f"seg-{int(time.time() * 1000):013d}-{os.getpid()}"
+        self.records_written = 0
+
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._fd: Optional[int] = None
+        self._path: Optional[Path] = None
+        self._size = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def append(self, tool: AITool) -> None:
+        """Append one tool; fsync happens in batches"""
+        with self._lock:
+            self._write(tool_to_record(tool))
+            self._maybe_sync()
+
+    def append_many(self, tools: List[AITool]) -> int:
+        """Append a batch of tools with a single fsync at the end"""
+        with self._lock:
+            for tool in tools:
+                self._write(tool_to_record(tool))
+            self._sync()
+        return len(tools)
+
+    def flush(self) -> None:
+        """fsync everything written so far"""
+        with self._lock:
+            self._sync()
+
+    def close(self) -> None:
+        """Seal the current segment so the drainer can retire it"""
+        with self._lock:
+            self._seal()
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        if self._fd is not None and self._size + len(line) > self.segment_max_bytes and self._size > 0:
+            self._seal()
+        if self._fd is None:
+            self._open_segment()
+
+        # One write() per record: a crash can only tear the last line
+        os.write(self._fd, line)
+        self._size += len(line)
+        self._unsynced += 1
+        self.records_written += 1
+
+    def _open_segment(self) -> None:
+        self._seq += 1
+        self._path = self.log_dir / f"{self.writer_id}-{self._seq:06d}{OPEN_SUFFIX}"
+        self._fd = os.open(str(self._path), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._size = 0
+        _fsync_dir(self.log_dir)
+
+    def _maybe_sync(self) -> None:
+        if (self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval):
+            self._sync()
+
+    def _sync(self) -> None:
+        if self._fd is not None and self._unsynced:
+            os.fsync(self._fd)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _seal(self) -> None:
+        if self._fd is None:
+            return
+        self._sync()
+        os.close(self._fd)
+        sealed = self._path.with_name(_segment_name(self._path) + SEALED_SUFFIX)
+        os.replace(self._path, sealed)
+        _fsync_dir(self.log_dir)
+        self._fd = None
+        self._path = None
+        self._size = 0
+
+
+class IngestLogDrainer:
+    """Single writer that applies log records to SQLite in large transactions"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, log_dir: str = DEFAULT_LOG_DIR,
+                 batch_size: int = DRAIN_BATCH_SIZE, adapter=None,
+                 snapshot_dir: Optional[str] = None):
+        """
+        Args:
+            db_path: SQLite database to apply records to
+            log_dir: Directory the writers append to
+            batch_size: Records applied per transaction
+            adapter: Existing SQLiteAdapter to reuse (created from db_path otherwise)
+            snapshot_dir: Publish a read-only snapshot here after draining (off when None)
+        """
+        if adapter is None:
+            from database.adapters import SQLiteAdapter
+            adapter = SQLiteAdapter(db_path)
+        self.adapter = adapter
+        self.db_path = adapter.db_path
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_size = max(1, batch_size)
+        self.snapshot_dir = snapshot_dir
+        self._lock_fd: Optional[int] = None
+
+    # ------------------------------------------------------------------
+    # Single-writer lock
+    # ------------------------------------------------------------------
+
+    def acquire(self, blocking: bool = False) -> bool:
+        """Take the drainer lock; False if another drainer holds it"""
+        if self._lock_fd is not None:
+            return True
+        fd = os.open(str(self.log_dir / LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            else:
+                import msvcrt
+                msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def release(self) -> None:
+        """Give the drainer lock back"""
+        if self._lock_fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        os.close(self._lock_fd)
+        self._lock_fd = None
+
+    # ------------------------------------------------------------------
+    # Draining
+    # ------------------------------------------------------------------
+
+    def drain_once(self, max_records: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Apply every complete pending record (up to max_records)
+
+        Returns counts of applied/failed/skipped records, transactions and
+        retired segments. Requires the drainer lock.
+        """
+        if not self.acquire():
+            raise RuntimeError(f"Another drainer holds {self.log_dir / LOCK_FILE}")
+
+        started = time.perf_counter()
+        result = {'applied': 0, 'failed': 0, 'skipped': 0, 'transactions': 0, 'segments_retired': 0}
+
+        tools: List[AITool] = []
+        marks: Dict[str, Tuple[int, int, bool]] = {}  # segment -> (offset, records, sealed)
+        batch_records = 0
+        seen = 0
+
+        for name, path, sealed, offset in self._pending_segments():
+            for record, end_offset in self._read_records(path, name, offset):
+                seen += 1
+                batch_records += 1
+                _, records, _ = marks.get(name, (offset, 0, sealed))
+                marks[name] = (end_offset, records + 1, sealed)
+
+                if record is not None and record.get('op') == 'upsert_tool':
+                    try:
+                        tools.append(record_to_tool(record))
+                    except (KeyError, TypeError, ValueError):
+                        result['skipped'] += 1
+                else:
+                    result['skipped'] += 1
+
+                if batch_records >= self.batch_size:
+                    self._apply(tools, marks, result)
+                    tools, marks, batch_records = [], {}, 0
+                if max_records is not None and seen >= max_records:
+                    break
+            if max_records is not None and seen >= max_records:
+                break
+
+        if marks:
+            self._apply(tools, marks, result)
+
+        result['segments_retired'] = self._retire_segments()
+        result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    def drain_if_available(self) -> Optional[Dict[str, Any]]:
+        """Drain inline unless a dedicated drainer process is already running"""
+        # A lock this drainer already holds (run(), a caller's acquire()) stays held
+        acquired = self._lock_fd is None
+        if acquired and not self.acquire():
+            return None
+        try:
+            result = self.drain_once()
+        finally:
+            if acquired:
+                self.release()
+        if result['applied']:
+            self.adapter.refresh_trends()
+            self.publish_snapshot()
+        return result
+
+    def run(self, poll_interval: float = 1.0, exit_when_idle: bool = False) -> None:
+        """Drain continuously; the only process writing ingested tools to SQLite"""
+        if not self.acquire():
+            print(f"⚠️ Another drainer is already running ({self.log_dir / LOCK_FILE})")
+            return
+
+        print(f"🚰 Draining {self.log_dir} into {self.db_path}")
+        unpublished = 0
+        try:
+            while True:
+                result = self.drain_once()
+                unpublished += result['applied']
+                if result['applied'] or result['failed'] or result['skipped']:
+                    lag = self.lag()
+                    print(f"✅ Applied {result['applied']} records in {result['transactions']} "
+                          f"transaction(s), {result['elapsed_ms']:.0f} ms "
+                          f"(failed: {result['failed']}, lag: {lag['pending_records']} records)")
+                    continue
+                if unpublished:
+                    # Caught up: one trend refresh and snapshot per burst of records, not per transaction
+                    self.adapter.refresh_trends()
+                    self.publish_snapshot()
+                    unpublished = 0
+                if exit_when_idle:
+                    break
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            print("\n⏹️  Drainer stopped")
+        finally:
+            self.release()
+
+    def publish_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Publish a read-only snapshot of the database (when snapshot_dir is set)"""
+        if not self.snapshot_dir:
+            return None
+        try:
+            manifest = publish_snapshot(self.db_path, self.snapshot_dir, stage='ingest')
+            print(f"📸 Published snapshot v{manifest['version']} ({manifest['tools']} tools)")
+            return manifest
+        except Exception as e:
+            print(f"⚠️ Snapshot publish failed: {e}")
+            return None
+
+    def _apply(self, tools: List[AITool], marks: Dict[str, Tuple[int, int, bool]],
+               result: Dict[str, Any]) -> None:
+        """Upsert a batch and advance checkpoints in one transaction"""
+        now = datetime.now().isoformat()
+        with self.adapter.transaction() as conn:
+            for tool in tools:
+                if self.adapter.upsert_ai_tool(tool):
+                    result['applied'] += 1
+                else:
+                    result['failed'] += 1
+            conn.executemany(
+                """
+                INSERT INTO ingest_checkpoint (segment, byte_offset, records, sealed, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(segment) DO UPDATE SET
+                    byte_offset = excluded.byte_offset,
+                    records = ingest_checkpoint.records + excluded.records,
+                    sealed = excluded.sealed,
+                    updated_at = excluded.updated_at
+                """,
+                [(name, offset, records, int(sealed), now)
+                 for name, (offset, records, sealed) in marks.items()]
+            )
+        result['transactions'] += 1
+
+    def _checkpoints(self) -> Dict[str, int]:
+        return _read_checkpoints(self.db_path)
+
+    def _pending_segments(self) -> List[Tuple[str, Path, bool, int]]:
+        """Segments with unread bytes, oldest first"""
+        checkpoints = self._checkpoints()
+        pending = []
+        for path, sealed in _list_segments(self.log_dir):
+            name = _segment_name(path)
+            offset = checkpoints.get(name, 0)
+            if _file_size(path) > offset:
+                pending.append((name, path, sealed, offset))
+        return pending
+
+    @staticmethod
+    def _read_records(path: Path, name: str, offset: int) -> Iterator[Tuple[Optional[Dict[str, Any]], int]]:
+        """Yield (record or None if corrupt, end offset) for each complete line"""
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            # Sealed (renamed) since the directory was listed
+            f = open(path.with_name(name + SEALED_SUFFIX), 'rb')
+        with f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    return  # still being written, or torn by a crash
+                offset += len(line)
+                try:
+                    yield json.loads(line), offset
+                except ValueError:
+                    yield None, offset
+
+    def _retire_segments(self) -> int:
+        """Delete fully drained segments that no writer will append to again"""
+        checkpoints = self._checkpoints()
+        retired = []
+        for path, sealed in _list_segments(self.log_dir):
+            name = _segment_name(path)
+            offset = checkpoints.get(name, 0)
+            if sealed:
+                if offset < _file_size(path):
+                    continue
+            else:
+                pid = _segment_pid(name)
+                if pid is None or pid == os.getpid() or _pid_alive(pid):
+                    continue
+                # Abandoned by a crashed writer: retire once only a torn tail is left
+                if not self._only_torn_tail(path, offset):
+                    continue
+            try:
+                path.unlink()
+                retired.append(name)
+            except OSError:
+                continue
+
+        if retired:
+            with self.adapter.transaction() as conn:
+                conn.executemany("DELETE FROM ingest_checkpoint WHERE segment = ?",
+                                 [(name,) for name in retired])
+        return len(retired)
+
+    @staticmethod
+    def _only_torn_tail(path: Path, offset: int) -> bool:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            return b'\n' not in f.read()
+
+    def lag(self) -> Dict[str, Any]:
+        """Current drainer lag (see ingest_lag)"""
+        return ingest_lag(self.db_path, str(self.log_dir))
+
+
+def _list_segments(log_dir: Path) -> List[Tuple[Path, bool]]:
+    """(path, sealed) for every segment, oldest first"""
+    segments = []
+    for path in log_dir.glob('seg-*.jsonl'):
+        segments.append((path, not path.name.endswith(OPEN_SUFFIX)))
+    segments.sort(key=lambda item: _segment_name(item[0]))
+    return segments
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0  # renamed or retired meanwhile
+
+
+def _read_checkpoints(db_path: str) -> Dict[str, int]:
+    """segment -> drained byte offset (empty if the table does not exist yet)"""
+    try:
+        conn = get_connection_manager(db_path).connection()
+        rows = conn.execute("SELECT segment, byte_offset FROM ingest_checkpoint").fetchall()
+        return {segment: offset for segment, offset in rows}
+    except sqlite3.Error:
+        return {}
+
+
+def ingest_lag(db_path: str = DEFAULT_DB_PATH, log_dir: str = DEFAULT_LOG_DIR) -> Dict[str, Any]:
+    """
+    How far the drainer is behind the writers
+
+    Returns pending_records, pending_bytes, pending_segments, open_segments and
+    lag_seconds (age of the oldest record not yet applied, 0 when caught up).
+    """
+    log_path = Path(log_dir)
+    lag = {
+        'pending_records': 0,
+        'pending_bytes': 0,
+        'pending_segments': 0,
+        'open_segments': 0,
+        'lag_seconds': 0.0,
+    }
+    if not log_path.exists():
+        return lag
+
+    checkpoints = _read_checkpoints(db_path)
+    oldest_ts = None
+    for path, sealed in _list_segments(log_path):
+        if not sealed:
+            lag['open_segments'] += 1
+        offset = checkpoints.get(_segment_name(path), 0)
+        if _file_size(path) <= offset:
+            continue
+
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                tail = f.read()
+        except FileNotFoundError:
+            continue
+        records = tail.count(b'\n')
+        if not records:
+            continue
+
+        lag['pending_segments'] += 1
+        lag['pending_records'] += records
+        lag['pending_bytes'] += tail.rfind(b'\n') + 1
+        try:
+            ts = json.loads(tail[:tail.index(b'\n')]).get('ts')
+            if ts is not None and (oldest_ts is None or ts < oldest_ts):
+                oldest_ts = ts
+        except ValueError:
+            pass
+
+    if oldest_ts is not None:
+        lag['lag_seconds'] = round(max(0.0, time.time() - oldest_ts), 3)
+    return lag
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='AI tools ingest log')
+    parser.add_argument('action', choices=['drain', 'status'])
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='SQLite database path')
+    parser.add_argument('--log-dir', default=DEFAULT_LOG_DIR, help='Ingest log directory')
+    parser.add_argument('--once', action='store_true', help='Drain pending records and exit')
+    parser.add_argument('--batch-size', type=int, default=DRAIN_BATCH_SIZE)
+    parser.add_argument('--snapshot-dir', default=DEFAULT_SNAPSHOT_DIR,
+                        help='Publish read-only snapshots for the API here after draining')
+    parser.add_argument('--no-snapshot', action='store_true', help='Do not publish snapshots')
+    args = parser.parse_args()
+
+    if args.action == 'status':
+        lag = ingest_lag(args.db, args.log_dir)
+        print("📥 Ingest log status")
+        print(f"   Pending records: {lag['pending_records']:,}")
+        print(f"   Pending bytes: {lag['pending_bytes']:,}")
+        print(f"   Pending segments: {lag['pending_segments']} ({lag['open_segments']} open)")
+        print(f"   Lag: {lag['lag_seconds']:.1f}s")
+        return
+
+    drainer = IngestLogDrainer(args.db, args.log_dir, batch_size=args.batch_size,
+                               snapshot_dir=None if args.no_snapshot else args.snapshot_dir)
+    drainer.run(exit_when_idle=args.once)
+
+
+if __name__ == "__main__":
+    main()
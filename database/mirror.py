@@ -0,0 +1,434 @@
+"""
+Incremental local SQLite mirror of the Supabase ai_tool and ai_synergy tables
+
+The synergy builder, the community detector and the statistics pull every
+tool and edge over HTTP on each run (KeysetPaginator walks of 30k tools and
+300k edges). SupabaseMirror keeps a local copy in an ordinary SQLiteAdapter
+database instead and only fetches what changed since the last sync:
+
+- changes: rows are walked in (updated_at, id) order from a per-table
+  watermark. Supabase sets updated_at from the server clock on every write
+  (touch_updated_at trigger, database/supabase_schema_updates.sql), so
+  ``updated_at > watermark`` is exactly the set of rows written since.
+  Rows sharing one updated_at (a bulk insert is one transaction, one now())
+  are paged by id, so a page boundary never skips or repeats a tie.
+- overlap: now() is the transaction start, so a long transaction can commit
+  rows older than a watermark already stored. Each sync starts
+  ``overlap_seconds`` before the watermark; re-applied rows are idempotent.
+- deletes: ai_tool/ai_synergy deletes leave a row in mirror_tombstone,
+  walked the same way by deleted_at and applied before the changes. If
+  tombstones the mirror never saw were purged (retention), or the table does
+  not exist, the mirror reloads everything instead.
+
+Every page is applied in one local transaction together with its watermark,
+so an interrupted sync resumes where it stopped.
+
+Reads then go to the mirror: MirroredSupabaseAdapter serves load_scoring_tools,
+statistics and synergy lookups from it (syncing first when stale) and sends
+writes to Supabase.
+
+Usage:
+    mirror = SupabaseMirror(client, 'database/supabase_mirror.db')
+    mirror.sync()
+    mirror.adapter.load_scoring_tools()
+
+    python -m database.mirror sync|status|reset [--path database/supabase_mirror.db]
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from database.adapters import SQLiteAdapter, SupabaseAdapter
+
+
+DEFAULT_MIRROR_PATH = 'database/supabase_mirror.db'
+PAGE_SIZE = 1000
+OVERLAP_SECONDS = 30.0
+
+TOMBSTONE_TABLE = 'mirror_tombstone'
+SYNERGY_COLUMNS = ('id', 'tool_id_1', 'tool_id_2', 'strength', 'edge_type', 'created_at', 'updated_at')
+TOOL_JSON_COLUMNS = ('categories', 'platform', 'features', 'field_hashes')
+
+# (table, server timestamp column), in the order a sync applies them
+MIRRORED_TABLES = (
+    (TOMBSTONE_TABLE, 'deleted_at'),
+    ('ai_tool', 'updated_at'),
+    ('ai_synergy', 'updated_at'),
+)
+
+MIRROR_STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mirror_state (
+    table_name TEXT PRIMARY KEY,
+    watermark_ts TEXT,            -- newest server timestamp applied
+    watermark_id INTEGER,         -- its id (mirror_tombstone: highest id applied)
+    rows_applied INTEGER NOT NULL DEFAULT 0,
+    synced_at TEXT
+);
+"""
+
+
+def _shift_timestamp(value: str, seconds: float) -> str:
+    """value - seconds, in the same textual form the server returned"""
+    try:
+        shifted = datetime.fromisoformat(value.replace('Z', '+00:00')) - timedelta(seconds=seconds)
+    except ValueError:
+        return value
+    return shifted.isoformat(sep='T' if 'T' in value else ' ')
+
+
+class SupabaseMirror:
+    """Local SQLite copy of ai_tool/ai_synergy kept current from updated_at watermarks and tombstones"""
+
+    def __init__(self, client, mirror_path: str = DEFAULT_MIRROR_PATH,
+                 page_size: int = PAGE_SIZE, overlap_seconds: float = OVERLAP_SECONDS):
+        """
+        Args:
+            client: supabase Client (anything with .table())
+            mirror_path: Local SQLite database holding the copy
+            page_size: Rows requested per page
+            overlap_seconds: How far before each watermark a sync starts reading
+        """
+        self.client = client
+        self.mirror_path = mirror_path
+        self.page_size = page_size
+        self.overlap_seconds = overlap_seconds
+        self.requests = 0
+
+        created = not os.path.exists(mirror_path)
+        self.adapter = SQLiteAdapter(mirror_path)
+        conn = self.adapter.connections.connection()
+        conn.execute(MIRROR_STATE_SCHEMA)
+        if created:
+            # The schema seeds a new database with a sample tool (once); the mirror only holds Supabase rows
+            conn.execute("DELETE FROM ai_tool WHERE source = 'test_source' AND ext_id = 'sample_tool_1'")
+        conn.commit()
+        self._tool_columns = [row[1] for row in conn.execute("PRAGMA table_info(ai_tool)")]
+        self._has_tombstones = True
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    def _state(self) -> Dict[str, Dict[str, Any]]:
+        rows = self.adapter.connections.connection().execute("SELECT * FROM mirror_state").fetchall()
+        return {row['table_name']: dict(row) for row in rows}
+
+    def _save_state(self, conn, table: str, watermark_ts: Optional[str],
+                    watermark_id: Optional[int], rows: int) -> None:
+        conn.execute("""
+            INSERT INTO mirror_state (table_name, watermark_ts, watermark_id, rows_applied, synced_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (table_name) DO UPDATE SET
+                watermark_ts = excluded.watermark_ts,
+                watermark_id = excluded.watermark_id,
+                rows_applied = rows_applied + excluded.rows_applied,
+                synced_at = excluded.synced_at
+        """, (table, watermark_ts, watermark_id, rows, datetime.now().isoformat()))
+
+    def status(self) -> Dict[str, Any]:
+        """Watermarks, last sync times and local row counts"""
+        conn = self.adapter.connections.connection()
+        return {
+            'path': self.mirror_path,
+            'tables': self._state(),
+            'tools': conn.execute("SELECT COUNT(*) FROM ai_tool").fetchone()[0],
+            'edges': conn.execute("SELECT COUNT(*) FROM ai_synergy").fetchone()[0],
+        }
+
+    def reset(self) -> None:
+        """Forget every watermark and empty the copy (the next sync reloads everything)"""
+        with self.adapter.transaction() as conn:
+            conn.execute("DELETE FROM mirror_state")
+            conn.execute("DELETE FROM ai_tool_degree")
+            conn.execute("DELETE FROM ai_synergy")
+            conn.execute("DELETE FROM ai_tool")
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def sync(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Bring the mirror up to date
+
+        Args:
+            full: Reload everything instead of reading from the watermarks
+
+        Returns:
+            Rows applied per table, requests made and elapsed time
+        """
+        started = time.perf_counter()
+        requests_before = self.requests
+        state = self._state()
+        result: Dict[str, Any] = {'full': False}
+
+        lost = self._tombstones_lost(state.get(TOMBSTONE_TABLE))
+        if full or lost or 'ai_tool' not in state:
+            # Deletes before the newest existing tombstone are reflected by the reload itself
+            floor = self._tombstone_floor() if self._has_tombstones else None
+            self.reset()
+            with self.adapter.transaction() as conn:
+                for table, _ in MIRRORED_TABLES[1:]:
+                    self._save_state(conn, table, None, None, 0)
+                if floor is not None:
+                    self._save_state(conn, TOMBSTONE_TABLE, floor['watermark_ts'], floor['watermark_id'], 0)
+            state = self._state()
+            result['full'] = True
+
+        for table, ts_column in MIRRORED_TABLES:
+            if table == TOMBSTONE_TABLE and not self._has_tombstones:
+                continue
+            result[table] = self._pull(table, ts_column, state.get(table))
+
+        # Relations are written per row; the degree table follows the triggers
+        self.adapter.refresh_tool_degree()
+        result['requests'] = self.requests - requests_before
+        result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    def _tombstones_lost(self, tombstone_state: Optional[Dict[str, Any]]) -> bool:
+        """True if tombstones newer than the mirror's were purged, or the table is missing"""
+        try:
+            response = self.client.table(TOMBSTONE_TABLE).select('id').order('id').limit(1).execute()
+            self.requests += 1
+        except Exception as e:
+            print(f"⚠️ {TOMBSTONE_TABLE} not readable ({e}); deletes are only seen by full reloads")
+            self._has_tombstones = False
+            return True
+        self._has_tombstones = True
+
+        if not response.data or tombstone_state is None:
+            return False
+        # Tombstone ids are contiguous; a gap after the watermark means some were purged unseen
+        return response.data[0]['id'] > (tombstone_state['watermark_id'] or 0) + 1
+
+    def _tombstone_floor(self) -> Dict[str, Any]:
+        """Watermark at the newest existing tombstone (taken before a full reload)"""
+        response = self.client.table(TOMBSTONE_TABLE).select('id, deleted_at') \
+            .order('id', desc=True).limit(1).execute()
+        self.requests += 1
+        if not response.data:
+            return {'watermark_ts': None, 'watermark_id': 0}
+        return {'watermark_ts': response.data[0]['deleted_at'], 'watermark_id': response.data[0]['id']}
+
+    def _pull(self, table: str, ts_column: str, state: Optional[Dict[str, Any]]) -> int:
+        """Walk `table` from its watermark in (ts_column, id) order, applying page by page"""
+        columns = '*' if table == 'ai_tool' else (
+            ', '.join(SYNERGY_COLUMNS) if table == 'ai_synergy' else 'id, table_name, row_id, deleted_at')
+        since = state['watermark_ts'] if state else None
+        cursor_ts = _shift_timestamp(since, self.overlap_seconds) if since else None
+        cursor_id = None
+        high_id = (state or {}).get('watermark_id') or 0
+        applied = 0
+        largest = 0  # biggest page seen: the server's max-rows may be below page_size
+
+        while True:
+            # Rest of the rows sharing the last timestamp, by id (only after a full page)
+            if cursor_id is not None:
+                query = self.client.table(table).select(columns) \
+                    .eq(ts_column, cursor_ts).gt('id', cursor_id).order('id').limit(self.page_size)
+                page = query.execute().data or []
+                self.requests += 1
+                if page:
+                    largest = max(largest, len(page))
+                    high_id = self._apply(table, page, ts_column, cursor_ts, page[-1]['id'], high_id)
+                    applied += len(page)
+                    cursor_id = page[-1]['id']
+                    if len(page) == largest:
+                        continue
+
+            query = self.client.table(table).select(columns)
+            if cursor_ts is not None:
+                query = query.gt(ts_column, cursor_ts)
+            page = query.order(f"{ts_column},id").limit(self.page_size).execute().data or []
+            self.requests += 1
+            if not page:
+                return applied
+
+            largest = max(largest, len(page))
+            cursor_ts, cursor_id = page[-1][ts_column], page[-1]['id']
+            high_id = self._apply(table, page, ts_column, cursor_ts, cursor_id, high_id)
+            applied += len(page)
+            if len(page) < largest:
+                return applied  # a short page is the end of what was there when it was read
+
+    def _apply(self, table: str, page: List[Dict[str, Any]], ts_column: str,
+               watermark_ts: str, watermark_id: int, high_id: int) -> int:
+        """Write one page and its watermark in a single local transaction"""
+        with self.adapter.transaction() as conn:
+            if table == TOMBSTONE_TABLE:
+                for target in ('ai_synergy', 'ai_tool'):
+                    ids = [(row['row_id'],) for row in page if row['table_name'] == target]
+                    conn.executemany(f"DELETE FROM {target} WHERE id = ?", ids)
+                high_id = max([high_id] + [row['id'] for row in page])
+                watermark_id = high_id
+            elif table == 'ai_tool':
+                self._upsert_tools(conn, page)
+            else:
+                self._upsert_synergies(conn, page)
+            self._save_state(conn, table, watermark_ts, watermark_id, len(page))
+        return high_id
+
+    def _upsert_tools(self, conn, rows: List[Dict[str, Any]]) -> None:
+        columns = [c for c in self._tool_columns if c in rows[0]]
+        updates = ', '.join(f"{c} = excluded.{c}" for c in columns if c != 'id')
+        sql = f"""
+            INSERT INTO ai_tool ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})
+            ON CONFLICT (id) DO UPDATE SET {updates}
+        """
+        values = []
+        for row in rows:
+            for column in TOOL_JSON_COLUMNS:
+                if isinstance(row.get(column), (list, dict)):
+                    row[column] = json.dumps(row[column], sort_keys=column == 'field_hashes') \
+                        if row[column] else None
+            values.append([row.get(c) for c in columns])
+        conn.executemany(sql, values)
+
+        for row in rows:
+            try:
+                self.adapter._write_relations(conn, row['id'], self.adapter._dict_to_tool(row))
+            except (TypeError, ValueError):
+                continue  # unparseable JSON: leave the tool without normalised rows
+
+    def _upsert_synergies(self, conn, rows: List[Dict[str, Any]]) -> None:
+        # A pair deleted and re-inserted on the server comes back with a new id
+        conn.executemany("""
+            INSERT INTO ai_synergy (id, tool_id_1, tool_id_2, strength, edge_type, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                tool_id_1 = excluded.tool_id_1,
+                tool_id_2 = excluded.tool_id_2,
+                strength = excluded.strength,
+                edge_type = excluded.edge_type
+            ON CONFLICT (tool_id_1, tool_id_2) DO UPDATE SET
+                id = excluded.id,
+                strength = excluded.strength,
+                edge_type = excluded.edge_type
+        """, [
+            (row['id'], min(row['tool_id_1'], row['tool_id_2']), max(row['tool_id_1'], row['tool_id_2']),
+             row['strength'], row.get('edge_type'), row.get('created_at'))
+            for row in rows
+        ])
+
+
+class MirroredSupabaseAdapter(SupabaseAdapter):
+    """
+    SupabaseAdapter whose bulk reads come from a local SupabaseMirror
+
+    Writes still go to Supabase and mark the mirror stale; the next read syncs
+    it first, so reads see the adapter's own writes.
+    """
+
+    def __init__(self, mirror_path: str = DEFAULT_MIRROR_PATH, client=None):
+        super().__init__()
+        if client is not None:
+            self.supabase = client
+        self.mirror_path = mirror_path
+        self._mirror: Optional[SupabaseMirror] = None
+        self._stale = True
+
+    @property
+    def mirror(self) -> SupabaseMirror:
+        if self._mirror is None:
+            self._mirror = SupabaseMirror(self._client(), self.mirror_path)
+        return self._mirror
+
+    def _local(self) -> SQLiteAdapter:
+        """The mirror's adapter, synced first if anything may have changed"""
+        if self._stale:
+            result = self.mirror.sync()
+            changed = sum(v for k, v in result.items() if k in dict(MIRRORED_TABLES))
+            print(f"🪞 Mirror synced: {changed} row(s) in {result['requests']} request(s)"
+                  f"{' (full reload)' if result['full'] else ''}")
+            self._stale = False
+        return self.mirror.adapter
+
+    def mark_stale(self) -> None:
+        """Sync before the next read (e.g. after writes by another process)"""
+        self._stale = True
+
+    def load_scoring_tools(self) -> List[Dict[str, Any]]:
+        return self._local().load_scoring_tools()
+
+    def iter_tool_descriptions(self, page_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        return self._local().iter_tool_descriptions(page_size)
+
+    def load_synergies(self) -> List[Dict[str, Any]]:
+        return self._local().load_synergies()
+
+    def get_tool_synergies(self, tool_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        return self._local().get_tool_synergies(tool_id, limit)
+
+    def get_synergy_summary(self) -> Dict[str, Any]:
+        return self._local().get_synergy_summary()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        stats = self._local().get_statistics()
+        if 'error' not in stats:
+            stats['database_type'] = 'Supabase (local mirror)'
+        return stats
+
+    def validate_no_duplicates(self) -> Dict[str, Any]:
+        result = self._local().validate_no_duplicates()
+        if 'error' not in result:
+            result['database_type'] = 'Supabase (local mirror)'
+        return result
+
+    def clear_synergies(self) -> int:
+        self._stale = True
+        return super().clear_synergies()
+
+    def insert_synergies(self, edges: List[Dict[str, Any]]) -> int:
+        self._stale = True
+        return super().insert_synergies(edges)
+
+    def update_synergies(self, edges: List[Dict[str, Any]]) -> int:
+        self._stale = True
+        return super().update_synergies(edges)
+
+    def delete_synergies(self, edge_ids: List[int]) -> int:
+        self._stale = True
+        return super().delete_synergies(edge_ids)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local SQLite mirror of Supabase ai_tool/ai_synergy')
+    parser.add_argument('action', choices=['sync', 'status', 'reset'])
+    parser.add_argument('--path', default=DEFAULT_MIRROR_PATH, help='Mirror database path')
+    parser.add_argument('--full', action='store_true', help='Reload everything (sync)')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Rows per request')
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from supabase import create_client
+    load_dotenv()
+    url, key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env")
+
+    mirror = SupabaseMirror(create_client(url, key), args.path, page_size=args.page_size)
+    if args.action == 'sync':
+        result = mirror.sync(full=args.full)
+        print(f"🪞 {'Full reload' if result['full'] else 'Incremental sync'}: "
+              f"{result.get('ai_tool', 0):,} tools, {result.get('ai_synergy', 0):,} edges, "
+              f"{result.get(TOMBSTONE_TABLE, 0):,} deletes in {result['requests']} requests "
+              f"({result['elapsed_ms']:.0f} ms)")
+    elif args.action == 'reset':
+        mirror.reset()
+        print(f"🧹 Mirror at {args.path} emptied; the next sync reloads everything")
+    else:
+        status = mirror.status()
+        print(f"🪞 Mirror at {status['path']}: {status['tools']:,} tools, {status['edges']:,} edges")
+        for table, state in status['tables'].items():
+            print(f"   {table}: watermark {state['watermark_ts']} (id {state['watermark_id']}), "
+                  f"{state['rows_applied']:,} rows applied, last sync {state['synced_at']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Keyset-paginated streaming reads from Supabase/PostgREST
+
+A bare ``table(...).select(...).execute()`` is silently truncated at the
+PostgREST ``max-rows`` setting (1000 on Supabase), so full-table loads are
+both slow and wrong once a table grows past it. KeysetPaginator walks a table
+in key order instead:
+
+    SELECT cols FROM table WHERE key > :last ORDER BY key LIMIT :page_size
+
+The walk only stops on an empty page, so it stays correct even when the server
+caps pages below ``page_size``.
+
+Pages can be fetched ahead of the consumer on background threads:
+
+- ``prefetch``: pages buffered ahead per stripe (0 = fetch synchronously)
+- ``concurrency``: for integer keys, the key range is split into stripes that
+  are walked in parallel; stripes are still yielded in key order, and each one
+  buffers at most ``prefetch`` pages, so memory stays bounded.
+
+Usage:
+    paginator = KeysetPaginator(client, 'ai_tool', ['id', 'name', 'macro_domain'])
+    for row in paginator:
+        ...
+    for chunk in paginator.column_chunks():
+        chunk['name']  # list of values for one page
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_PREFETCH = 2
+
+_END_OF_STRIPE = object()
+
+
+class KeysetPaginator:
+    """Iterate over every row of a PostgREST table using keyset pagination"""
+
+    def __init__(self, client, table: str, columns: Union[str, Sequence[str]],
+                 key: str = 'id', page_size: int = DEFAULT_PAGE_SIZE,
+                 prefetch: int = DEFAULT_PREFETCH, concurrency: int = 1,
+                 query_filter: Optional[Callable[[Any], Any]] = None):
+        """
+        Args:
+            client: supabase Client (anything with .table())
+            table: Table name
+            columns: Column list, as a sequence or a comma-separated string
+            key: Unique, orderable column used as the pagination key
+            page_size: Rows requested per page
+            prefetch: Pages buffered ahead of the consumer per stripe
+            concurrency: Number of key-range stripes fetched in parallel (integer keys only)
+            query_filter: Optional callable applying extra filters to each query,
+                          e.g. ``lambda q: q.eq('source', 'futurepedia')``
+        """
+        if isinstance(columns, str):
+            columns = [c.strip() for c in columns.split(',') if c.strip()]
+        self.columns = list(columns)
+        if '*' not in self.columns and key not in self.columns:
+            self.columns.append(key)
+
+        self.client = client
+        self.table = table
+        self.key = key
+        self.page_size = max(1, page_size)
+        self.prefetch = max(0, prefetch)
+        self.concurrency = max(1, concurrency)
+        self.query_filter = query_filter
+        # Requests sent; incremented by the stripe workers, hence the lock
+        self.pages_fetched = 0
+        self._count_lock = threading.Lock()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for page in self.pages():
+            yield from page
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """Yield rows one at a time in key order"""
+        return iter(self)
+
+    def column_chunks(self) -> Iterator[Dict[str, List[Any]]]:
+        """Yield one {column: [values]} dict per non-empty page"""
+        for page in self.pages():
+            columns = self.columns if '*' not in self.columns else list(page[0].keys())
+            yield {column: [row.get(column) for row in page] for column in columns}
+
+    def fetch_all(self) -> List[Dict[str, Any]]:
+        """Materialise every row in a list"""
+        rows: List[Dict[str, Any]] = []
+        for page in self.pages():
+            rows.extend(page)
+        return rows
+
+    def pages(self) -> Iterator[List[Dict[str, Any]]]:
+        """Yield non-empty pages of rows in key order"""
+        stripes = self._stripes() if self.concurrency > 1 else [(None, None)]
+
+        if self.prefetch == 0:
+            for lower, upper in stripes:
+                yield from self._walk(lower, upper)
+            return
+
+        stop = threading.Event()
+        buffers = []
+        for lower, upper in stripes:
+            buffer: queue.Queue = queue.Queue(maxsize=self.prefetch)
+            worker = threading.Thread(
+                target=self._produce, args=(lower, upper, buffer, stop), daemon=True
+            )
+            worker.start()
+            buffers.append(buffer)
+
+        try:
+            for buffer in buffers:
+                while True:
+                    item = buffer.get()
+                    if item is _END_OF_STRIPE:
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+                    yield item
+        finally:
+            # Unblocks producers if the consumer stops early
+            stop.set()
+
+    def _produce(self, lower: Any, upper: Any, buffer: queue.Queue, stop: threading.Event) -> None:
+        """Background worker: walk one stripe and hand pages to the consumer"""
+        try:
+            for page in self._walk(lower, upper):
+                if not self._put(buffer, page, stop):
+                    return
+            self._put(buffer, _END_OF_STRIPE, stop)
+        except Exception as e:
+            self._put(buffer, e, stop)
+
+    @staticmethod
+    def _put(buffer: queue.Queue, item: Any, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _walk(self, lower: Any, upper: Any) -> Iterator[List[Dict[str, Any]]]:
+        """Keyset walk over (lower, upper]; None means unbounded"""
+        last_key = lower
+        while True:
+            query = self.client.table(self.table).select(', '.join(self.columns))
+            if self.query_filter:
+                query = self.query_filter(query)
+            if last_key is not None:
+                query = query.gt(self.key, last_key)
+            if upper is not None:
+                query = query.lte(self.key, upper)
+            response = query.order(self.key).limit(self.page_size).execute()
+            self._count_request()
+
+            page = response.data or []
+            if not page:
+                return
+            last_key = page[-1][self.key]
+            yield page
+
+    def _count_request(self) -> None:
+        with self._count_lock:
+            self.pages_fetched += 1
+
+    def _stripes(self) -> List[Tuple[Any, Any]]:
+        """Split an integer key range into `concurrency` contiguous stripes"""
+        first = self._boundary_key(desc=False)
+        last = self._boundary_key(desc=True)
+        if first is None or not isinstance(first, int) or not isinstance(last, int):
+            return [(None, None)]
+
+        span = last - first + 1
+        width = max(1, -(-span // self.concurrency))
+        stripes = []
+        lower = first - 1
+        while lower < last:
+            upper = min(last, lower + width)
+            stripes.append((lower, upper))
+            lower = upper
+        return stripes
+
+    def _boundary_key(self, desc: bool) -> Any:
+        query = self.client.table(self.table).select(self.key)
+        if self.query_filter:
+            query = self.query_filter(query)
+        response = query.order(self.key, desc=desc).limit(1).execute()
+        self._count_request()
+        return response.data[0][self.key] if response.data else None
+
+
+def iter_table(client, table: str, columns: Union[str, Sequence[str]], **kwargs) -> Iterator[Dict[str, Any]]:
+    """Convenience wrapper: stream every row of `table` in key order"""
+    return iter(KeysetPaginator(client, table, columns, **kwargs))
+
+
+def fetch_table(client, table: str, columns: Union[str, Sequence[str]], **kwargs) -> List[Dict[str, Any]]:
+    """Convenience wrapper: load every row of `table` (not capped by max-rows)"""
+    return KeysetPaginator(client, table, columns, **kwargs).fetch_all()
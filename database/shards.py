@@ -0,0 +1,507 @@
+"""
+Per-source SQLite shards with an ATTACH-based unified view
+
+Every source writes into database/ai_tools.db, so parallel scrapers (or one
+drainer per source) serialise on that file's single write lock. The sharded
+layout gives each source its own database file, and so its own writer:
+
+    database/shards/
+        shards.json            registry: shard key -> number, file
+        catalog.db             ai_synergy, ai_tool_degree (edges are cross-source)
+        futurepedia.db         ai_tool and its normalised tables, one per source
+        toolify.db
+        logs/<key>/            per-source ingest log (one drainer each)
+
+Tool ids stay globally unique without any mapping: shard N allocates ai_tool
+ids from N * SHARD_ID_SPAN upwards (AUTOINCREMENT sequence seeded on creation),
+so the owning shard of any id is ``id // SHARD_ID_SPAN`` and the ids stored in
+catalog.db's ai_synergy point straight at the shard rows.
+
+Readers (merger, synergy builder, API) use a connection on catalog.db with
+every shard ATTACHed and TEMP views named like the tables (ai_tool, category,
+tool_category, ...) that UNION ALL the shards. Temp objects shadow main ones,
+so the existing queries run unchanged; SQLite pushes WHERE terms into each arm
+of the view, so lookups by id, url or name still use each shard's indexes.
+Category ids are offset by the shard base as well, so joins on category_id
+stay within one shard. Full-text search runs per shard (see shard_schemas()).
+
+ShardedSQLiteAdapter is a drop-in SQLiteAdapter over that view: reads see all
+sources, tool writes go to the owning shard, edge writes go to the catalog.
+
+Shard drainers (ShardWriterAdapter) look duplicates up on the unified view,
+not only in their own shard: a record of a tool another shard already holds
+is linked to it (tool_source_record in the owning shard) instead of being
+inserted a second time. Only the same new tool reaching two drainers in the
+same moment can still land in two shards; validate_no_duplicates on a
+ShardedSQLiteAdapter reports such pairs.
+
+Usage:
+    with ShardedIngestLog('database/shards') as log:
+        log.append_many(tools)                    # grouped by source
+
+    python -m database.shards drain --source futurepedia   # one process per source
+    python -m database.shards drain                        # every source, once
+    python -m database.shards status
+
+    adapter = ShardedSQLiteAdapter('database/shards')       # merger / synergy builder
+    AI_TOOLS_SHARD_DIR=database/shards python api_server_sqlite.py
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from database.adapters import SQLiteAdapter
+from database.connection import SQLiteConnectionManager
+from database.ingest_log import IngestLogDrainer, IngestLogWriter
+from scrapers.common import AITool
+
+
+DEFAULT_SHARD_DIR = 'database/shards'
+
+REGISTRY_FILE = 'shards.json'
+LOCK_FILE = '.shards.lock'
+CATALOG_FILE = 'catalog.db'
+LOG_DIR = 'logs'
+SCHEMA_PREFIX = 'shard_'
+
+# Ids of shard N start at N * 2**40: about a trillion tools per shard, and
+# every id stays below 2**53 (exact in JSON/JavaScript) for up to 8191 shards
+SHARD_ID_SPAN = 1 << 40
+
+# Pipelines tag sources with run suffixes ('futurepedia_autonomous',
+# 'futurepedia_fast_batch_3'); those still belong to the site's shard
+KNOWN_SOURCES = (
+    'aitools_directory', 'futurepedia', 'phygital_library',
+    'theresanaiforthat', 'toolify', 'topai_tools',
+)
+
+# Unified views: {schema} is the attached shard, {base} its id offset
+UNIFIED_VIEWS = {
+    'ai_tool': "SELECT * FROM {schema}.ai_tool",
+    'category': "SELECT {base} + id AS id, name FROM {schema}.category",
+    'category_keyword': "SELECT {base} + category_id AS category_id, keyword FROM {schema}.category_keyword",
+    'tool_category': "SELECT tool_id, {base} + category_id AS category_id, position FROM {schema}.tool_category",
+    'tool_platform': "SELECT tool_id, platform FROM {schema}.tool_platform",
+    'tool_feature': "SELECT tool_id, feature, value FROM {schema}.tool_feature",
+    'tool_identity': "SELECT * FROM {schema}.tool_identity",
+    'tool_source_record': "SELECT * FROM {schema}.tool_source_record",
+    'tool_metric_point': "SELECT * FROM {schema}.tool_metric_point",
+    'tool_trend': "SELECT * FROM {schema}.tool_trend",
+}
+
+
+def shard_key(source: Optional[str]) -> str:
+    """Shard a source belongs to: the scraper site, or the sanitised source name"""
+    name = re.sub(r'[^a-z0-9_]+', '_', (source or '').lower()).strip('_') or 'unknown'
+    for known in KNOWN_SOURCES:
+        if name.startswith(known):
+            return known
+    return name
+
+
+class ShardSet:
+    """Registry of the shard files under one directory, with an adapter per shard"""
+
+    def __init__(self, shard_dir: str = DEFAULT_SHARD_DIR):
+        self.shard_dir = shard_dir
+        self.directory = Path(shard_dir)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._adapters: Dict[str, SQLiteAdapter] = {}
+        self._registry: Dict[str, Dict[str, Any]] = {}
+        self._registry_mtime: Optional[int] = None
+
+    @property
+    def catalog_path(self) -> str:
+        return str(self.directory / CATALOG_FILE)
+
+    def version(self) -> Optional[int]:
+        """Changes whenever a shard is registered (registry file mtime)"""
+        try:
+            return os.stat(self.directory / REGISTRY_FILE).st_mtime_ns
+        except OSError:
+            return None
+
+    def shards(self) -> Dict[str, Dict[str, Any]]:
+        """Registered shards: key -> {'number', 'file', 'created_at'} (re-read when it changes)"""
+        mtime = self.version()
+        if mtime != self._registry_mtime:
+            try:
+                with open(self.directory / REGISTRY_FILE, 'r') as f:
+                    registry = json.load(f).get('shards', {})
+            except (OSError, ValueError):
+                registry = {}
+            with self._lock:
+                self._registry, self._registry_mtime = registry, mtime
+        return self._registry
+
+    def path(self, key: str) -> str:
+        return str(self.directory / f"{key}.db")
+
+    def log_dir(self, source: str) -> str:
+        """Ingest log directory of a source's shard"""
+        return str(self.directory / LOG_DIR / shard_key(source))
+
+    def adapter(self, source: str) -> SQLiteAdapter:
+        """Adapter on the source's shard, creating and registering the shard on first use"""
+        key = shard_key(source)
+        adapter = self._adapters.get(key)
+        if adapter is None:
+            info = self.shards().get(key)
+            if info is None:
+                adapter = self._register(key)
+            else:
+                adapter = SQLiteAdapter(self.path(key))
+                self._prepare(adapter, info['number'])
+            with self._lock:
+                adapter = self._adapters.setdefault(key, adapter)
+        return adapter
+
+    def adapter_for_id(self, tool_id: int) -> SQLiteAdapter:
+        """Adapter on the shard that owns a tool id"""
+        number = int(tool_id) // SHARD_ID_SPAN
+        for key, info in self.shards().items():
+            if info['number'] == number:
+                return self.adapter(key)
+        raise KeyError(f"No shard owns tool id {tool_id}")
+
+    def _register(self, key: str) -> SQLiteAdapter:
+        """Create a shard and add it to the registry (one registrant at a time, numbers never reused)"""
+        lock_fd = os.open(str(self.directory / LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+
+            self._registry_mtime = None  # re-read under the lock
+            registry = dict(self.shards())
+            # Create the file (schema, id range) before anyone can attach it
+            adapter = SQLiteAdapter(self.path(key))
+            if key not in registry:
+                number = max([info['number'] for info in registry.values()] + [0]) + 1
+                registry[key] = {
+                    'number': number,
+                    'file': Path(self.path(key)).name,
+                    'created_at': datetime.now().isoformat()
+                }
+                # Ids seeded before the shard becomes visible in the registry
+                self._prepare(adapter, number)
+
+                tmp_path = self.directory / f".{REGISTRY_FILE}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump({'shards': registry}, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.directory / REGISTRY_FILE)
+                print(f"🧩 Registered shard {key} (#{number}) at {self.path(key)}")
+            else:
+                self._prepare(adapter, registry[key]['number'])
+            return adapter
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            os.close(lock_fd)
+
+    @staticmethod
+    def _prepare(adapter: SQLiteAdapter, number: int) -> None:
+        """
+        Start the shard's ai_tool ids at number * SHARD_ID_SPAN (once)
+        
+        The schema seeds a new database with a sample tool at id 1; a new
+        shard drops it here, since every shard would repeat it (and its id)
+        in the unified view. The schema never seeds it again.
+        """
+        base = number * SHARD_ID_SPAN
+        with adapter.transaction() as conn:
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'ai_tool'").fetchone()
+            if row is not None and row[0] >= base:
+                return
+            conn.execute("DELETE FROM ai_tool WHERE source = 'test_source' AND ext_id = 'sample_tool_1'")
+            if row is None:
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('ai_tool', ?)", (base,))
+            else:
+                conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'ai_tool'", (base,))
+
+    def drainer(self, source: str, snapshot_dir: Optional[str] = None) -> IngestLogDrainer:
+        """Single writer of one shard, fed by that source's ingest log"""
+        self.adapter(source)  # registered and id range seeded
+        return IngestLogDrainer(log_dir=self.log_dir(source), adapter=ShardWriterAdapter(self, source),
+                                snapshot_dir=snapshot_dir)
+
+    def logged_sources(self) -> List[str]:
+        """Shard keys with an ingest log directory"""
+        log_root = self.directory / LOG_DIR
+        if not log_root.is_dir():
+            return []
+        return sorted(path.name for path in log_root.iterdir() if path.is_dir())
+
+
+def attach_shards(conn: sqlite3.Connection, shards: ShardSet) -> List[str]:
+    """
+    ATTACH every registered shard to conn and (re)create the unified TEMP views
+
+    Idempotent; must run outside a transaction. Returns the attached schema names.
+    """
+    registry = shards.shards()
+    limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    if len(registry) > limit:
+        raise ValueError(f"{len(registry)} shards exceed SQLite's limit of {limit} attached databases")
+
+    attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+    schemas = []
+    for key, info in sorted(registry.items(), key=lambda item: item[1]['number']):
+        schema = f"{SCHEMA_PREFIX}{info['number']}"
+        if schema not in attached:
+            conn.execute(f"ATTACH DATABASE ? AS {schema}", (shards.path(key),))
+        schemas.append(schema)
+
+    for view, select in UNIFIED_VIEWS.items():
+        conn.execute(f"DROP VIEW IF EXISTS temp.{view}")
+        if not schemas:
+            continue  # nothing registered yet: the catalog's own (empty) tables answer
+        arms = [
+            select.format(schema=schema, base=int(schema[len(SCHEMA_PREFIX):]) * SHARD_ID_SPAN)
+            for schema in schemas
+        ]
+        conn.execute(f"CREATE TEMP VIEW {view} AS {' UNION ALL '.join(arms)}")
+    return schemas
+
+
+def shard_schemas(conn: sqlite3.Connection) -> List[str]:
+    """Schemas holding ai_tool/ai_tool_fts on this connection: the attached shards, or ['main']"""
+    schemas = [row[1] for row in conn.execute("PRAGMA database_list") if row[1].startswith(SCHEMA_PREFIX)]
+    return schemas or ['main']
+
+
+class UnifiedConnectionManager(SQLiteConnectionManager):
+    """Connections on catalog.db with the shards attached (re-attached when a shard is added)"""
+
+    def __init__(self, shards: ShardSet, **kwargs):
+        super().__init__(shards.catalog_path, **kwargs)
+        self.shards = shards
+        self._attached: Dict[int, Optional[int]] = {}
+
+    def connection(self) -> sqlite3.Connection:
+        conn = super().connection()
+        version = self.shards.version()
+        if self._attached.get(id(conn), -1) != version and not conn.in_transaction:
+            attach_shards(conn, self.shards)
+            self._attached[id(conn)] = version
+        return conn
+
+    def close(self) -> None:
+        super().close()
+        self._attached.clear()
+
+
+_unified: Dict[str, UnifiedConnectionManager] = {}
+_unified_lock = threading.Lock()
+
+
+def get_unified_manager(shard_dir: str = DEFAULT_SHARD_DIR) -> UnifiedConnectionManager:
+    """Shared unified-view connection manager per shard directory"""
+    key = os.path.abspath(shard_dir)
+    with _unified_lock:
+        manager = _unified.get(key)
+        if manager is None:
+            manager = UnifiedConnectionManager(ShardSet(shard_dir))
+            _unified[key] = manager
+        return manager
+
+
+class ShardedSQLiteAdapter(SQLiteAdapter):
+    """
+    SQLiteAdapter over every shard
+
+    Reads go through the unified views; inserts go to the shard of tool.source,
+    updates to the shard owning the id; edges and degree aggregates live in
+    catalog.db. transaction() covers catalog writes only: shard writes commit
+    on their own connections.
+    """
+
+    def __init__(self, shard_dir: str = DEFAULT_SHARD_DIR):
+        manager = get_unified_manager(shard_dir)
+        self.shards = manager.shards
+        # catalog.db's schema is applied on a plain connection (the views would shadow its INSERTs)
+        super().__init__(self.shards.catalog_path)
+        self.connections = manager
+
+    def sync_derived_tables(self, conn: Optional[sqlite3.Connection] = None) -> None:
+        """Shards keep their own derived tables; the catalog only has ai_tool_degree"""
+        self._sync_tool_degree(conn or self.connections.connection())
+
+    def insert_tool(self, tool: AITool, content_hash: str,
+                    field_hashes: Optional[Dict[str, str]] = None) -> bool:
+        return self.shards.adapter(tool.source).insert_tool(tool, content_hash, field_hashes)
+
+    def update_tool(self, tool_id: int, tool: AITool, content_hash: str,
+                    field_hashes: Optional[Dict[str, str]] = None) -> bool:
+        return self.shards.adapter_for_id(tool_id).update_tool(tool_id, tool, content_hash, field_hashes)
+
+    def update_tool_fields(self, tool_id: int, tool: AITool, fields: List[str],
+                           content_hash: str, field_hashes: Dict[str, str]) -> bool:
+        return self.shards.adapter_for_id(tool_id).update_tool_fields(
+            tool_id, tool, fields, content_hash, field_hashes
+        )
+
+    def touch_last_scraped(self, tool_ids: List[int], scraped_at: Optional[datetime] = None) -> int:
+        """One UPDATE per owning shard"""
+        by_shard: Dict[int, List[int]] = defaultdict(list)
+        for tool_id in tool_ids:
+            by_shard[int(tool_id) // SHARD_ID_SPAN].append(tool_id)
+        return sum(
+            self.shards.adapter_for_id(ids[0]).touch_last_scraped(ids, scraped_at)
+            for ids in by_shard.values()
+        )
+
+    def record_sources(self, records: List[Tuple[int, AITool]]) -> int:
+        """Source records live in the shard owning the tool, whatever their source"""
+        by_shard: Dict[int, List[Tuple[int, AITool]]] = defaultdict(list)
+        for tool_id, tool in records:
+            by_shard[int(tool_id) // SHARD_ID_SPAN].append((tool_id, tool))
+        return sum(
+            self.shards.adapter_for_id(group[0][0]).record_sources(group)
+            for group in by_shard.values()
+        )
+
+    def cleanup_duplicates(self) -> Dict[str, Any]:
+        """Duplicates by (ext_id, source) never span shards: clean each one"""
+        removed, elapsed_ms = 0, 0.0
+        for key in self.shards.shards():
+            result = self.shards.adapter(key).cleanup_duplicates()
+            removed += result.get('removed', 0)
+            elapsed_ms += result.get('elapsed_ms', 0.0)
+        return {'removed': removed, 'elapsed_ms': round(elapsed_ms, 2), 'database_type': 'SQLite (sharded)'}
+
+    def refresh_trends(self) -> Dict[str, Any]:
+        """Popularity history and trend scores live with each shard's tools"""
+        totals: Dict[str, Any] = {'tools_scored': 0, 'history_rows_merged': 0}
+        for key in self.shards.shards():
+            result = self.shards.adapter(key).refresh_trends()
+            totals['tools_scored'] += result.get('tools_scored', 0)
+            totals['history_rows_merged'] += result.get('history_rows_merged', 0)
+        return totals
+
+    def get_statistics(self) -> Dict[str, Any]:
+        stats = super().get_statistics()
+        if 'error' not in stats:
+            stats['database_type'] = 'SQLite (sharded)'
+            stats['shards'] = {key: info['file'] for key, info in self.shards.shards().items()}
+        return stats
+
+
+class ShardWriterAdapter(SQLiteAdapter):
+    """
+    SQLiteAdapter on one shard whose upserts resolve duplicates across every shard
+
+    The lookup is a read on the unified view. A match owned by another shard
+    only gets this source's record (record_sources in the owning shard); its
+    row stays with the shard's own writer. Everything else is a plain upsert
+    into this shard, inside the drainer's transaction.
+    """
+
+    def __init__(self, shards: ShardSet, source: str):
+        key = shard_key(source)
+        super().__init__(shards.path(key))
+        self.number = shards.shards()[key]['number']
+        self.unified = ShardedSQLiteAdapter(shards.shard_dir)
+
+    def upsert_ai_tool(self, tool) -> bool:
+        existing = self.unified.find_duplicate_tool(tool)
+        if existing and int(existing['id']) // SHARD_ID_SPAN != self.number:
+            return self.unified.record_sources([(existing['id'], tool)]) > 0
+        return super().upsert_ai_tool(tool)
+
+
+class ShardedIngestLog:
+    """IngestLogWriter per source shard: append_many() routes each tool to its source's log"""
+
+    def __init__(self, shard_dir: str = DEFAULT_SHARD_DIR, **writer_options):
+        self.shards = ShardSet(shard_dir)
+        self.writer_options = writer_options
+        self._writers: Dict[str, IngestLogWriter] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def writer(self, source: str) -> IngestLogWriter:
+        key = shard_key(source)
+        if key not in self._writers:
+            self._writers[key] = IngestLogWriter(self.shards.log_dir(source), **self.writer_options)
+        return self._writers[key]
+
+    def append_many(self, tools: List[AITool]) -> int:
+        by_shard: Dict[str, List[AITool]] = defaultdict(list)
+        for tool in tools:
+            by_shard[shard_key(tool.source)].append(tool)
+        return sum(self.writer(key).append_many(group) for key, group in by_shard.items())
+
+    def close(self) -> None:
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Per-source SQLite shards')
+    parser.add_argument('action', choices=['drain', 'status'])
+    parser.add_argument('--shard-dir', default=DEFAULT_SHARD_DIR, help='Shard directory')
+    parser.add_argument('--source', help='Drain only this source (run one process per source)')
+    parser.add_argument('--follow', action='store_true', help='Keep draining (with --source)')
+    args = parser.parse_args()
+
+    shards = ShardSet(args.shard_dir)
+
+    if args.action == 'drain':
+        if args.source:
+            drainer = shards.drainer(args.source)
+            if args.follow:
+                drainer.run()
+                return
+            sources = [args.source]
+        else:
+            sources = shards.logged_sources()
+        for source in sources:
+            result = shards.drainer(source).drain_if_available()
+            if result is None:
+                print(f"⏭️ {shard_key(source)}: drainer running elsewhere")
+            else:
+                print(f"✅ {shard_key(source)}: applied {result['applied']} records "
+                      f"({result['failed']} failed) in {result['elapsed_ms']:.0f} ms")
+        return
+
+    registry = shards.shards()
+    if not registry:
+        print(f"⚠️ No shards registered in {args.shard_dir}")
+        return
+    print(f"🧩 {len(registry)} shard(s) in {args.shard_dir}")
+    for key, info in sorted(registry.items(), key=lambda item: item[1]['number']):
+        path = shards.path(key)
+        conn = sqlite3.connect(path)
+        try:
+            tools = conn.execute("SELECT COUNT(*) FROM ai_tool").fetchone()[0]
+        finally:
+            conn.close()
+        print(f"   #{info['number']:<3} {key:<20} {tools:>8,} tools  "
+              f"{os.path.getsize(path) / 1024 / 1024:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+Versioned read-only snapshots of the SQLite database
+
+The API server used to read database/ai_tools.db while the drainer, the merger
+and the synergy builder wrote to it, so a long write transaction stalled API
+reads. Instead, after each pipeline stage the writer publishes a snapshot:
+
+1. the SQLite online backup API copies the live database into a new file
+   (in WAL mode the copy reads a consistent view without blocking the writer)
+2. the copy is switched to rollback-journal mode, fsync'ed and renamed to
+   ``snap-<version>.db``; it is never written again
+3. ``CURRENT.json`` (version, file, stage, row counts) is replaced atomically
+   with os.replace(), so readers see either the old or the new snapshot
+
+SnapshotReader opens snapshots with ``mode=ro&immutable=1`` (no locking, no
+WAL or journal lookups) and memory-maps them. A thread keeps its connection
+until release(), so every query of one request sees the same snapshot; the
+next request picks up the newest version. Old snapshots are pruned, keeping
+the newest ``keep``; connections still open on a pruned file keep working.
+
+Not every writer publishes (the merger, cleanups, trend compaction, columnar
+imports, ad-hoc scripts), so the manifest records the live file's mtime
+(database plus -wal, taken after a TRUNCATE checkpoint) and is_stale() tells
+readers when the live database has been written since: they should read it
+instead of a snapshot that no longer matches it.
+
+Usage:
+    publish_snapshot('database/ai_tools.db', stage='ingest')
+
+    reader = SnapshotReader('database/snapshots')
+    conn = reader.connection()      # None until a snapshot is published
+    ...
+    reader.release()
+
+    python -m database.snapshot publish|status|prune
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.request import pathname2url
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from database.connection import CACHED_STATEMENTS, MAX_IDLE_CONNECTIONS, MMAP_SIZE
+
+
+DEFAULT_SNAPSHOT_DIR = 'database/snapshots'
+DEFAULT_DB_PATH = 'database/ai_tools.db'
+
+MANIFEST_FILE = 'CURRENT.json'
+LOCK_FILE = '.publish.lock'
+SNAPSHOT_PREFIX = 'snap-'
+SNAPSHOT_SUFFIX = '.db'
+KEEP_SNAPSHOTS = 3
+CHECK_INTERVAL = 1.0
+
+
+def _fsync_path(path: Path) -> None:
+    """fsync a file or a directory entry (no-op where unsupported)"""
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _snapshot_name(version: int) -> str:
+    return f"{SNAPSHOT_PREFIX}{version:06d}{SNAPSHOT_SUFFIX}"
+
+
+def _list_snapshots(snapshot_dir: Path) -> List[Tuple[int, Path]]:
+    """(version, path) of every published snapshot file, oldest first"""
+    snapshots = []
+    for path in snapshot_dir.glob(f"{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}"):
+        try:
+            snapshots.append((int(path.name[len(SNAPSHOT_PREFIX):-len(SNAPSHOT_SUFFIX)]), path))
+        except ValueError:
+            continue
+    return sorted(snapshots)
+
+
+def read_manifest(snapshot_dir: str = DEFAULT_SNAPSHOT_DIR) -> Optional[Dict[str, Any]]:
+    """The current snapshot's manifest, or None if nothing was published yet"""
+    try:
+        with open(Path(snapshot_dir) / MANIFEST_FILE, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    manifest['path'] = str(Path(snapshot_dir) / manifest['file'])
+    return manifest
+
+
+def live_mtime_ns(db_path: str) -> int:
+    """Last write to the live database: newest mtime of the file and its WAL"""
+    mtimes = []
+    for path in (db_path, f"{db_path}-wal"):
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            pass
+    return max(mtimes, default=0)
+
+
+def is_stale(manifest: Dict[str, Any]) -> bool:
+    """True when the snapshot's source was written after it was taken"""
+    taken = manifest.get('source_mtime_ns')
+    if taken is None:
+        # Manifests published before source_mtime_ns was recorded
+        taken = int(datetime.fromisoformat(manifest['created_at']).timestamp() * 1e9)
+    return live_mtime_ns(manifest['source']) > taken
+
+
+def publish_snapshot(db_path: str = DEFAULT_DB_PATH, snapshot_dir: str = DEFAULT_SNAPSHOT_DIR,
+                     stage: str = 'manual', keep: int = KEEP_SNAPSHOTS) -> Dict[str, Any]:
+    """
+    Copy db_path into a new immutable snapshot and make it the current one
+
+    Args:
+        db_path: Live SQLite database
+        snapshot_dir: Where snapshots and CURRENT.json live
+        stage: Pipeline stage that triggered the snapshot (recorded in the manifest)
+        keep: Snapshots kept after publishing (the current one included)
+
+    Returns:
+        The new manifest
+    """
+    directory = Path(snapshot_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+
+    # One publisher at a time, so versions are never reused
+    lock_fd = os.open(str(directory / LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+
+        current = read_manifest(snapshot_dir)
+        existing = _list_snapshots(directory)
+        version = max([current['version'] if current else 0] + [v for v, _ in existing]) + 1
+        name = _snapshot_name(version)
+        tmp_path = directory / f".{name}.tmp"
+
+        source = sqlite3.connect(db_path, timeout=30.0)
+        target = sqlite3.connect(str(tmp_path))
+        try:
+            # Empty the WAL first: a later checkpoint of frames already in the
+            # copy would otherwise move the mtime and make it look stale
+            try:
+                source.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.OperationalError:
+                pass
+            # Before the copy: a write during it makes the snapshot stale, not missed
+            source_mtime_ns = live_mtime_ns(db_path)
+            source.backup(target)
+            # The copy is read with immutable=1: no WAL, nothing left to recover
+            target.execute("PRAGMA journal_mode=DELETE")
+            tools = target.execute("SELECT COUNT(*) FROM ai_tool").fetchone()[0]
+            try:
+                edges = target.execute("SELECT COUNT(*) FROM ai_synergy").fetchone()[0]
+            except sqlite3.OperationalError:
+                edges = 0
+            target.commit()
+        finally:
+            target.close()
+            source.close()
+
+        _fsync_path(tmp_path)
+        os.replace(tmp_path, directory / name)
+
+        manifest = {
+            'version': version,
+            'file': name,
+            'stage': stage,
+            'source': os.path.abspath(db_path),
+            'source_mtime_ns': source_mtime_ns,
+            'created_at': datetime.now().isoformat(),
+            'bytes': (directory / name).stat().st_size,
+            'tools': tools,
+            'edges': edges,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+        manifest_tmp = directory / f".{MANIFEST_FILE}.tmp"
+        with open(manifest_tmp, 'w') as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(manifest_tmp, directory / MANIFEST_FILE)
+        _fsync_path(directory)
+
+        prune_snapshots(snapshot_dir, keep)
+    finally:
+        if fcntl is not None:
+            fcntl.flock(lock_fd, fcntl.LOCK_UN)
+        os.close(lock_fd)
+
+    manifest['path'] = str(directory / name)
+    return manifest
+
+
+def prune_snapshots(snapshot_dir: str = DEFAULT_SNAPSHOT_DIR, keep: int = KEEP_SNAPSHOTS) -> int:
+    """Delete all but the newest `keep` snapshots (never the current one); returns files removed"""
+    directory = Path(snapshot_dir)
+    current = read_manifest(snapshot_dir)
+    snapshots = _list_snapshots(directory)
+    removed = 0
+    for version, path in snapshots[:max(0, len(snapshots) - max(1, keep))]:
+        if current and version == current['version']:
+            continue
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+class SnapshotReader:
+    """Per-thread read-only connections to the newest published snapshot"""
+
+    def __init__(self, snapshot_dir: str = DEFAULT_SNAPSHOT_DIR,
+                 check_interval: float = CHECK_INTERVAL, mmap_size: int = MMAP_SIZE,
+                 max_idle: int = MAX_IDLE_CONNECTIONS):
+        """
+        Args:
+            snapshot_dir: Directory publish_snapshot() writes to
+            check_interval: Seconds between CURRENT.json checks
+            mmap_size: Bytes of each snapshot to memory-map
+            max_idle: Released connections kept for reuse by other threads
+        """
+        self.snapshot_dir = snapshot_dir
+        self.check_interval = check_interval
+        self.mmap_size = mmap_size
+        self.max_idle = max_idle
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._current: Optional[Dict[str, Any]] = None
+        self._checked_at = float('-inf')
+        self._idle: List[Tuple[int, sqlite3.Connection]] = []
+
+    def current(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """Manifest of the newest snapshot (re-read at most every check_interval)"""
+        now = time.monotonic()
+        if force or now - self._checked_at >= self.check_interval:
+            manifest = read_manifest(self.snapshot_dir)
+            with self._lock:
+                self._checked_at = now
+                if manifest and (self._current is None or manifest['version'] > self._current['version']):
+                    self._current = manifest
+                    stale = [conn for version, conn in self._idle if version != manifest['version']]
+                    self._idle = [(v, c) for v, c in self._idle if v == manifest['version']]
+                else:
+                    stale = []
+            for conn in stale:
+                conn.close()
+        return self._current
+
+    @property
+    def version(self) -> Optional[int]:
+        """Version of the newest snapshot, or None"""
+        current = self.current()
+        return current['version'] if current else None
+
+    def connection(self) -> Optional[sqlite3.Connection]:
+        """
+        This thread's snapshot connection, or None if no snapshot exists
+
+        The connection stays on the same snapshot until release(), even if a
+        newer one is published meanwhile.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+
+        manifest = self.current()
+        if manifest is None:
+            return None
+
+        with self._lock:
+            for i, (version, idle) in enumerate(self._idle):
+                if version == manifest['version']:
+                    conn = self._idle.pop(i)[1]
+                    break
+
+        if conn is None:
+            try:
+                conn = self._open(manifest['path'])
+            except sqlite3.OperationalError:
+                # Pruned between the manifest read and the open: take the newest
+                manifest = self.current(force=True)
+                conn = self._open(manifest['path'])
+
+        self._local.conn = conn
+        self._local.version = manifest['version']
+        return conn
+
+    def _open(self, path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"file:{pathname2url(os.path.abspath(path))}?mode=ro&immutable=1",
+            uri=True,
+            cached_statements=CACHED_STATEMENTS,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def release(self) -> None:
+        """Unpin this thread's connection (e.g. after a request); kept if still current"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        version = self._local.version
+        self._local.conn = None
+
+        with self._lock:
+            current = self._current['version'] if self._current else None
+            if version == current and len(self._idle) < self.max_idle:
+                self._idle.append((version, conn))
+                return
+        conn.close()
+
+    def close(self) -> None:
+        """Close idle connections (pinned ones are closed on release)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _, conn in idle:
+            conn.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Read-only SQLite snapshots')
+    parser.add_argument('action', choices=['publish', 'status', 'prune'])
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='SQLite database path')
+    parser.add_argument('--snapshot-dir', default=DEFAULT_SNAPSHOT_DIR, help='Snapshot directory')
+    parser.add_argument('--stage', default='manual', help='Stage recorded in the manifest')
+    parser.add_argument('--keep', type=int, default=KEEP_SNAPSHOTS, help='Snapshots to keep')
+    args = parser.parse_args()
+
+    if args.action == 'publish':
+        manifest = publish_snapshot(args.db, args.snapshot_dir, args.stage, args.keep)
+        print(f"📸 Published snapshot v{manifest['version']} ({manifest['tools']} tools, "
+              f"{manifest['edges']} edges, {manifest['bytes'] / 1024 / 1024:.1f} MB) "
+              f"in {manifest['elapsed_ms']:.0f} ms")
+    elif args.action == 'prune':
+        removed = prune_snapshots(args.snapshot_dir, args.keep)
+        print(f"🧹 Removed {removed} old snapshot(s)")
+    else:
+        manifest = read_manifest(args.snapshot_dir)
+        if manifest is None:
+            print(f"⚠️ No snapshot published in {args.snapshot_dir}")
+            return
+        print("📸 Current snapshot")
+        print(f"   Version: {manifest['version']} ({manifest['file']})")
+        print(f"   Stage: {manifest['stage']} at {manifest['created_at']}")
+        print(f"   Tools: {manifest['tools']:,}  Edges: {manifest['edges']:,}")
+        if is_stale(manifest):
+            print(f"   ⚠️ {manifest['source']} was written since: readers use the live database")
+        print(f"   Available: {len(_list_snapshots(Path(args.snapshot_dir)))} snapshot(s)")
+
+
+if __name__ == "__main__":
+    main()
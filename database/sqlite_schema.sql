@@ -25,7 +25,8 @@ CREATE TABLE IF NOT EXISTS ai_tool (
     maturity TEXT,
     platform TEXT, -- JSON array as string in SQLite
     features TEXT, -- JSON object as string in SQLite
-    last_scraped DATETIME
+    last_scraped DATETIME,
+    field_hashes TEXT -- JSON object {field: hash}, see database/content_hash.py
 );
 
 -- Indexes for performance
@@ -36,6 +37,99 @@ CREATE INDEX IF NOT EXISTS idx_ai_tool_source ON ai_tool(source);
 CREATE INDEX IF NOT EXISTS idx_ai_tool_macro_domain ON ai_tool(macro_domain);
 CREATE INDEX IF NOT EXISTS idx_ai_tool_popularity ON ai_tool(popularity);
 CREATE INDEX IF NOT EXISTS idx_ai_tool_last_scraped ON ai_tool(last_scraped);
+-- Case-insensitive duplicate checks (SQLiteAdapter.validate_no_duplicates)
+CREATE INDEX IF NOT EXISTS idx_ai_tool_url_lower ON ai_tool(LOWER(url));
+CREATE INDEX IF NOT EXISTS idx_ai_tool_name_lower ON ai_tool(LOWER(name));
+
+-- Normalised categories/platforms/features, mirrored from the JSON columns
+-- by SQLiteAdapter so readers can filter and join without json.loads per row.
+-- Every index below covers its lookup (WITHOUT ROWID tables are clustered on
+-- their primary key).
+CREATE TABLE IF NOT EXISTS category (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+-- Lowercased words of each category name (keyword overlap candidate pairs)
+CREATE TABLE IF NOT EXISTS category_keyword (
+    category_id INTEGER NOT NULL REFERENCES category(id),
+    keyword TEXT NOT NULL,
+    PRIMARY KEY (category_id, keyword)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_category_keyword_keyword ON category_keyword(keyword, category_id);
+
+CREATE TABLE IF NOT EXISTS tool_category (
+    tool_id INTEGER NOT NULL REFERENCES ai_tool(id),
+    category_id INTEGER NOT NULL REFERENCES category(id),
+    position INTEGER NOT NULL DEFAULT 0, -- order within ai_tool.categories
+    PRIMARY KEY (tool_id, category_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tool_category_category ON tool_category(category_id, tool_id);
+
+CREATE TABLE IF NOT EXISTS tool_platform (
+    tool_id INTEGER NOT NULL REFERENCES ai_tool(id),
+    platform TEXT NOT NULL,
+    PRIMARY KEY (tool_id, platform)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tool_platform_platform ON tool_platform(platform, tool_id);
+
+CREATE TABLE IF NOT EXISTS tool_feature (
+    tool_id INTEGER NOT NULL REFERENCES ai_tool(id),
+    feature TEXT NOT NULL,
+    value TEXT, -- JSON-encoded value, e.g. 'true'
+    PRIMARY KEY (tool_id, feature)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tool_feature_feature ON tool_feature(feature, value, tool_id);
+
+-- Graph edges from synergy/build_synergy.py, one row per pair (tool_id_1 < tool_id_2).
+-- The per-endpoint indexes cover neighbour lookups ordered by strength, so
+-- degree counts and top connections never touch the table.
+CREATE TABLE IF NOT EXISTS ai_synergy (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tool_id_1 INTEGER NOT NULL REFERENCES ai_tool(id),
+    tool_id_2 INTEGER NOT NULL REFERENCES ai_tool(id),
+    strength REAL NOT NULL,
+    edge_type TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (tool_id_1, tool_id_2),
+    CHECK (tool_id_1 < tool_id_2)
+);
+CREATE INDEX IF NOT EXISTS idx_ai_synergy_tool_1_strength ON ai_synergy(tool_id_1, strength, tool_id_2, edge_type);
+CREATE INDEX IF NOT EXISTS idx_ai_synergy_tool_2_strength ON ai_synergy(tool_id_2, strength, tool_id_1, edge_type);
+CREATE INDEX IF NOT EXISTS idx_ai_synergy_strength ON ai_synergy(strength);
+
+-- Per-tool degree aggregates over ai_synergy, maintained by the ai_synergy
+-- triggers below so node endpoints read degree with a primary-key lookup.
+-- Tools without edges have no row (degree 0). Edges whose type is none of the
+-- four classified by EdgeScoringEngine count towards degree only.
+CREATE TABLE IF NOT EXISTS ai_tool_degree (
+    tool_id INTEGER PRIMARY KEY,
+    degree INTEGER NOT NULL DEFAULT 0,
+    weighted_degree REAL NOT NULL DEFAULT 0, -- sum of edge strengths
+    same_domain_count INTEGER NOT NULL DEFAULT 0,
+    video_audio_count INTEGER NOT NULL DEFAULT 0,
+    semantic_similarity_count INTEGER NOT NULL DEFAULT 0,
+    weak_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- Scoring inputs of each tool as the last synergy run saw them (hash of
+-- description, macro_domain, categories and monthly_users). Incremental runs
+-- rescore only the tools whose hash changed; ids missing from ai_tool are
+-- tools deleted since, so this table has no foreign key.
+CREATE TABLE IF NOT EXISTS ai_synergy_tool_state (
+    tool_id INTEGER PRIMARY KEY,
+    scoring_hash TEXT NOT NULL,
+    scored_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Drained byte offset per ingest log segment (database/ingest_log.py)
+CREATE TABLE IF NOT EXISTS ingest_checkpoint (
+    segment TEXT PRIMARY KEY,
+    byte_offset INTEGER NOT NULL DEFAULT 0,
+    records INTEGER NOT NULL DEFAULT 0,
+    sealed INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
 
 -- Trigger to update updated_at on changes
 CREATE TRIGGER IF NOT EXISTS update_ai_tool_updated_at 
@@ -44,6 +138,200 @@ BEGIN
     UPDATE ai_tool SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
 END;
 
+-- Drop normalised rows with their tool (duplicate cleanup, manual deletes)
+CREATE TRIGGER IF NOT EXISTS delete_ai_tool_relations
+    AFTER DELETE ON ai_tool
+BEGIN
+    DELETE FROM tool_category WHERE tool_id = OLD.id;
+    DELETE FROM tool_platform WHERE tool_id = OLD.id;
+    DELETE FROM tool_feature WHERE tool_id = OLD.id;
+END;
+
+-- Drop a tool's edges with it
+CREATE TRIGGER IF NOT EXISTS delete_ai_tool_synergies
+    AFTER DELETE ON ai_tool
+BEGIN
+    DELETE FROM ai_synergy WHERE tool_id_1 = OLD.id OR tool_id_2 = OLD.id;
+END;
+
+-- Keep ai_tool_degree in step with ai_synergy: add each new edge to both
+-- endpoints, subtract deleted ones, and drop rows whose degree reaches 0
+CREATE TRIGGER IF NOT EXISTS ai_synergy_degree_insert
+    AFTER INSERT ON ai_synergy
+BEGIN
+    INSERT INTO ai_tool_degree (
+        tool_id, degree, weighted_degree,
+        same_domain_count, video_audio_count, semantic_similarity_count, weak_count
+    )
+    SELECT tool_id, 1, NEW.strength,
+           NEW.edge_type IS 'same_domain', NEW.edge_type IS 'video_audio',
+           NEW.edge_type IS 'semantic_similarity', NEW.edge_type IS 'weak'
+    FROM (SELECT NEW.tool_id_1 AS tool_id UNION ALL SELECT NEW.tool_id_2) WHERE true
+    ON CONFLICT (tool_id) DO UPDATE SET
+        degree = degree + 1,
+        weighted_degree = weighted_degree + excluded.weighted_degree,
+        same_domain_count = same_domain_count + excluded.same_domain_count,
+        video_audio_count = video_audio_count + excluded.video_audio_count,
+        semantic_similarity_count = semantic_similarity_count + excluded.semantic_similarity_count,
+        weak_count = weak_count + excluded.weak_count;
+END;
+
+CREATE TRIGGER IF NOT EXISTS ai_synergy_degree_delete
+    AFTER DELETE ON ai_synergy
+BEGIN
+    UPDATE ai_tool_degree SET
+        degree = degree - 1,
+        weighted_degree = weighted_degree - OLD.strength,
+        same_domain_count = same_domain_count - (OLD.edge_type IS 'same_domain'),
+        video_audio_count = video_audio_count - (OLD.edge_type IS 'video_audio'),
+        semantic_similarity_count = semantic_similarity_count - (OLD.edge_type IS 'semantic_similarity'),
+        weak_count = weak_count - (OLD.edge_type IS 'weak')
+    WHERE tool_id IN (OLD.tool_id_1, OLD.tool_id_2);
+    DELETE FROM ai_tool_degree WHERE tool_id IN (OLD.tool_id_1, OLD.tool_id_2) AND degree <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS ai_synergy_degree_update
+    AFTER UPDATE OF tool_id_1, tool_id_2, strength, edge_type ON ai_synergy
+BEGIN
+    UPDATE ai_tool_degree SET
+        degree = degree - 1,
+        weighted_degree = weighted_degree - OLD.strength,
+        same_domain_count = same_domain_count - (OLD.edge_type IS 'same_domain'),
+        video_audio_count = video_audio_count - (OLD.edge_type IS 'video_audio'),
+        semantic_similarity_count = semantic_similarity_count - (OLD.edge_type IS 'semantic_similarity'),
+        weak_count = weak_count - (OLD.edge_type IS 'weak')
+    WHERE tool_id IN (OLD.tool_id_1, OLD.tool_id_2);
+    INSERT INTO ai_tool_degree (
+        tool_id, degree, weighted_degree,
+        same_domain_count, video_audio_count, semantic_similarity_count, weak_count
+    )
+    SELECT tool_id, 1, NEW.strength,
+           NEW.edge_type IS 'same_domain', NEW.edge_type IS 'video_audio',
+           NEW.edge_type IS 'semantic_similarity', NEW.edge_type IS 'weak'
+    FROM (SELECT NEW.tool_id_1 AS tool_id UNION ALL SELECT NEW.tool_id_2) WHERE true
+    ON CONFLICT (tool_id) DO UPDATE SET
+        degree = degree + 1,
+        weighted_degree = weighted_degree + excluded.weighted_degree,
+        same_domain_count = same_domain_count + excluded.same_domain_count,
+        video_audio_count = video_audio_count + excluded.video_audio_count,
+        semantic_similarity_count = semantic_similarity_count + excluded.semantic_similarity_count,
+        weak_count = weak_count + excluded.weak_count;
+    DELETE FROM ai_tool_degree WHERE tool_id IN (OLD.tool_id_1, OLD.tool_id_2) AND degree <= 0;
+END;
+
+-- Canonical identity of each graph node (one per ai_tool row) with the
+-- normalised keys merges match new records on, and the per-source records
+-- that resolved to it. A repeat scrape of (source, ext_id) finds its tool
+-- with one primary-key lookup, whatever its url or name now says; a first
+-- sighting is matched on url_key, then name_key (SQLiteAdapter.find_duplicate_tool).
+CREATE TABLE IF NOT EXISTS tool_identity (
+    tool_id INTEGER PRIMARY KEY,
+    url_key TEXT, -- lower(trim(url)), NULL when empty
+    name_key TEXT -- lower(trim(name)), NULL when empty
+);
+CREATE INDEX IF NOT EXISTS idx_tool_identity_url_key ON tool_identity(url_key, tool_id);
+CREATE INDEX IF NOT EXISTS idx_tool_identity_name_key ON tool_identity(name_key, tool_id);
+
+CREATE TABLE IF NOT EXISTS tool_source_record (
+    source TEXT NOT NULL,
+    ext_id TEXT NOT NULL,
+    tool_id INTEGER NOT NULL,
+    record TEXT, -- the tool as last scraped from this source (JSON)
+    first_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+    last_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, ext_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tool_source_record_tool ON tool_source_record(tool_id);
+
+CREATE TRIGGER IF NOT EXISTS ai_tool_identity_insert
+    AFTER INSERT ON ai_tool
+BEGIN
+    INSERT OR REPLACE INTO tool_identity (tool_id, url_key, name_key)
+    VALUES (NEW.id, NULLIF(lower(trim(NEW.url)), ''), NULLIF(lower(trim(NEW.name)), ''));
+    INSERT OR IGNORE INTO tool_source_record (source, ext_id, tool_id)
+    VALUES (NEW.source, NEW.ext_id, NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS ai_tool_identity_update
+    AFTER UPDATE OF url, name ON ai_tool
+BEGIN
+    UPDATE tool_identity SET
+        url_key = NULLIF(lower(trim(NEW.url)), ''),
+        name_key = NULLIF(lower(trim(NEW.name)), '')
+    WHERE tool_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS delete_ai_tool_identity
+    AFTER DELETE ON ai_tool
+BEGIN
+    DELETE FROM tool_identity WHERE tool_id = OLD.id;
+    DELETE FROM tool_source_record WHERE tool_id = OLD.id;
+END;
+
+-- Popularity history (database/trending.py): one row per tool per scrape that
+-- changed popularity, upvotes or monthly_users, holding the change since the
+-- previous row (delta encoding). A value at time t is the current value minus
+-- the deltas after t, and old rows are downsampled by summing them.
+CREATE TABLE IF NOT EXISTS tool_metric_point (
+    tool_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL, -- unix seconds of the scrape
+    d_popularity REAL NOT NULL DEFAULT 0,
+    d_upvotes INTEGER NOT NULL DEFAULT 0,
+    d_monthly_users INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tool_id, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tool_metric_point_ts ON tool_metric_point(ts, tool_id);
+
+-- Growth per day over the last window and its change against the window
+-- before, for tools with history in the last two windows (refresh_trends())
+CREATE TABLE IF NOT EXISTS tool_trend (
+    tool_id INTEGER PRIMARY KEY,
+    velocity REAL NOT NULL,
+    acceleration REAL NOT NULL,
+    updated_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tool_trend_velocity ON tool_trend(velocity DESC);
+CREATE INDEX IF NOT EXISTS idx_tool_trend_acceleration ON tool_trend(acceleration DESC);
+
+CREATE TABLE IF NOT EXISTS tool_trend_refresh (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    refreshed_at INTEGER NOT NULL,
+    window_days REAL NOT NULL,
+    compacted_at INTEGER
+);
+
+-- Record each metric change, stamped with the scrape that brought it
+CREATE TRIGGER IF NOT EXISTS ai_tool_metric_update
+    AFTER UPDATE OF popularity, upvotes, monthly_users ON ai_tool
+    WHEN COALESCE(NEW.popularity, 0) != COALESCE(OLD.popularity, 0)
+      OR COALESCE(NEW.upvotes, 0) != COALESCE(OLD.upvotes, 0)
+      OR COALESCE(NEW.monthly_users, 0) != COALESCE(OLD.monthly_users, 0)
+BEGIN
+    INSERT INTO tool_metric_point (tool_id, ts, d_popularity, d_upvotes, d_monthly_users)
+    VALUES (
+        NEW.id,
+        COALESCE(
+            CASE WHEN NEW.last_scraped IS NOT OLD.last_scraped
+                 THEN CAST(strftime('%s', NEW.last_scraped) AS INTEGER) END,
+            CAST(strftime('%s', 'now') AS INTEGER)
+        ),
+        COALESCE(NEW.popularity, 0) - COALESCE(OLD.popularity, 0),
+        COALESCE(NEW.upvotes, 0) - COALESCE(OLD.upvotes, 0),
+        COALESCE(NEW.monthly_users, 0) - COALESCE(OLD.monthly_users, 0)
+    )
+    ON CONFLICT (tool_id, ts) DO UPDATE SET
+        d_popularity = d_popularity + excluded.d_popularity,
+        d_upvotes = d_upvotes + excluded.d_upvotes,
+        d_monthly_users = d_monthly_users + excluded.d_monthly_users;
+END;
+
+CREATE TRIGGER IF NOT EXISTS delete_ai_tool_metrics
+    AFTER DELETE ON ai_tool
+BEGIN
+    DELETE FROM tool_metric_point WHERE tool_id = OLD.id;
+    DELETE FROM tool_trend WHERE tool_id = OLD.id;
+END;
+
 -- View for tool statistics (similar to Supabase materialized view)
 CREATE VIEW IF NOT EXISTS ai_tool_stats AS
 SELECT 
@@ -55,12 +343,14 @@ SELECT
 FROM ai_tool 
 GROUP BY source, macro_domain;
 
--- Insert some sample data for testing
-INSERT OR IGNORE INTO ai_tool (
+-- Insert some sample data for testing: once, into a database that never had
+-- a tool (ai_tool has no unique key the old INSERT OR IGNORE could hit, so it
+-- added a row on every open), and never again once deleted
+INSERT INTO ai_tool (
     ext_id, name, description, price, popularity, categories, source, macro_domain,
     url, logo_url, rank, upvotes, monthly_users, editor_score, maturity, platform, features
-) VALUES 
-(
+)
+SELECT
     'sample_tool_1', 
     'Sample AI Tool', 
     'This is a sample tool for testing the database schema',
@@ -78,4 +368,41 @@ INSERT OR IGNORE INTO ai_tool (
     'stable',
     '["web", "mobile"]',
     '{"free_tier": true, "api_available": true, "real_time": false}'
-);
\ No newline at end of file
+WHERE NOT EXISTS (SELECT 1 FROM ai_tool WHERE source = 'test_source' AND ext_id = 'sample_tool_1')
+  AND NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'ai_tool');
+
+-- Full-text search over name, description and categories (/api/search).
+-- External-content FTS5 table: the text lives in ai_tool, triggers keep the
+-- index in sync. Kept last so a build without FTS5 still gets every table above.
+CREATE VIRTUAL TABLE IF NOT EXISTS ai_tool_fts USING fts5(
+    name,
+    description,
+    categories,
+    content='ai_tool',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS ai_tool_fts_insert
+    AFTER INSERT ON ai_tool
+BEGIN
+    INSERT INTO ai_tool_fts (rowid, name, description, categories)
+    VALUES (NEW.id, NEW.name, NEW.description, NEW.categories);
+END;
+
+CREATE TRIGGER IF NOT EXISTS ai_tool_fts_delete
+    AFTER DELETE ON ai_tool
+BEGIN
+    INSERT INTO ai_tool_fts (ai_tool_fts, rowid, name, description, categories)
+    VALUES ('delete', OLD.id, OLD.name, OLD.description, OLD.categories);
+END;
+
+CREATE TRIGGER IF NOT EXISTS ai_tool_fts_update
+    AFTER UPDATE OF name, description, categories ON ai_tool
+BEGIN
+    INSERT INTO ai_tool_fts (ai_tool_fts, rowid, name, description, categories)
+    VALUES ('delete', OLD.id, OLD.name, OLD.description, OLD.categories);
+    INSERT INTO ai_tool_fts (rowid, name, description, categories)
+    VALUES (NEW.id, NEW.name, NEW.description, NEW.categories);
+END;
@@ -0,0 +1,290 @@
+-- Supabase (Postgres) schema updates required by the pipeline
+-- Apply in the Supabase SQL editor; every statement is idempotent.
+
+-- ---------------------------------------------------------------------------
+-- Batched merge (SupabaseMerger.merge_and_upsert_tools_bulk)
+-- ---------------------------------------------------------------------------
+
+-- Normalised lookup keys so existing tools can be resolved with in_() instead of
+-- one ilike query per tool. Must match SupabaseMerger._normalize_key.
+ALTER TABLE ai_tool ADD COLUMN IF NOT EXISTS url_key TEXT
+    GENERATED ALWAYS AS (lower(btrim(url))) STORED;
+ALTER TABLE ai_tool ADD COLUMN IF NOT EXISTS name_key TEXT
+    GENERATED ALWAYS AS (lower(btrim(name))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_ai_tool_url_key ON ai_tool(url_key);
+CREATE INDEX IF NOT EXISTS idx_ai_tool_name_key ON ai_tool(name_key);
+
+-- Conflict target for upsert(on_conflict='ext_id,source').
+-- Run `python main.py cleanup` first if duplicates by (ext_id, source) exist.
+CREATE UNIQUE INDEX IF NOT EXISTS uq_ai_tool_ext_id_source ON ai_tool(ext_id, source);
+
+-- ---------------------------------------------------------------------------
+-- Set-based duplicate cleanup (SupabaseMerger.cleanup_duplicates)
+-- ---------------------------------------------------------------------------
+
+-- Keeps the oldest row (lowest id) per (ext_id, source) and returns the number
+-- of rows deleted, in a single round trip.
+CREATE OR REPLACE FUNCTION cleanup_duplicate_tools()
+RETURNS integer
+LANGUAGE sql
+AS $$
+    WITH ranked AS (
+        SELECT id, row_number() OVER (PARTITION BY ext_id, source ORDER BY id) AS rn
+        FROM ai_tool
+    ),
+    deleted AS (
+        DELETE FROM ai_tool
+        WHERE id IN (SELECT id FROM ranked WHERE rn > 1)
+        RETURNING id
+    )
+    SELECT count(*)::integer FROM deleted;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- Per-field content hashes (database/content_hash.py)
+-- ---------------------------------------------------------------------------
+
+-- {field: hash} for every hashed column; merges compare it to update only the
+-- columns that changed. Rows without it are rewritten once on the next merge.
+ALTER TABLE ai_tool ADD COLUMN IF NOT EXISTS field_hashes JSONB;
+
+-- ---------------------------------------------------------------------------
+-- Incrementally maintained degree aggregates (replaces the ai_tool_degree
+-- materialized view and its refresh_materialized_view RPC)
+-- ---------------------------------------------------------------------------
+
+-- Same layout as the SQLite table: one row per tool with at least one edge.
+DROP MATERIALIZED VIEW IF EXISTS ai_tool_degree;
+CREATE TABLE IF NOT EXISTS ai_tool_degree (
+    tool_id BIGINT PRIMARY KEY,
+    degree INTEGER NOT NULL DEFAULT 0,
+    weighted_degree DOUBLE PRECISION NOT NULL DEFAULT 0,
+    same_domain_count INTEGER NOT NULL DEFAULT 0,
+    video_audio_count INTEGER NOT NULL DEFAULT 0,
+    semantic_similarity_count INTEGER NOT NULL DEFAULT 0,
+    weak_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- Statement-level: a batch insert of N edges costs one grouped upsert, not N.
+CREATE OR REPLACE FUNCTION ai_tool_degree_apply()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        WITH removed AS (
+            SELECT tool_id, count(*) AS n, sum(strength) AS w,
+                   count(*) FILTER (WHERE edge_type = 'same_domain') AS sd,
+                   count(*) FILTER (WHERE edge_type = 'video_audio') AS va,
+                   count(*) FILTER (WHERE edge_type = 'semantic_similarity') AS ss,
+                   count(*) FILTER (WHERE edge_type = 'weak') AS wk
+            FROM (
+                SELECT tool_id_1 AS tool_id, strength, edge_type FROM old_edges
+                UNION ALL
+                SELECT tool_id_2, strength, edge_type FROM old_edges
+            ) e
+            GROUP BY tool_id
+        )
+        UPDATE ai_tool_degree d SET
+            degree = d.degree - r.n,
+            weighted_degree = d.weighted_degree - r.w,
+            same_domain_count = d.same_domain_count - r.sd,
+            video_audio_count = d.video_audio_count - r.va,
+            semantic_similarity_count = d.semantic_similarity_count - r.ss,
+            weak_count = d.weak_count - r.wk
+        FROM removed r
+        WHERE d.tool_id = r.tool_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO ai_tool_degree AS d (
+            tool_id, degree, weighted_degree,
+            same_domain_count, video_audio_count, semantic_similarity_count, weak_count
+        )
+        SELECT tool_id, count(*), sum(strength),
+               count(*) FILTER (WHERE edge_type = 'same_domain'),
+               count(*) FILTER (WHERE edge_type = 'video_audio'),
+               count(*) FILTER (WHERE edge_type = 'semantic_similarity'),
+               count(*) FILTER (WHERE edge_type = 'weak')
+        FROM (
+            SELECT tool_id_1 AS tool_id, strength, edge_type FROM new_edges
+            UNION ALL
+            SELECT tool_id_2, strength, edge_type FROM new_edges
+        ) e
+        GROUP BY tool_id
+        ON CONFLICT (tool_id) DO UPDATE SET
+            degree = d.degree + EXCLUDED.degree,
+            weighted_degree = d.weighted_degree + EXCLUDED.weighted_degree,
+            same_domain_count = d.same_domain_count + EXCLUDED.same_domain_count,
+            video_audio_count = d.video_audio_count + EXCLUDED.video_audio_count,
+            semantic_similarity_count = d.semantic_similarity_count + EXCLUDED.semantic_similarity_count,
+            weak_count = d.weak_count + EXCLUDED.weak_count;
+    END IF;
+
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        DELETE FROM ai_tool_degree WHERE degree <= 0;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS ai_synergy_degree_insert ON ai_synergy;
+CREATE TRIGGER ai_synergy_degree_insert
+    AFTER INSERT ON ai_synergy
+    REFERENCING NEW TABLE AS new_edges
+    FOR EACH STATEMENT EXECUTE FUNCTION ai_tool_degree_apply();
+
+DROP TRIGGER IF EXISTS ai_synergy_degree_delete ON ai_synergy;
+CREATE TRIGGER ai_synergy_degree_delete
+    AFTER DELETE ON ai_synergy
+    REFERENCING OLD TABLE AS old_edges
+    FOR EACH STATEMENT EXECUTE FUNCTION ai_tool_degree_apply();
+
+DROP TRIGGER IF EXISTS ai_synergy_degree_update ON ai_synergy;
+CREATE TRIGGER ai_synergy_degree_update
+    AFTER UPDATE ON ai_synergy
+    REFERENCING OLD TABLE AS old_edges NEW TABLE AS new_edges
+    FOR EACH STATEMENT EXECUTE FUNCTION ai_tool_degree_apply();
+
+-- Backfill from existing edges (only when the table is new/empty).
+INSERT INTO ai_tool_degree (
+    tool_id, degree, weighted_degree,
+    same_domain_count, video_audio_count, semantic_similarity_count, weak_count
+)
+SELECT tool_id, count(*), sum(strength),
+       count(*) FILTER (WHERE edge_type = 'same_domain'),
+       count(*) FILTER (WHERE edge_type = 'video_audio'),
+       count(*) FILTER (WHERE edge_type = 'semantic_similarity'),
+       count(*) FILTER (WHERE edge_type = 'weak')
+FROM (
+    SELECT tool_id_1 AS tool_id, strength, edge_type FROM ai_synergy
+    UNION ALL
+    SELECT tool_id_2, strength, edge_type FROM ai_synergy
+) e
+WHERE NOT EXISTS (SELECT 1 FROM ai_tool_degree)
+GROUP BY tool_id;
+
+-- ---------------------------------------------------------------------------
+-- Incremental local mirror (database/mirror.py)
+-- ---------------------------------------------------------------------------
+
+-- The mirror pulls rows changed since its (updated_at, id) watermark, so
+-- updated_at must be set by the server on every write (clients send 'now()'
+-- strings or nothing) and both tables need it.
+ALTER TABLE ai_synergy ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+CREATE INDEX IF NOT EXISTS idx_ai_tool_updated_at_id ON ai_tool(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_ai_synergy_updated_at_id ON ai_synergy(updated_at, id);
+
+CREATE OR REPLACE FUNCTION touch_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS ai_tool_touch_updated_at ON ai_tool;
+CREATE TRIGGER ai_tool_touch_updated_at
+    BEFORE INSERT OR UPDATE ON ai_tool
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+DROP TRIGGER IF EXISTS ai_synergy_touch_updated_at ON ai_synergy;
+CREATE TRIGGER ai_synergy_touch_updated_at
+    BEFORE INSERT OR UPDATE ON ai_synergy
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+-- Deleted rows leave a tombstone so the mirror can delete them too. The
+-- mirror walks tombstones by id; when the oldest one left is newer than its
+-- tombstone watermark (purged before it synced), it reloads everything.
+CREATE TABLE IF NOT EXISTS mirror_tombstone (
+    id BIGSERIAL PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    row_id BIGINT NOT NULL,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_mirror_tombstone_deleted_at ON mirror_tombstone(deleted_at);
+
+-- Statement-level: deleting N rows is one INSERT ... SELECT
+CREATE OR REPLACE FUNCTION record_tombstones()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO mirror_tombstone (table_name, row_id)
+    SELECT TG_TABLE_NAME, id FROM deleted_rows;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS ai_tool_tombstone ON ai_tool;
+CREATE TRIGGER ai_tool_tombstone
+    AFTER DELETE ON ai_tool
+    REFERENCING OLD TABLE AS deleted_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_tombstones();
+
+DROP TRIGGER IF EXISTS ai_synergy_tombstone ON ai_synergy;
+CREATE TRIGGER ai_synergy_tombstone
+    AFTER DELETE ON ai_synergy
+    REFERENCING OLD TABLE AS deleted_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_tombstones();
+
+-- Retention (e.g. from a scheduled job); mirrors older than this reload fully:
+-- DELETE FROM mirror_tombstone WHERE deleted_at < now() - interval '30 days';
+
+-- ---------------------------------------------------------------------------
+-- Per-source records of each canonical tool (SupabaseMerger.merge_and_upsert_tools_bulk)
+-- ---------------------------------------------------------------------------
+
+-- (source, ext_id) -> canonical ai_tool row plus the record as last scraped
+-- from that source, so a repeat scrape resolves with one primary-key lookup
+-- whatever its url or name now says. The normalised identity keys are the
+-- url_key/name_key columns above (SQLite keeps them in tool_identity).
+CREATE TABLE IF NOT EXISTS tool_source_record (
+    source TEXT NOT NULL,
+    ext_id TEXT NOT NULL,
+    tool_id BIGINT NOT NULL REFERENCES ai_tool(id) ON DELETE CASCADE,
+    record JSONB,
+    first_seen TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_seen TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (source, ext_id)
+);
+CREATE INDEX IF NOT EXISTS idx_tool_source_record_tool ON tool_source_record(tool_id);
+
+-- Every inserted tool is its own first source record (statement-level)
+CREATE OR REPLACE FUNCTION record_tool_sources()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO tool_source_record (source, ext_id, tool_id)
+    SELECT source, ext_id, id FROM inserted_rows
+    ON CONFLICT (source, ext_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS ai_tool_source_record ON ai_tool;
+CREATE TRIGGER ai_tool_source_record
+    AFTER INSERT ON ai_tool
+    REFERENCING NEW TABLE AS inserted_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_tool_sources();
+
+-- Backfill existing tools (records fill in on their next scrape)
+INSERT INTO tool_source_record (source, ext_id, tool_id)
+SELECT source, ext_id, id FROM ai_tool
+ON CONFLICT (source, ext_id) DO NOTHING;
+
+-- ---------------------------------------------------------------------------
+-- Incremental synergy runs (EdgeScoringEngine.calculate_changed_edges)
+-- ---------------------------------------------------------------------------
+
+-- Hash of each tool's scoring inputs as the last synergy run saw them. No
+-- foreign key: a stored id missing from ai_tool marks a deleted tool.
+CREATE TABLE IF NOT EXISTS ai_synergy_tool_state (
+    tool_id BIGINT PRIMARY KEY,
+    scoring_hash TEXT NOT NULL,
+    scored_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -0,0 +1,242 @@
+"""
+Popularity history and trending scores
+
+Merging keeps only the largest popularity/upvotes/monthly_users seen, so the
+history of a tool used to be lost. The ai_tool_metric_update trigger
+(sqlite_schema.sql) now appends a row to tool_metric_point whenever a scrape
+changes one of them. Each row holds the change since the previous row, not
+the value:
+
+- a value at time t is the current ai_tool value minus the deltas after t,
+  so the history needs no baseline row per tool
+- rows are small and mostly zeros, and downsampling merges rows by summing
+  them: compact_metric_points() keeps one row per day after 30 days and one
+  per week after 180 days
+
+refresh_trends() turns the last two windows (7 days each) of history into
+tool_trend rows, indexed for the API's ``sort=velocity|acceleration``:
+
+    g          = ln(1 + popularity) + ln(1 + upvotes) + ln(1 + monthly_users)
+    velocity   = (g(now) - g(now - window)) / window_days
+    acceleration = (velocity - previous window's velocity) / window_days
+
+Growth is measured on a log scale so a tool going from 10 to 20 upvotes
+trends more than one going from 10,000 to 10,010. The refresh is incremental:
+a tool's score can only have changed if it has a row newer than the previous
+refresh minus two windows (rows that entered a window, or left one).
+
+Usage:
+    refresh_trends(conn)            # after a drain (IngestLogDrainer does it)
+    compact_metric_points(conn)
+
+    python -m database.trending refresh|compact|top [--db database/ai_tools.db]
+"""
+
+import math
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEFAULT_DB_PATH = 'database/ai_tools.db'
+DAY = 86400
+WINDOW_DAYS = 7.0
+
+# (age in days, bucket in seconds): rows older than the age are merged into one per bucket
+DOWNSAMPLE_TIERS: Tuple[Tuple[int, int], ...] = ((30, DAY), (180, 7 * DAY))
+
+TREND_SORTS = ('velocity', 'acceleration')
+
+
+def trend_value(popularity: Optional[float], upvotes: Optional[float],
+                monthly_users: Optional[float]) -> float:
+    """Log-scale popularity the trend is measured on"""
+    return sum(math.log1p(max(0.0, value or 0.0)) for value in (popularity, upvotes, monthly_users))
+
+
+def refresh_trends(conn: sqlite3.Connection, now: Optional[float] = None,
+                   window_days: float = WINDOW_DAYS) -> Dict[str, Any]:
+    """
+    Recompute tool_trend for the tools whose scores may have changed
+
+    Args:
+        conn: SQLite connection (committed by the caller)
+        now: Unix time the windows end at (defaults to the current time)
+        window_days: Window length; a change recomputes every tool
+
+    Returns:
+        Tools scored and whether every tool was recomputed
+    """
+    now = int(now if now is not None else time.time())
+    window = int(window_days * DAY)
+    t1, t2 = now - window, now - 2 * window
+
+    state = conn.execute(
+        "SELECT refreshed_at, window_days FROM tool_trend_refresh WHERE id = 1"
+    ).fetchone()
+    full = state is None or state[1] != window_days
+    since = t2 if full else min(state[0] - 2 * window, t2)
+
+    if full:
+        conn.execute("DELETE FROM tool_trend")
+    else:
+        conn.execute("""
+            DELETE FROM tool_trend WHERE tool_id IN (
+                SELECT DISTINCT tool_id FROM tool_metric_point WHERE ts > ?
+            )
+        """, (since,))
+
+    rows = conn.execute("""
+        SELECT t.id, t.popularity, t.upvotes, t.monthly_users,
+               TOTAL(CASE WHEN p.ts > :t1 THEN p.d_popularity END),
+               TOTAL(CASE WHEN p.ts > :t1 THEN p.d_upvotes END),
+               TOTAL(CASE WHEN p.ts > :t1 THEN p.d_monthly_users END),
+               TOTAL(p.d_popularity), TOTAL(p.d_upvotes), TOTAL(p.d_monthly_users)
+        FROM tool_metric_point p
+        JOIN ai_tool t ON t.id = p.tool_id
+        WHERE p.ts > :t2
+          AND p.tool_id IN (SELECT tool_id FROM tool_metric_point WHERE ts > :since)
+        GROUP BY t.id
+    """, {'t1': t1, 't2': t2, 'since': since}).fetchall()
+
+    scores = []
+    for tool_id, popularity, upvotes, users, p1, u1, m1, p2, u2, m2 in rows:
+        current = (popularity or 0, upvotes or 0, users or 0)
+        g_now = trend_value(*current)
+        g_t1 = trend_value(current[0] - p1, current[1] - u1, current[2] - m1)
+        g_t2 = trend_value(current[0] - p2, current[1] - u2, current[2] - m2)
+        velocity = (g_now - g_t1) / window_days
+        previous = (g_t1 - g_t2) / window_days
+        scores.append((tool_id, velocity, (velocity - previous) / window_days, now))
+
+    conn.executemany("""
+        INSERT INTO tool_trend (tool_id, velocity, acceleration, updated_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT (tool_id) DO UPDATE SET
+            velocity = excluded.velocity,
+            acceleration = excluded.acceleration,
+            updated_at = excluded.updated_at
+    """, scores)
+    conn.execute("""
+        INSERT INTO tool_trend_refresh (id, refreshed_at, window_days) VALUES (1, ?, ?)
+        ON CONFLICT (id) DO UPDATE SET
+            refreshed_at = excluded.refreshed_at,
+            window_days = excluded.window_days
+    """, (now, window_days))
+    return {'tools_scored': len(scores), 'full': full}
+
+
+def compact_metric_points(conn: sqlite3.Connection, now: Optional[float] = None,
+                          tiers: Tuple[Tuple[int, int], ...] = DOWNSAMPLE_TIERS) -> int:
+    """
+    Merge history rows older than each tier's age into one row per bucket
+
+    Only rows that crossed an age limit since the previous compaction are
+    read. Merged rows keep the bucket's latest timestamp and the summed
+    deltas, so values at bucket ends are unchanged.
+
+    Returns:
+        Rows removed
+    """
+    now = int(now if now is not None else time.time())
+    row = conn.execute("SELECT compacted_at FROM tool_trend_refresh WHERE id = 1").fetchone()
+    previous = row[0] if row and row[0] is not None else None
+
+    conn.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS metric_merge (
+            tool_id INTEGER, bucket INTEGER, ts INTEGER,
+            d_popularity REAL, d_upvotes INTEGER, d_monthly_users INTEGER
+        )
+    """)
+    removed = 0
+    for age_days, bucket in tiers:
+        cutoff = now - age_days * DAY
+        # From the start of the bucket the previous cutoff fell in
+        lower = ((previous - age_days * DAY) // bucket) * bucket if previous is not None else 0
+        if lower >= cutoff:
+            continue
+
+        conn.execute("DELETE FROM temp.metric_merge")
+        conn.execute("""
+            INSERT INTO temp.metric_merge
+            SELECT tool_id, ts / :bucket, MAX(ts),
+                   SUM(d_popularity), SUM(d_upvotes), SUM(d_monthly_users)
+            FROM tool_metric_point
+            WHERE ts >= :lower AND ts < :cutoff
+            GROUP BY tool_id, ts / :bucket
+            HAVING COUNT(*) > 1
+        """, {'bucket': bucket, 'lower': lower, 'cutoff': cutoff})
+        merged = conn.execute("""
+            DELETE FROM tool_metric_point
+            WHERE ts >= :lower AND ts < :cutoff
+              AND (tool_id, ts / :bucket) IN (SELECT tool_id, bucket FROM temp.metric_merge)
+        """, {'bucket': bucket, 'lower': lower, 'cutoff': cutoff}).rowcount
+        conn.execute("""
+            INSERT INTO tool_metric_point (tool_id, ts, d_popularity, d_upvotes, d_monthly_users)
+            SELECT tool_id, ts, d_popularity, d_upvotes, d_monthly_users FROM temp.metric_merge
+        """)
+        removed += merged - conn.execute("SELECT COUNT(*) FROM temp.metric_merge").fetchone()[0]
+
+    conn.execute("""
+        INSERT INTO tool_trend_refresh (id, refreshed_at, window_days, compacted_at) VALUES (1, 0, 0, ?)
+        ON CONFLICT (id) DO UPDATE SET compacted_at = excluded.compacted_at
+    """, (now,))
+    return removed
+
+
+def load_metric_history(conn: sqlite3.Connection, tool_id: int) -> List[Dict[str, Any]]:
+    """Absolute popularity/upvotes/monthly_users after each history row, oldest first"""
+    current = conn.execute(
+        "SELECT popularity, upvotes, monthly_users FROM ai_tool WHERE id = ?", (tool_id,)
+    ).fetchone()
+    if current is None:
+        return []
+    points = conn.execute("""
+        SELECT ts, d_popularity, d_upvotes, d_monthly_users FROM tool_metric_point
+        WHERE tool_id = ? ORDER BY ts DESC
+    """, (tool_id,)).fetchall()
+
+    popularity, upvotes, users = (current[0] or 0, current[1] or 0, current[2] or 0)
+    history = []
+    for ts, d_popularity, d_upvotes, d_users in points:
+        history.append({'ts': ts, 'popularity': popularity, 'upvotes': upvotes, 'monthly_users': users})
+        popularity, upvotes, users = popularity - d_popularity, upvotes - d_upvotes, users - d_users
+    history.reverse()
+    return history
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Popularity history and trending scores')
+    parser.add_argument('action', choices=['refresh', 'compact', 'top'])
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='SQLite database path')
+    parser.add_argument('--window-days', type=float, default=WINDOW_DAYS, help='Trend window (refresh)')
+    parser.add_argument('--sort', choices=TREND_SORTS, default='velocity', help='Ranking (top)')
+    parser.add_argument('--limit', type=int, default=20, help='Tools listed (top)')
+    args = parser.parse_args()
+
+    from database.adapters import SQLiteAdapter
+    adapter = SQLiteAdapter(args.db)
+    started = time.perf_counter()
+    with adapter.transaction() as conn:
+        if args.action == 'refresh':
+            result = refresh_trends(conn, window_days=args.window_days)
+            print(f"📈 Scored {result['tools_scored']:,} tools"
+                  f"{' (full recompute)' if result['full'] else ''} in "
+                  f"{(time.perf_counter() - started) * 1000:.0f} ms")
+        elif args.action == 'compact':
+            removed = compact_metric_points(conn)
+            print(f"🧹 Merged away {removed:,} history rows in {(time.perf_counter() - started) * 1000:.0f} ms")
+        else:
+            rows = conn.execute(f"""
+                SELECT t.id, t.name, tt.velocity, tt.acceleration
+                FROM tool_trend tt JOIN ai_tool t ON t.id = tt.tool_id
+                ORDER BY tt.{args.sort} DESC LIMIT ?
+            """, (args.limit,)).fetchall()
+            print(f"📈 Top {len(rows)} tools by {args.sort}")
+            for row in rows:
+                print(f"   {row['id']:>8}  {row['velocity']:+.4f}/day  {row['acceleration']:+.5f}/day²  {row['name']}")
+
+
+if __name__ == "__main__":
+    main()
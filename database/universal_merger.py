@@ -3,19 +3,26 @@ Universal database merger that works with SQLite or Supabase
 Uses the adapter pattern for easy switching between databases
 """
 
-import hashlib
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from scrapers.common import AITool
-from database.adapters import DatabaseAdapter, create_database_adapter
+from database.adapters import DatabaseAdapter, SQLiteAdapter, create_database_adapter
+from database.content_hash import (
+    compute_field_hashes, combine_field_hashes, parse_field_hashes, changed_fields
+)
 
 
 class UniversalMerger:
     """Universal merger that works with any database adapter"""
     
-    def __init__(self, use_sqlite: bool = True):
-        self.adapter = create_database_adapter(use_sqlite)
-        self.database_type = "SQLite" if use_sqlite else "Supabase"
+    def __init__(self, use_sqlite: bool = True, adapter: Optional[DatabaseAdapter] = None):
+        """
+        Args:
+            use_sqlite: SQLite (database/ai_tools.db) or Supabase
+            adapter: Explicit adapter instead, e.g. database.shards.ShardedSQLiteAdapter
+        """
+        self.adapter = adapter or create_database_adapter(use_sqlite)
+        self.database_type = "SQLite" if isinstance(self.adapter, SQLiteAdapter) else "Supabase"
         
         # Test connection
         if not self.adapter.connect():
@@ -39,48 +46,57 @@ class UniversalMerger:
         
         print(f"🔄 Processing {len(tools)} tools with {self.database_type} database...")
         
-        # First, deduplicate within the batch
-        deduplicated_tools = self._deduplicate_tools_batch(tools)
+        # First, deduplicate within the batch (keeping each tool's source records)
+        batch_members: List[List[AITool]] = []
+        deduplicated_tools = self._deduplicate_tools_batch(tools, batch_members)
         print(f"🧹 Internal deduplication: {len(tools)} -> {len(deduplicated_tools)} tools")
         
+        now = datetime.now()
+        unchanged_ids = []
+        source_records = []
+        
         for i, tool in enumerate(deduplicated_tools):
             try:
                 # Update timestamp
-                tool.last_scraped = datetime.now()
-                
-                # Generate content hash
-                content_hash = self._generate_content_hash(tool)
+                tool.last_scraped = now
+                for member in batch_members[i]:
+                    member.last_scraped = now
                 
                 # Look for duplicates in database
                 existing_tool = self.adapter.find_duplicate_tool(tool)
                 
                 if existing_tool:
+                    source_records.extend((existing_tool['id'], member) for member in batch_members[i])
+                    
                     # Merge data intelligently
                     merged_tool = self._merge_tool_data(existing_tool, tool)
                     
-                    # Check if there are changes after merge
-                    merged_hash = self._generate_content_hash(merged_tool)
-                    if existing_tool.get('content_hash') != merged_hash:
-                        # Update with merged data
-                        if self.adapter.update_tool(existing_tool['id'], merged_tool, merged_hash):
+                    # Compare per-field hashes to find the columns that changed
+                    merged_hashes = compute_field_hashes(merged_tool)
+                    fields = changed_fields(parse_field_hashes(existing_tool.get('field_hashes')), merged_hashes)
+                    if fields:
+                        # Update only the changed columns
+                        if self.adapter.update_tool_fields(existing_tool['id'], merged_tool, fields,
+                                                           combine_field_hashes(merged_hashes), merged_hashes):
                             stats['updated'] += 1
-                            print(f"🔄 [{i+1}/{len(deduplicated_tools)}] Updated (merged): {tool.name}")
+                            print(f"🔄 [{i+1}/{len(deduplicated_tools)}] Updated (merged, {len(fields)} fields): {tool.name}")
                         else:
                             stats['errors'] += 1
                     else:
-                        # No content changes, just update timestamp
-                        existing_tool['last_scraped'] = datetime.now().isoformat()
-                        existing_tool['content_hash'] = merged_hash
-                        if self.adapter.update_tool(existing_tool['id'], merged_tool, merged_hash):
-                            stats['merged'] += 1
-                            print(f"⏭️ [{i+1}/{len(deduplicated_tools)}] Timestamp updated: {tool.name}")
-                        else:
-                            stats['errors'] += 1
+                        # No content changes: timestamp bumped in one statement after the loop
+                        unchanged_ids.append(existing_tool['id'])
+                        print(f"⏭️ [{i+1}/{len(deduplicated_tools)}] No changes: {tool.name}")
                 else:
                     # Insert new tool
-                    if self.adapter.insert_tool(tool, content_hash):
+                    field_hashes = compute_field_hashes(tool)
+                    if self.adapter.insert_tool(tool, combine_field_hashes(field_hashes), field_hashes):
                         stats['inserted'] += 1
                         print(f"✅ [{i+1}/{len(deduplicated_tools)}] Inserted: {tool.name}")
+                        if len(batch_members[i]) > 1:
+                            # Other sources of the same tool in this batch
+                            inserted = self.adapter.get_existing_tool(tool.ext_id, tool.source)
+                            if inserted:
+                                source_records.extend((inserted['id'], member) for member in batch_members[i])
                     else:
                         stats['errors'] += 1
                 
@@ -89,13 +105,30 @@ class UniversalMerger:
                 print(f"❌ [{i+1}/{len(deduplicated_tools)}] Error processing {tool.name}: {e}")
                 continue
         
+        if unchanged_ids:
+            unchanged_ids = list(dict.fromkeys(unchanged_ids))
+            touched = self.adapter.touch_last_scraped(unchanged_ids, now)
+            stats['merged'] += touched
+            stats['errors'] += len(unchanged_ids) - touched
+        
+        # (source, ext_id) -> canonical tool, so the next scrape resolves with one key lookup
+        self.adapter.record_sources(source_records)
+        
         print(f"\n📊 Results: {stats['inserted']} inserted, {stats['updated']} updated, {stats['merged']} merged, {stats['errors']} errors")
         return stats
     
-    def _deduplicate_tools_batch(self, tools: List[AITool]) -> List[AITool]:
-        """Deduplicate tools within the batch by URL or name"""
+    def _deduplicate_tools_batch(self, tools: List[AITool],
+                                 members: Optional[List[List[AITool]]] = None) -> List[AITool]:
+        """
+        Deduplicate tools within the batch by URL or name
+        
+        members, when given, receives the original tools merged into each
+        returned tool (same order), so every source record can be linked.
+        """
         seen_tools = {}
         deduplicated = []
+        if members is None:
+            members = []
         
         for tool in tools:
             # Deduplication keys
@@ -119,6 +152,7 @@ class UniversalMerger:
                 for j, existing in enumerate(deduplicated):
                     if existing == existing_tool:
                         deduplicated[j] = merged_tool
+                        members[j].append(tool)
                         break
             else:
                 # Add new tool
@@ -127,6 +161,7 @@ class UniversalMerger:
                 if name_key:
                     seen_tools[name_key] = tool
                 deduplicated.append(tool)
+                members.append([tool])
         
         return deduplicated
     
@@ -257,27 +292,6 @@ class UniversalMerger:
             return val1
         return min(val1, val2)
     
-    def _generate_content_hash(self, tool: AITool) -> str:
-        """Generate hash of tool content for change detection"""
-        content_parts = [
-            tool.name or "",
-            tool.description or "",
-            tool.price or "",
-            str(tool.popularity),
-            '|'.join(sorted(tool.categories)),
-            tool.url or "",
-            tool.logo_url or "",
-            str(tool.rank) if tool.rank else "",
-            str(tool.upvotes) if tool.upvotes else "",
-            str(tool.monthly_users) if tool.monthly_users else "",
-            str(tool.editor_score) if tool.editor_score else "",
-            tool.maturity or "",
-            '|'.join(sorted(tool.platform)) if tool.platform else "",
-            str(tool.features) if tool.features else ""
-        ]
-        content = "|".join(content_parts)
-        return hashlib.md5(content.encode('utf-8')).hexdigest()
-    
     def get_statistics(self) -> Dict[str, Any]:
         """Get database statistics"""
         return self.adapter.get_statistics()
@@ -285,6 +299,10 @@ class UniversalMerger:
     def validate_no_duplicates(self) -> Dict[str, Any]:
         """Validate no duplicates exist"""
         return self.adapter.validate_no_duplicates()
+    
+    def cleanup_duplicates(self) -> Dict[str, Any]:
+        """Remove duplicates by (ext_id, source), keeping the oldest row"""
+        return self.adapter.cleanup_duplicates()
 
 
 # Convenience functions
@@ -7,6 +7,8 @@ import time
 from datetime import datetime
 from scrapers.futurepedia import FuturepediaScraper
 from database.adapters import SQLiteAdapter
+from database.ingest_log import IngestLogWriter, IngestLogDrainer
+from database.snapshot import publish_snapshot
 
 def main():
     print("⚡ FAST AI TOOLS SCRAPER")
@@ -14,6 +16,9 @@ def main():
     
     scraper = FuturepediaScraper()
     db = SQLiteAdapter('database/ai_tools.db')
+    ingest_log = IngestLogWriter()
+    # No snapshot per drain (each one copies the whole database): one when scraping ends
+    drainer = IngestLogDrainer(adapter=db)
     
     # Get current count
     stats = db.get_statistics()
@@ -32,14 +37,16 @@ def main():
             tools = scraper.scrape(max_tools=100)
             print(f"Scraped: {len(tools)} tools")
             
-            # Add to database
-            added = 0
+            # Append to the ingest log, then drain unless a drainer process owns it
             for tool in tools:
                 tool.source = f'futurepedia_fast_batch_{batch_number}'
                 tool.last_scraped = datetime.now()
-                
-                if db.upsert_ai_tool(tool):
-                    added += 1
+            ingest_log.append_many(tools)
+            
+            result = drainer.drain_if_available()
+            added = result['applied'] if result else 0
+            if result is None:
+                print(f"📥 Logged {len(tools)} tools (drainer lag: {drainer.lag()['pending_records']} records)")
             
             end_time = time.time()
             
@@ -61,6 +68,12 @@ def main():
             print(f"❌ Error: {e}")
             time.sleep(10)
     
+    ingest_log.close()
+    try:
+        manifest = publish_snapshot(db.db_path, stage='scrape')
+        print(f"📸 Published snapshot v{manifest['version']} ({manifest['tools']} tools)")
+    except Exception as e:
+        print(f"⚠️ Snapshot publish failed: {e}")
     print(f"\n🎉 COMPLETED! {current_count} tools in database")
 
 if __name__ == "__main__":
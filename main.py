@@ -67,11 +67,11 @@ def run_all_scrapers() -> int:
     return total_tools
 
 
-def run_synergy_calculation():
-    """Executa cálculo de sinergias"""
+def run_synergy_calculation(incremental: bool = False):
+    """Executa cálculo de sinergias (incremental: só as ferramentas alteradas desde a última execução)"""
     print("\n🔗 Calculando sinergias...")
     try:
-        stats = build_synergies()
+        stats = build_synergies(incremental=incremental)
         print(f"📊 Synergy stats: {stats}")
     except Exception as e:
         print(f"❌ Erro no cálculo de sinergias: {e}")
@@ -137,6 +137,11 @@ def main():
         choices=['aitools_directory', 'theresanaiforthat', 'futurepedia', 'phygital_library'],
         help='Scraper específico para executar (apenas com action=scrape)'
     )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Recalcula só as sinergias das ferramentas novas, alteradas ou removidas (action=synergy/full)'
+    )
     
     args = parser.parse_args()
     
@@ -149,7 +154,7 @@ def main():
             run_all_scrapers()
             
     elif args.action == 'synergy':
-        run_synergy_calculation()
+        run_synergy_calculation(args.incremental)
         
     elif args.action == 'stats':
         show_statistics()
@@ -168,7 +173,7 @@ def main():
         
         # 3. Sinergias (apenas se tiver ferramentas)
         if total_tools > 0:
-            run_synergy_calculation()
+            run_synergy_calculation(args.incremental)
         
         # 4. Estatísticas
         show_statistics()
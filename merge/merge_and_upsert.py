@@ -3,11 +3,16 @@ Módulo para fazer merge e upsert das ferramentas de AI no Supabase
 """
 
 import os
-import hashlib
+import time
+from dataclasses import asdict
 from typing import List, Dict, Any, Optional
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from scrapers.common import AITool
+from database.pagination import KeysetPaginator
+from database.content_hash import (
+    compute_field_hashes, combine_field_hashes, parse_field_hashes, changed_fields
+)
 from datetime import datetime
 
 # Carrega variáveis de ambiente
@@ -16,9 +21,13 @@ load_dotenv()
 class SupabaseMerger:
     """Classe para fazer merge e upsert das ferramentas no Supabase"""
     
-    def __init__(self):
-        self.url = os.getenv("SUPABASE_URL")
-        self.key = os.getenv("SUPABASE_KEY")
+    # Tamanho dos chunks para upsert em lote e para as listas de chaves em in_()
+    UPSERT_CHUNK_SIZE = 500
+    LOOKUP_CHUNK_SIZE = 100
+    
+    def __init__(self, url: Optional[str] = None, key: Optional[str] = None):
+        self.url = url or os.getenv("SUPABASE_URL")
+        self.key = key or os.getenv("SUPABASE_KEY")
         
         if not self.url or not self.key:
             raise ValueError("SUPABASE_URL e SUPABASE_KEY devem estar configurados no .env")
@@ -48,13 +57,13 @@ class SupabaseMerger:
         deduplicated_tools = self._deduplicate_tools_batch(tools)
         print(f"🧹 Deduplicação interna: {len(tools)} -> {len(deduplicated_tools)} ferramentas")
         
+        now = datetime.now()
+        unchanged_ids = []
+        
         for i, tool in enumerate(deduplicated_tools):
             try:
                 # Atualiza timestamp de scraping
-                tool.last_scraped = datetime.now()
-                
-                # Gera hash único para detectar mudanças
-                content_hash = self._generate_content_hash(tool)
+                tool.last_scraped = now
                 
                 # Busca por ferramentas duplicadas no banco (por URL ou nome)
                 existing_tool = self._find_duplicate_tool(tool)
@@ -63,21 +72,23 @@ class SupabaseMerger:
                     # Faz merge inteligente dos dados
                     merged_tool = self._merge_tool_data(existing_tool, tool)
                     
-                    # Verifica se houve mudanças após o merge
-                    merged_hash = self._generate_content_hash(merged_tool)
-                    if existing_tool.get('content_hash') != merged_hash:
-                        # Atualiza ferramenta existente com dados merged
-                        self._update_tool(existing_tool['id'], merged_tool, merged_hash)
+                    # Compara os hashes por campo para saber quais colunas mudaram
+                    merged_hashes = compute_field_hashes(merged_tool)
+                    fields = changed_fields(parse_field_hashes(existing_tool.get('field_hashes')), merged_hashes)
+                    if fields:
+                        # Atualiza apenas as colunas alteradas
+                        self._update_tool(existing_tool['id'], merged_tool, combine_field_hashes(merged_hashes),
+                                          fields=fields, field_hashes=merged_hashes)
                         stats['updated'] += 1
-                        print(f"🔄 [{i+1}/{len(deduplicated_tools)}] Atualizado (merged): {tool.name}")
+                        print(f"🔄 [{i+1}/{len(deduplicated_tools)}] Atualizado (merged, {len(fields)} campos): {tool.name}")
                     else:
-                        # Mesmo sem mudanças no conteúdo, atualiza last_scraped
-                        self._update_last_scraped(existing_tool['id'])
-                        stats['merged'] += 1
-                        print(f"⏭️ [{i+1}/{len(deduplicated_tools)}] Sem mudanças (timestamp atualizado): {tool.name}")
+                        # Sem mudanças: last_scraped é atualizado em lote no final
+                        unchanged_ids.append(existing_tool['id'])
+                        print(f"⏭️ [{i+1}/{len(deduplicated_tools)}] Sem mudanças: {tool.name}")
                 else:
                     # Insere nova ferramenta
-                    self._insert_tool(tool, content_hash)
+                    field_hashes = compute_field_hashes(tool)
+                    self._insert_tool(tool, combine_field_hashes(field_hashes), field_hashes)
                     stats['inserted'] += 1
                     print(f"✅ [{i+1}/{len(deduplicated_tools)}] Inserido: {tool.name}")
                 
@@ -86,9 +97,270 @@ class SupabaseMerger:
                 print(f"❌ [{i+1}/{len(deduplicated_tools)}] Erro ao processar {tool.name}: {e}")
                 continue
         
+        touched, failed = self._touch_last_scraped(list(dict.fromkeys(unchanged_ids)), now)
+        stats['merged'] += touched
+        stats['errors'] += failed
+        
+        print(f"\n📊 Resultados: {stats['inserted']} inseridas, {stats['updated']} atualizadas, {stats['merged']} merged, {stats['errors']} erros")
+        return stats
+    
+    def merge_and_upsert_tools_bulk(self, tools: List[AITool]) -> Dict[str, int]:
+        """
+        Versão em lote de merge_and_upsert_tools
+        
+        Em vez de até duas buscas ilike e um insert/update por ferramenta, resolve as
+        ferramentas existentes com poucas consultas in_(): primeiro pelos registros de
+        origem (source, ext_id) em tool_source_record e pelo próprio (ext_id, source)
+        em ai_tool, depois pelas chaves normalizadas (url_key, name_key), e grava em
+        chunks:
+        
+        - novas ferramentas: insert simples; um chunk que falha (por exemplo um conflito
+          em (ext_id, source) com uma linha gravada por outro processo depois da busca)
+          é dividido ao meio até isolar as linhas com erro
+        - ferramentas alteradas: upsert(on_conflict='id') com a linha completa
+        - ferramentas sem mudanças: um único update de last_scraped por chunk de ids
+        - registros de origem: upsert(on_conflict='source,ext_id') com o registro bruto
+        
+        Requer as colunas geradas, o índice único e tool_source_record de
+        database/supabase_schema_updates.sql (sem a tabela, resolve só por URL/nome).
+        
+        Args:
+            tools: Lista de ferramentas para inserir/atualizar
+            
+        Returns:
+            Dict com estatísticas: {'inserted': n, 'updated': n, 'errors': n, 'merged': n}
+        """
+        stats = {'inserted': 0, 'updated': 0, 'errors': 0, 'merged': 0}
+        
+        if not tools:
+            print("⚠️ Nenhuma ferramenta para processar")
+            return stats
+        
+        print(f"🔄 Processando {len(tools)} ferramentas em lote...")
+        
+        batch_members: List[List[AITool]] = []
+        deduplicated_tools = self._deduplicate_tools_batch(tools, batch_members)
+        print(f"🧹 Deduplicação interna: {len(tools)} -> {len(deduplicated_tools)} ferramentas")
+        
+        try:
+            existing_by_source, existing_by_url, existing_by_name = self._find_duplicate_tools_bulk(
+                deduplicated_tools, [member for members in batch_members for member in members]
+            )
+        except Exception as e:
+            stats['errors'] = len(deduplicated_tools)
+            print(f"❌ Erro ao buscar ferramentas existentes em lote: {e}")
+            return stats
+        
+        now = datetime.now()
+        new_tools: Dict[tuple, AITool] = {}
+        new_members: Dict[tuple, List[AITool]] = {}
+        existing_rows: Dict[Any, Dict[str, Any]] = {}
+        merged_tools: Dict[Any, AITool] = {}
+        source_records: List[tuple] = []
+        
+        for tool, members in zip(deduplicated_tools, batch_members):
+            tool.last_scraped = now
+            for member in members:
+                member.last_scraped = now
+            
+            # Registro de origem já visto (de qualquer ferramenta mesclada nesta), senão URL/nome
+            existing_tool = next((
+                existing_by_source[(member.source, member.ext_id)] for member in members
+                if (member.source, member.ext_id) in existing_by_source
+            ), None)
+            url_key = self._normalize_key(tool.url)
+            name_key = self._normalize_key(tool.name)
+            if existing_tool is None and url_key:
+                existing_tool = existing_by_url.get(url_key)
+            if existing_tool is None and name_key:
+                existing_tool = existing_by_name.get(name_key)
+            
+            if existing_tool is None:
+                # Duas ferramentas novas com o mesmo (ext_id, source) quebrariam o upsert
+                key = (tool.ext_id, tool.source)
+                new_tools[key] = self._merge_tool_objects(new_tools[key], tool) if key in new_tools else tool
+                new_members.setdefault(key, []).extend(members)
+                continue
+            
+            # Várias ferramentas do lote podem casar com a mesma linha (uma por URL, outra por nome)
+            tool_id = existing_tool['id']
+            base_tool = merged_tools.get(tool_id) or self._dict_to_aitool(existing_tool)
+            merged_tools[tool_id] = self._merge_tool_objects(base_tool, tool)
+            existing_rows[tool_id] = existing_tool
+            source_records.extend((tool_id, member) for member in members)
+        
+        insert_rows = []
+        for tool in new_tools.values():
+            field_hashes = compute_field_hashes(tool)
+            insert_rows.append(self._tool_to_row(tool, combine_field_hashes(field_hashes), field_hashes))
+        
+        # Linhas alteradas agrupadas pelo conjunto de colunas que mudaram: o upsert em
+        # lote do PostgREST exige as mesmas colunas em todas as linhas do chunk
+        update_groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        unchanged_ids = []
+        for tool_id, merged_tool in merged_tools.items():
+            merged_hashes = compute_field_hashes(merged_tool)
+            fields = changed_fields(parse_field_hashes(existing_rows[tool_id].get('field_hashes')), merged_hashes)
+            if fields:
+                full_row = self._tool_to_row(merged_tool, combine_field_hashes(merged_hashes), merged_hashes)
+                # ext_id, source e name são NOT NULL e precisam estar na tupla do upsert
+                row = {column: full_row[column] for column in ['ext_id', 'source', 'name'] + fields}
+                row.update({
+                    'id': tool_id,
+                    'content_hash': full_row['content_hash'],
+                    'field_hashes': merged_hashes,
+                    'last_scraped': full_row['last_scraped'],
+                    'updated_at': 'now()'
+                })
+                update_groups.setdefault(tuple(fields), []).append(row)
+            else:
+                unchanged_ids.append(tool_id)
+        
+        for chunk in self._chunks(insert_rows, self.UPSERT_CHUNK_SIZE):
+            inserted, failed = self._insert_new_rows(chunk)
+            stats['inserted'] += len(inserted)
+            stats['errors'] += failed
+            for row in inserted:
+                source_records.extend(
+                    (row['id'], member) for member in new_members.get((row['ext_id'], row['source']), [])
+                )
+        
+        for update_rows in update_groups.values():
+            for chunk in self._chunks(update_rows, self.UPSERT_CHUNK_SIZE):
+                try:
+                    self.supabase.table('ai_tool').upsert(chunk, on_conflict='id').execute()
+                    stats['updated'] += len(chunk)
+                except Exception as e:
+                    stats['errors'] += len(chunk)
+                    print(f"❌ Erro no upsert de {len(chunk)} ferramentas alteradas: {e}")
+        
+        touched, failed = self._touch_last_scraped(unchanged_ids, now)
+        stats['merged'] += touched
+        stats['errors'] += failed
+        
+        self._record_sources(source_records)
+        
         print(f"\n📊 Resultados: {stats['inserted']} inseridas, {stats['updated']} atualizadas, {stats['merged']} merged, {stats['errors']} erros")
         return stats
     
+    def _find_duplicate_tools_bulk(self, tools: List[AITool],
+                                   source_tools: Optional[List[AITool]] = None) -> tuple:
+        """
+        Busca em lote as ferramentas existentes pelos registros de origem e pelas chaves normalizadas
+        
+        Args:
+            tools: Ferramentas deduplicadas (busca por URL/nome)
+            source_tools: Ferramentas originais do lote (busca por (source, ext_id)); padrão: tools
+        
+        Returns:
+            Tupla (por_origem, por_url, por_nome): (source, ext_id) -> linha do banco e
+            chave normalizada -> linha do banco. Quando várias linhas têm a mesma chave,
+            fica a de menor id.
+        """
+        existing_by_source = self._select_by_source_records(source_tools or tools)
+        resolved = set(existing_by_source)
+        tools = [tool for tool in tools if (tool.source, tool.ext_id) not in resolved]
+        
+        url_keys = sorted({self._normalize_key(tool.url) for tool in tools if self._normalize_key(tool.url)})
+        existing_by_url = self._select_by_keys('url_key', url_keys)
+        
+        # Só busca por nome as ferramentas que não casaram por URL
+        name_keys = sorted({
+            self._normalize_key(tool.name) for tool in tools
+            if self._normalize_key(tool.name) and self._normalize_key(tool.url) not in existing_by_url
+        })
+        existing_by_name = self._select_by_keys('name_key', name_keys)
+        
+        return existing_by_source, existing_by_url, existing_by_name
+    
+    def _select_by_source_records(self, tools: List[AITool]) -> Dict[tuple, Dict[str, Any]]:
+        """
+        Resolve (source, ext_id) -> linha de ai_tool via tool_source_record e, para o
+        que não tem registro de origem, pelo próprio (ext_id, source) de ai_tool
+        
+        Uma consulta in_(ext_id) por source e chunk em cada tabela, mais uma in_(id)
+        por chunk de ferramentas encontradas. Sem tool_source_record (schema antigo)
+        resolve só por ai_tool: uma linha com o mesmo (ext_id, source) nunca é tratada
+        como nova (o insert falharia no índice único).
+        """
+        ext_ids_by_source: Dict[str, set] = {}
+        for tool in tools:
+            if tool.source and tool.ext_id:
+                ext_ids_by_source.setdefault(tool.source, set()).add(tool.ext_id)
+        
+        tool_ids: Dict[tuple, Any] = {}
+        try:
+            for source, ext_ids in ext_ids_by_source.items():
+                for chunk in self._chunks(sorted(ext_ids), self.LOOKUP_CHUNK_SIZE):
+                    response = self.supabase.table('tool_source_record').select('ext_id, tool_id') \
+                        .eq('source', source).in_('ext_id', chunk).execute()
+                    for row in response.data:
+                        tool_ids[(source, row['ext_id'])] = row['tool_id']
+        except Exception as e:
+            print(f"⚠️ tool_source_record indisponível, buscando por (ext_id, source) e URL/nome: {e}")
+            tool_ids = {}
+        
+        rows = self._select_by_keys('id', sorted(set(tool_ids.values())))
+        existing = {key: rows[tool_id] for key, tool_id in tool_ids.items() if tool_id in rows}
+        
+        for source, ext_ids in ext_ids_by_source.items():
+            unresolved = sorted(ext_id for ext_id in ext_ids if (source, ext_id) not in existing)
+            for chunk in self._chunks(unresolved, self.LOOKUP_CHUNK_SIZE):
+                response = self.supabase.table('ai_tool').select('*') \
+                    .eq('source', source).in_('ext_id', chunk).execute()
+                for row in response.data:
+                    existing[(source, row['ext_id'])] = row
+        return existing
+    
+    def _record_sources(self, records: List[tuple]) -> int:
+        """Grava (source, ext_id) -> ferramenta canônica com o registro bruto, em chunks de upsert"""
+        rows: Dict[tuple, Dict[str, Any]] = {}
+        for tool_id, tool in records:
+            if not tool.source or not tool.ext_id:
+                continue
+            record = asdict(tool)
+            record['last_scraped'] = tool.last_scraped.isoformat() if tool.last_scraped else None
+            rows[(tool.source, tool.ext_id)] = {
+                'source': tool.source,
+                'ext_id': tool.ext_id,
+                'tool_id': tool_id,
+                'record': record,
+                'last_seen': record['last_scraped'] or datetime.now().isoformat()
+            }
+        
+        written = 0
+        for chunk in self._chunks(list(rows.values()), self.UPSERT_CHUNK_SIZE):
+            try:
+                self.supabase.table('tool_source_record').upsert(chunk, on_conflict='source,ext_id').execute()
+                written += len(chunk)
+            except Exception as e:
+                print(f"⚠️ Erro ao gravar {len(chunk)} registros de origem: {e}")
+        return written
+    
+    def _select_by_keys(self, key_column: str, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Busca linhas de ai_tool cujo key_column está em keys, em chunks de in_()"""
+        found: Dict[str, Dict[str, Any]] = {}
+        for chunk in self._chunks(keys, self.LOOKUP_CHUNK_SIZE):
+            response = self.supabase.table('ai_tool').select('*').in_(key_column, chunk).execute()
+            for row in response.data:
+                key = row.get(key_column)
+                if key not in found or row['id'] < found[key]['id']:
+                    found[key] = row
+        return found
+    
+    @staticmethod
+    def _normalize_key(value: Optional[str]) -> Optional[str]:
+        """Normaliza URL/nome da mesma forma que as colunas geradas url_key/name_key"""
+        if not value:
+            return None
+        return value.lower().strip() or None
+    
+    @staticmethod
+    def _chunks(items: List[Any], size: int):
+        """Divide uma lista em pedaços de tamanho size"""
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
+    
     def _get_existing_tool(self, ext_id: str, source: str) -> Optional[Dict[str, Any]]:
         """Busca ferramenta existente por ext_id e source"""
         try:
@@ -102,9 +374,20 @@ class SupabaseMerger:
             print(f"❌ Erro ao buscar ferramenta existente {ext_id}: {e}")
             return None
     
-    def _insert_tool(self, tool: AITool, content_hash: str) -> None:
+    def _insert_tool(self, tool: AITool, content_hash: str,
+                     field_hashes: Optional[Dict[str, str]] = None) -> None:
         """Insere nova ferramenta"""
-        tool_data = {
+        tool_data = self._tool_to_row(tool, content_hash, field_hashes)
+        
+        response = self.supabase.table('ai_tool').insert(tool_data).execute()
+        
+        if not response.data:
+            raise Exception("Falha ao inserir ferramenta")
+    
+    def _tool_to_row(self, tool: AITool, content_hash: str,
+                     field_hashes: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Converte AITool para a linha completa de ai_tool"""
+        return {
             'ext_id': tool.ext_id,
             'name': tool.name,
             'description': tool.description,
@@ -124,16 +407,14 @@ class SupabaseMerger:
             'maturity': tool.maturity,
             'platform': tool.platform,
             'features': tool.features,
-            'last_scraped': tool.last_scraped.isoformat() if tool.last_scraped else None
+            'last_scraped': tool.last_scraped.isoformat() if tool.last_scraped else None,
+            'field_hashes': field_hashes
         }
-        
-        response = self.supabase.table('ai_tool').insert(tool_data).execute()
-        
-        if not response.data:
-            raise Exception("Falha ao inserir ferramenta")
     
-    def _update_tool(self, tool_id: int, tool: AITool, content_hash: str) -> None:
-        """Atualiza ferramenta existente"""
+    def _update_tool(self, tool_id: int, tool: AITool, content_hash: str,
+                     fields: Optional[List[str]] = None,
+                     field_hashes: Optional[Dict[str, str]] = None) -> None:
+        """Atualiza ferramenta existente (apenas `fields`, se informado)"""
         tool_data = {
             'name': tool.name,
             'description': tool.description,
@@ -156,37 +437,29 @@ class SupabaseMerger:
             'last_scraped': tool.last_scraped.isoformat() if tool.last_scraped else None
         }
         
+        if fields is not None:
+            bookkeeping = ('content_hash', 'updated_at', 'last_scraped')
+            tool_data = {k: v for k, v in tool_data.items() if k in fields or k in bookkeeping}
+        if field_hashes is not None:
+            tool_data['field_hashes'] = field_hashes
+        
         response = self.supabase.table('ai_tool').update(tool_data).eq('id', tool_id).execute()
         
         if not response.data:
             raise Exception("Falha ao atualizar ferramenta")
     
-    def _generate_content_hash(self, tool: AITool) -> str:
-        """Gera hash do conteúdo da ferramenta para detectar mudanças"""
-        # Include all significant fields in hash calculation
-        content_parts = [
-            tool.name or "",
-            tool.description or "",
-            tool.price or "",
-            str(tool.popularity),
-            '|'.join(sorted(tool.categories)),
-            tool.url or "",
-            tool.logo_url or "",
-            str(tool.rank) if tool.rank else "",
-            str(tool.upvotes) if tool.upvotes else "",
-            str(tool.monthly_users) if tool.monthly_users else "",
-            str(tool.editor_score) if tool.editor_score else "",
-            tool.maturity or "",
-            '|'.join(sorted(tool.platform)) if tool.platform else "",
-            str(tool.features) if tool.features else ""
-        ]
-        content = "|".join(content_parts)
-        return hashlib.md5(content.encode('utf-8')).hexdigest()
-    
-    def _deduplicate_tools_batch(self, tools: List[AITool]) -> List[AITool]:
-        """Deduplica ferramentas dentro do batch por URL ou nome"""
+    def _deduplicate_tools_batch(self, tools: List[AITool],
+                                 members: Optional[List[List[AITool]]] = None) -> List[AITool]:
+        """
+        Deduplica ferramentas dentro do batch por URL ou nome
+        
+        members, se informado, recebe as ferramentas originais mescladas em cada
+        ferramenta retornada (mesma ordem), para registrar todas as origens.
+        """
         seen_tools = {}
         deduplicated = []
+        if members is None:
+            members = []
         
         for tool in tools:
             # Chaves de deduplicação
@@ -210,6 +483,7 @@ class SupabaseMerger:
                 for i, existing in enumerate(deduplicated):
                     if existing == existing_tool:
                         deduplicated[i] = merged_tool
+                        members[i].append(tool)
                         break
             else:
                 # Adiciona nova ferramenta
@@ -218,6 +492,7 @@ class SupabaseMerger:
                 if name_key:
                     seen_tools[name_key] = tool
                 deduplicated.append(tool)
+                members.append([tool])
         
         return deduplicated
     
@@ -340,36 +615,66 @@ class SupabaseMerger:
             return val1
         return min(val1, val2)
     
-    def _update_last_scraped(self, tool_id: int) -> None:
-        """Atualiza apenas o timestamp de last_scraped"""
+    def _insert_new_rows(self, rows: List[Dict[str, Any]]) -> tuple:
+        """
+        Insere novas ferramentas; um lote que falha é dividido ao meio e tentado de novo
+        
+        Um conflito (ou outra linha inválida) derruba o insert do lote inteiro no
+        PostgREST: dividindo recursivamente só as linhas com erro ficam de fora, ao
+        custo de cerca de 2·log2(len(rows)) requisições extras por linha com erro.
+        
+        Returns:
+            Tupla (linhas inseridas, retornadas pelo banco; número de linhas com erro)
+        """
         try:
-            self.supabase.table('ai_tool').update({
-                'last_scraped': datetime.now().isoformat(),
-                'updated_at': 'now()'
-            }).eq('id', tool_id).execute()
+            response = self.supabase.table('ai_tool').insert(rows).execute()
+            return list(response.data), 0
         except Exception as e:
-            print(f"❌ Erro ao atualizar timestamp: {e}")
+            if len(rows) == 1:
+                print(f"❌ Erro ao inserir {rows[0].get('name')} ({rows[0].get('source')}/{rows[0].get('ext_id')}): {e}")
+                return [], 1
+            print(f"⚠️ Insert de {len(rows)} novas ferramentas falhou, dividindo o lote: {e}")
+        
+        middle = len(rows) // 2
+        first, first_failed = self._insert_new_rows(rows[:middle])
+        second, second_failed = self._insert_new_rows(rows[middle:])
+        return first + second, first_failed + second_failed
+    
+    def _touch_last_scraped(self, tool_ids: List[Any], scraped_at: datetime) -> tuple:
+        """
+        Atualiza apenas last_scraped das ferramentas sem mudanças, um update por chunk de ids
+        
+        Returns:
+            Tupla (atualizadas, com erro)
+        """
+        touched, failed = 0, 0
+        for chunk in self._chunks(tool_ids, self.UPSERT_CHUNK_SIZE):
+            try:
+                self.supabase.table('ai_tool').update({
+                    'last_scraped': scraped_at.isoformat(),
+                    'updated_at': 'now()'
+                }).in_('id', chunk).execute()
+                touched += len(chunk)
+            except Exception as e:
+                failed += len(chunk)
+                print(f"❌ Erro ao atualizar timestamp de {len(chunk)} ferramentas: {e}")
+        return touched, failed
     
     def get_statistics(self) -> Dict[str, Any]:
         """Retorna estatísticas do banco de dados"""
         try:
             # Total de ferramentas
-            total_response = self.supabase.table('ai_tool').select('id', count='exact').execute()
+            total_response = self.supabase.table('ai_tool').select('id', count='exact').limit(1).execute()
             total_tools = total_response.count
             
-            # Por fonte
-            by_source_response = self.supabase.table('ai_tool').select('source', count='exact').execute()
+            # Por fonte e por macro domínio (uma única leitura paginada)
             by_source = {}
-            for item in by_source_response.data:
-                source = item['source']
-                by_source[source] = by_source.get(source, 0) + 1
-            
-            # Por macro domínio
-            by_domain_response = self.supabase.table('ai_tool').select('macro_domain', count='exact').execute()
             by_domain = {}
-            for item in by_domain_response.data:
-                domain = item['macro_domain']
-                by_domain[domain] = by_domain.get(domain, 0) + 1
+            for chunk in KeysetPaginator(self.supabase, 'ai_tool', 'id, source, macro_domain').column_chunks():
+                for source in chunk['source']:
+                    by_source[source] = by_source.get(source, 0) + 1
+                for domain in chunk['macro_domain']:
+                    by_domain[domain] = by_domain.get(domain, 0) + 1
             
             return {
                 'total_tools': total_tools,
@@ -381,53 +686,90 @@ class SupabaseMerger:
             print(f"❌ Erro ao obter estatísticas: {e}")
             return {}
     
-    def cleanup_duplicates(self) -> int:
-        """Remove ferramentas duplicadas baseado em ext_id e source"""
+    def cleanup_duplicates(self, use_rpc: bool = True) -> int:
+        """
+        Remove ferramentas duplicadas baseado em ext_id e source
+        
+        Mantém a linha mais antiga (menor id) de cada (ext_id, source). Tenta primeiro
+        a função SQL cleanup_duplicate_tools (database/supabase_schema_updates.sql),
+        que resolve tudo em uma requisição; se ela não existir, calcula os grupos
+        localmente a partir de uma leitura paginada e apaga em chunks de in_().
+        
+        Os tempos de cada etapa ficam em self.last_cleanup_timings.
+        """
+        self.last_cleanup_timings = {}
         try:
             print("🧹 Iniciando limpeza de duplicatas...")
+            started = time.perf_counter()
             
-            # Busca duplicatas
-            response = self.supabase.table('ai_tool').select('ext_id, source, id').execute()
+            if use_rpc:
+                try:
+                    response = self.supabase.rpc('cleanup_duplicate_tools', {}).execute()
+                    removed_count = self._rpc_scalar(response.data)
+                    self.last_cleanup_timings = {'rpc_ms': (time.perf_counter() - started) * 1000}
+                    print(f"✅ Removidas {removed_count} duplicatas (RPC em {self.last_cleanup_timings['rpc_ms']:.0f} ms)")
+                    return removed_count
+                except Exception as e:
+                    print(f"⚠️ RPC cleanup_duplicate_tools indisponível, limpando localmente: {e}")
+                    started = time.perf_counter()
             
+            # Busca duplicatas (leitura paginada, não limitada pelo max-rows)
             tools_map = {}
             duplicates_to_remove = []
             
-            for tool in response.data:
-                key = f"{tool['ext_id']}_{tool['source']}"
+            for tool in KeysetPaginator(self.supabase, 'ai_tool', 'id, ext_id, source'):
+                key = (tool['ext_id'], tool['source'])
                 if key in tools_map:
                     # É uma duplicata - mantém o mais antigo (ID menor)
-                    if tool['id'] > tools_map[key]['id']:
+                    if tool['id'] > tools_map[key]:
                         duplicates_to_remove.append(tool['id'])
                     else:
-                        duplicates_to_remove.append(tools_map[key]['id'])
-                        tools_map[key] = tool
+                        duplicates_to_remove.append(tools_map[key])
+                        tools_map[key] = tool['id']
                 else:
-                    tools_map[key] = tool
+                    tools_map[key] = tool['id']
+            scanned = time.perf_counter()
             
-            # Remove duplicatas
+            # Remove duplicatas em chunks de in_()
             removed_count = 0
-            for duplicate_id in duplicates_to_remove:
+            for chunk in self._chunks(duplicates_to_remove, self.UPSERT_CHUNK_SIZE):
                 try:
-                    self.supabase.table('ai_tool').delete().eq('id', duplicate_id).execute()
-                    removed_count += 1
+                    response = self.supabase.table('ai_tool').delete().in_('id', chunk).execute()
+                    removed_count += len(response.data) if response.data else len(chunk)
                 except Exception as e:
-                    print(f"❌ Erro ao remover duplicata ID {duplicate_id}: {e}")
+                    print(f"❌ Erro ao remover {len(chunk)} duplicatas: {e}")
+            finished = time.perf_counter()
             
-            print(f"✅ Removidas {removed_count} duplicatas")
+            self.last_cleanup_timings = {
+                'scan_ms': (scanned - started) * 1000,
+                'delete_ms': (finished - scanned) * 1000,
+                'total_ms': (finished - started) * 1000
+            }
+            print(f"✅ Removidas {removed_count} duplicatas "
+                  f"(leitura {self.last_cleanup_timings['scan_ms']:.0f} ms, "
+                  f"remoção {self.last_cleanup_timings['delete_ms']:.0f} ms)")
             return removed_count
             
         except Exception as e:
             print(f"❌ Erro na limpeza de duplicatas: {e}")
             return 0
     
+    @staticmethod
+    def _rpc_scalar(data: Any) -> int:
+        """Extrai o valor inteiro retornado por uma RPC (escalar ou [{'fn': n}])"""
+        if isinstance(data, list):
+            data = data[0] if data else 0
+        if isinstance(data, dict):
+            data = next(iter(data.values()), 0)
+        return int(data or 0)
+    
     def validate_no_duplicates(self) -> Dict[str, Any]:
         """Valida que não existem duplicatas no banco por URL ou nome"""
         try:
             print("🔍 Validando duplicatas no banco de dados...")
             
-            # Busca todas as ferramentas
-            response = self.supabase.table('ai_tool').select('id, name, url').execute()
-            tools = response.data
+            # Busca todas as ferramentas (leitura paginada, não limitada pelo max-rows)
+            tools = KeysetPaginator(self.supabase, 'ai_tool', 'id, name, url').fetch_all()
             
             # Verifica duplicatas por URL
             url_duplicates = {}
@@ -480,17 +822,21 @@ class SupabaseMerger:
             return {'error': str(e)}
 
 
-def merge_tools_to_supabase(tools: List[AITool]) -> Dict[str, int]:
+def merge_tools_to_supabase(tools: List[AITool], bulk: bool = True) -> Dict[str, int]:
     """
     Função de conveniência para fazer merge das ferramentas no Supabase
     
     Args:
         tools: Lista de ferramentas para inserir/atualizar
+        bulk: Usa o caminho em lote (in_() + upsert em chunks) em vez de
+              requisições por ferramenta
         
     Returns:
         Dict com estatísticas da operação
     """
     merger = SupabaseMerger()
+    if bulk:
+        return merger.merge_and_upsert_tools_bulk(tools)
     return merger.merge_and_upsert_tools(tools)
 
 
@@ -10,15 +10,19 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import json
 
+from database.connection import get_connection_manager
+from database.ingest_log import ingest_lag, DEFAULT_LOG_DIR
+
 class ProgressMonitor:
-    def __init__(self, db_path='database/ai_tools.db'):
+    def __init__(self, db_path='database/ai_tools.db', ingest_log_dir=DEFAULT_LOG_DIR):
         self.db_path = db_path
+        self.ingest_log_dir = ingest_log_dir
+        self.connections = get_connection_manager(db_path)
     
     def get_stats(self):
         """Get current database statistics"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self.connections.connection()
             cursor = conn.cursor()
             
             # Total count
@@ -53,13 +57,12 @@ class ProgressMonitor:
             """)
             recent = [dict(row) for row in cursor.fetchall()]
             
-            conn.close()
-            
             return {
                 'total': total,
                 'domains': domains,
                 'sources': sources,
                 'recent': recent,
+                'ingest': ingest_lag(self.db_path, self.ingest_log_dir),
                 'timestamp': datetime.now().isoformat()
             }
             
@@ -99,6 +102,11 @@ class ProgressMonitor:
         for source, count in list(stats['sources'].items())[:5]:
             print(f"   {source}: {count:,} tools")
         
+        ingest = stats['ingest']
+        print(f"\n📥 INGEST LOG:")
+        print(f"   Pending: {ingest['pending_records']:,} records in {ingest['pending_segments']} segments")
+        print(f"   Drainer lag: {ingest['lag_seconds']:.1f}s")
+        
         if stats['recent']:
             print(f"\n🆕 RECENT ADDITIONS:")
             for tool in stats['recent'][:5]:
@@ -115,8 +123,7 @@ class ProgressMonitor:
     def export_for_frontend(self, output_file='frontend_data.json'):
         """Export data in format ready for frontend"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self.connections.connection()
             cursor = conn.cursor()
             
             # Get all tools with required fields
@@ -146,8 +153,6 @@ class ProgressMonitor:
                 tool['rank'] = i + 1
                 tools.append(tool)
             
-            conn.close()
-            
             # Export to JSON
             with open(output_file, 'w') as f:
                 json.dump({
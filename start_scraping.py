@@ -55,10 +55,11 @@ def show_menu():
     print("5. 📤 Export data for frontend")
     print("6. 🖥️  Start API server")
     print("7. 🌐 Test frontend")
+    print("8. 🚰 Start ingest log drainer")
     print("0. ❌ Exit")
     print()
     
-    choice = input("Choose option (0-7): ").strip()
+    choice = input("Choose option (0-8): ").strip()
     return choice
 
 def run_command(cmd, description):
@@ -151,8 +152,15 @@ def main():
             except Exception as e:
                 print("❌ API is not running. Please start it first (option 6)")
                 
+        elif choice == '8':
+            print("\n🚰 Starting ingest log drainer...")
+            print("Applies tools logged by the scrapers to the database")
+            print("Press Ctrl+C to stop the drainer")
+            input("\nPress Enter to start or Ctrl+C to cancel...")
+            run_command("python -m database.ingest_log drain", "Draining ingest log")
+            
         else:
-            print("❌ Invalid choice. Please enter 0-7.")
+            print("❌ Invalid choice. Please enter 0-8.")
         
         input("\nPress Enter to continue...")
 
@@ -11,6 +11,9 @@ connected in the graph and assigns a numeric strength based on:
 2. SEMANTIC SIMILARITY (0.4 weight):
    - TF-IDF cosine similarity on tool descriptions ∈ [0,1]
    - Only computed for pairs sharing overlapping keywords in categories
+   - Stop tokens ("general", "ai", "tools", ...) and broad keywords (in more
+     than MAX_KEYWORD_SHARE of the tools) only count when the descriptions
+     are similar too (similarity >= BROAD_KEYWORD_MIN_SIMILARITY)
 
 3. POPULARITY BOOST (0.2 weight):
    - pop_score = log1p(monthly_users_i) * log1p(monthly_users_j)
@@ -19,37 +22,131 @@ connected in the graph and assigns a numeric strength based on:
 4. FINAL STRENGTH:
    - strength = 0.4 * base_flag + 0.4 * semantic_sim + 0.2 * pop_score
    - Discard edges where strength < 0.25
+   - Keep each tool's top_k strongest edges (CANDIDATE_TOP_K); a pair is kept
+     if it is in the top k of either tool (sparsify='union', at most N * k
+     edges) or, with sparsify='mutual', of both tools (every degree <= k)
+   - Optionally keep only the edge_budget strongest edges overall
 
 PERFORMANCE OPTIMIZATION:
-- Avoids O(N²) complexity on 5k nodes by pre-filtering with keyword overlap
-- Uses sparse matrix operations for TF-IDF computation
+- Avoids O(N²) candidate sets: candidates come from a blocked top-k pass
+  (_top_k_candidate_pairs) that scores one block of tools against all tools
+  at a time (TOP_K_BLOCK_ELEMENTS scores per block) and keeps only the
+  top k per tool, never a set of all keyword-overlap pairs
+- Keeps the TF-IDF matrix sparse (CSR, L2-normalised rows) end to end:
+  memory scales with non-zeros, not N × vocabulary
+- Scores candidate pairs in vectorised blocks (SCORING_BLOCK_SIZE pairs):
+  row-wise sparse dot products of the TF-IDF rows for similarity,
+  array lookups for the domain flag and popularity term, one threshold
+  mask and one edge-type assignment per block
+- Threshold-aware pruning: base_flag and pop_score are exact array lookups,
+  so a pair whose strength cannot reach the threshold even with the
+  largest similarity its tools allow (norms, Hölder, max-weight terms) is
+  dropped before any similarity is computed; tools whose bound is below
+  BROAD_KEYWORD_MIN_SIMILARITY skip the top-k similarity products
+- Multi-process top-k pass: row blocks are scored in a ProcessPoolExecutor
+  (workers, --workers; one per CPU by default); the TF-IDF and keyword
+  matrices are written once as .npy files and memory-mapped read-only by
+  every worker, and block results are merged in block order, so the edges
+  do not depend on the worker count
+- Popularity min/max from the two smallest and two largest log1p values
+  (every pairwise product is non-negative), not from all N² products
+- Persistent vectoriser (VectorCache, --vector-cache): the fitted vocabulary
+  and IDF weights and every description's TF-IDF row are stored under
+  DEFAULT_CACHE_DIR keyed by a hash of the description; a run only
+  vectorises new or edited descriptions, and refits only when more than
+  refit_drift of the descriptions were not part of the last fit
+- Streaming hashed features (HashedFeaturizer, --hashed): hashing-trick
+  unigrams + bigrams instead of a fitted vocabulary, with a document-frequency
+  counter maintained per added, edited or deleted tool; descriptions are
+  streamed from the database in pages (iter_tool_descriptions), only edited
+  descriptions are hashed, and new tools never force a refit
 - Batch processing for database operations
+- Incremental runs (calculate_changed_edges, --incremental): tools whose
+  scoring inputs changed since the last run (hashes in
+  ai_synergy_tool_state) are rescored against every tool, and only the
+  edge inserts / updates / deletes incident to them are written:
+  O(changed × N) scores and O(changed × k) writes instead of a rebuild
 
 COMPLEXITY ANALYSIS:
 - Category filtering: O(N * avg_categories) 
+- Top-k candidates: O(N²) vectorised scores in bounded blocks, O(N * k) pairs kept
 - TF-IDF computation: O(M * vocab_size) where M << N²
+- Pair scoring: O(M * nnz per row) array operations, no per-pair Python calls
 - Database operations: O(M) where M is filtered pairs
 - Total: O(N * vocab_size + M) instead of O(N²)
 
 OUTPUT:
 - Upserts into ai_synergy(tool_id_1, tool_id_2, strength) with tool_id_1 < tool_id_2
-- Refreshes materialized view ai_tool_degree after insertion
+- Stores the scoring hash of every tool in ai_synergy_tool_state
+- Reports the degree distribution of the retained graph (stats['degree'])
+- ai_tool_degree (degree, weighted degree, per-edge-type counts) follows the
+  edges incrementally through triggers; no refresh after insertion
+
+STORAGE:
+- Reads tools and writes edges through a DatabaseAdapter: Supabase by default,
+  or SQLiteAdapter to score and serve the graph entirely locally:
+      python -m synergy.build_synergy --sqlite [--db database/ai_tools.db]
+  (which then publishes a read-only snapshot for the API, see database/snapshot.py)
 """
 
 import os
 import math
+import json
+import hashlib
+import tempfile
 import numpy as np
-from typing import List, Dict, Any, Tuple, Optional, Set
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Tuple, Optional, Set
 from collections import defaultdict, Counter
-from supabase import create_client, Client
 from dotenv import load_dotenv
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 from dataclasses import dataclass
+from scipy import sparse
+from database.adapters import DatabaseAdapter, SQLiteAdapter, SupabaseAdapter
+from synergy.hashed_features import DEFAULT_HASHED_DIR, DEFAULT_N_FEATURES, STREAM_PAGE_SIZE, HashedFeaturizer
+from synergy.vector_cache import DEFAULT_CACHE_DIR, DEFAULT_REFIT_DRIFT, VectorCache
 
 # Load environment variables
 load_dotenv()
 
+# Candidate pairs scored per vectorised block (bounds the temporary arrays)
+SCORING_BLOCK_SIZE = 65_536
+
+# Edge types by the codes the block classifier assigns
+EDGE_TYPES = ('same_domain', 'video_audio', 'semantic_similarity', 'weak')
+
+# Strongest edges kept per tool (None: every pair above the threshold)
+CANDIDATE_TOP_K = 50
+
+# Per-tool top-k sparsification: 'union' keeps a pair in the top k of either
+# tool, 'mutual' only pairs in the top k of both (degree <= k)
+SPARSIFY_MODES = ('union', 'mutual')
+
+# Scores held per block of the top-k pass (block rows = this // N)
+TOP_K_BLOCK_ELEMENTS = 4_000_000
+
+# Category words that say nothing about what a tool does
+CATEGORY_STOP_TOKENS = frozenset({
+    'ai', 'tool', 'tools', 'general', 'other', 'others', 'misc', 'miscellaneous',
+    'and', '&', 'for', 'of', 'the', 'with', '-', '/',
+})
+
+# Keywords in more of the tools than this are too broad (low IDF) to link a
+# pair on their own
+MAX_KEYWORD_SHARE = 0.2
+
+# Similarity a pair sharing only stop/broad keywords needs to stay a candidate.
+# Strong edges (>= 0.7) need similarity >= 0.25 anyway, so none are lost.
+BROAD_KEYWORD_MIN_SIMILARITY = 0.25
+
+# Slack for float error when an upper bound is compared to the threshold
+BOUND_TOLERANCE = 1e-9
+
+# Incremental runs fall back to a full rebuild when more of the tools changed
+INCREMENTAL_MAX_CHANGED_SHARE = 0.2
+
 
 @dataclass
 class ToolData:
@@ -63,18 +160,38 @@ class ToolData:
     popularity: float
 
 
+def scoring_hash(tool: ToolData) -> str:
+    """Hash of the fields edge scoring reads (order of categories ignored)"""
+    encoded = json.dumps(
+        [tool.description or '', tool.macro_domain or '', sorted(tool.categories or []), tool.monthly_users],
+        ensure_ascii=False, separators=(',', ':')
+    )
+    return hashlib.md5(encoded.encode('utf-8')).hexdigest()[:16]
+
+
 class EdgeScoringEngine:
     """Formal edge-scoring algorithm for AI tools graph"""
     
-    def __init__(self):
-        self.url = os.getenv("SUPABASE_URL")
-        self.key = os.getenv("SUPABASE_KEY")
-        
-        if not self.url or not self.key:
-            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env")
+    def __init__(self, adapter: Optional[DatabaseAdapter] = None,
+                 vector_cache: Optional[VectorCache] = None,
+                 featurizer: Optional[HashedFeaturizer] = None):
+        """
+        Args:
+            adapter: Where tools are read and edges written (Supabase from .env when omitted)
+            vector_cache: Stored vectoriser and description vectors (refit every run when omitted)
+            featurizer: Hashed featuriser streaming descriptions from the adapter,
+                        used instead of the TF-IDF vectoriser when given
+        """
+        if adapter is None:
+            if not os.getenv("SUPABASE_URL") or not os.getenv("SUPABASE_KEY"):
+                raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env")
+            adapter = SupabaseAdapter()
         
-        self.supabase: Client = create_client(self.url, self.key)
-        print(f"✅ Connected to Supabase for edge scoring")
+        self.adapter = adapter
+        self.vector_cache = vector_cache
+        self.featurizer = featurizer
+        backend = 'SQLite' if isinstance(adapter, SQLiteAdapter) else 'Supabase'
+        print(f"✅ Connected to {backend} for edge scoring")
         
         # Algorithm weights as specified
         self.BASE_WEIGHT = 0.4
@@ -93,18 +210,36 @@ class EdgeScoringEngine:
             lowercase=True,
             token_pattern=r'\b[a-zA-Z][a-zA-Z0-9]*\b'
         )
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Picklable for process-pool workers, which only need the scoring weights
+        and thresholds: the adapter (open connections), the vector cache, the
+        hashed featuriser (every tool's term counts) and the fitted vectoriser
+        stay behind
+        """
+        state = self.__dict__.copy()
+        for name in ('adapter', 'vector_cache', 'featurizer', 'tfidf_vectorizer'):
+            state[name] = None
+        return state
         
-    def calculate_all_edges(self, batch_size: int = 500) -> Dict[str, int]:
+    def calculate_all_edges(self, batch_size: int = 500, top_k: Optional[int] = CANDIDATE_TOP_K,
+                            workers: Optional[int] = None, sparsify: str = 'union',
+                            edge_budget: Optional[int] = None) -> Dict[str, Any]:
         """
         Calculate edges for all tools using the formal algorithm
         
         Args:
             batch_size: Size of batches for processing
+            top_k: Strongest edges kept per tool (None: every keyword-overlap pair)
+            workers: Processes for the top-k pass (None: one per CPU)
+            sparsify: Which top-k pairs survive, 'union' or 'mutual' (SPARSIFY_MODES)
+            edge_budget: Keep at most this many edges, the strongest (None: no budget)
             
         Returns:
-            Statistics about the edge calculation process
+            Statistics about the edge calculation process (degree: retained degree distribution)
         """
-        stats = {'calculated': 0, 'inserted': 0, 'filtered_out': 0, 'errors': 0}
+        stats = {'calculated': 0, 'inserted': 0, 'filtered_out': 0, 'pruned': 0, 'errors': 0}
         
         print("🔄 Starting formal edge-scoring algorithm...")
         
@@ -116,101 +251,374 @@ class EdgeScoringEngine:
         
         print(f"📊 Loaded {len(tools)} tools for analysis")
         
-        # 2. Clean existing synergies
-        self._cleanup_existing_synergies()
-        
-        # 3. Pre-filter tool pairs by category overlap (performance optimization)
-        candidate_pairs = self._filter_pairs_by_category_overlap(tools)
-        print(f"🔍 Filtered to {len(candidate_pairs)} candidate pairs (avoiding O(N²))")
-        
-        # 4. Compute TF-IDF matrix for semantic similarity
-        descriptions = [tool.description or '' for tool in tools]
-        tfidf_matrix = self._compute_tfidf_matrix(descriptions)
-        print(f"📈 Computed TF-IDF matrix: {tfidf_matrix.shape}")
+        # 2. Compute TF-IDF matrix for semantic similarity (a failure stops
+        #    here, before the stored graph is touched)
+        try:
+            tfidf_matrix = self._feature_matrix(tools)
+        except Exception as e:
+            stats['errors'] += 1
+            print(f"❌ Error computing description vectors, synergies left unchanged: {e}")
+            return stats
+        print(f"📈 Computed TF-IDF matrix: {tfidf_matrix.shape} ({tfidf_matrix.nnz:,} non-zeros)")
         
-        # 5. Calculate popularity normalization factors
+        # 3. Calculate popularity normalization factors
         pop_norm_factors = self._calculate_popularity_normalization(tools)
+        tool_arrays = self._tool_arrays(tools, pop_norm_factors, tfidf_matrix)
         
-        # 6. Process candidate pairs in batches
-        edges_to_insert = []
-        tool_id_to_index = {tool.id: i for i, tool in enumerate(tools)}
+        # 4. Candidate pairs: each tool's top k by strength, or every keyword-overlap pair
+        if top_k is not None:
+            candidate_pairs, stats['pruned'] = self._top_k_candidate_pairs(
+                tools, tfidf_matrix, tool_arrays, pop_norm_factors, top_k, workers=workers,
+                sparsify=sparsify, edge_budget=edge_budget
+            )
+            budget = f", budget {edge_budget}" if edge_budget is not None else ''
+            print(f"🔍 {len(candidate_pairs)} candidate pairs ({sparsify} top {top_k} per tool{budget}, "
+                  f"{stats['pruned']} pruned by upper bounds)")
+        else:
+            if sparsify != 'union' or edge_budget is not None:
+                print("⚠️ Sparsification needs top_k: keeping every keyword-overlap edge")
+            candidate_pairs = self._filter_pairs_by_category_overlap(tools)
+            print(f"🔍 Filtered to {len(candidate_pairs)} candidate pairs (avoiding O(N²))")
         
-        for i, (tool1_idx, tool2_idx) in enumerate(candidate_pairs):
-            try:
-                tool1, tool2 = tools[tool1_idx], tools[tool2_idx]
-                
-                # Calculate edge strength using formal algorithm
-                strength = self._calculate_edge_strength(
-                    tool1, tool2, 
-                    tfidf_matrix[tool1_idx], tfidf_matrix[tool2_idx],
-                    pop_norm_factors
-                )
-                
-                stats['calculated'] += 1
-                
-                # Filter by strength threshold
-                if strength >= self.STRENGTH_THRESHOLD:
-                    # Ensure tool_id_1 < tool_id_2 for consistent ordering
-                    tool_id_1 = min(tool1.id, tool2.id)
-                    tool_id_2 = max(tool1.id, tool2.id)
-                    
-                    # Classify edge type based on connection reason
-                    edge_type = self._classify_edge_type(
-                        tool1, tool2,
-                        tfidf_matrix[tool1_idx], tfidf_matrix[tool2_idx],
-                        strength
-                    )
-                    
-                    edges_to_insert.append({
-                        'tool_id_1': tool_id_1,
-                        'tool_id_2': tool_id_2,
-                        'strength': round(strength, 4),
-                        'edge_type': edge_type
-                    })
-                else:
-                    stats['filtered_out'] += 1
+        # 5. Clean existing synergies and write the new edges; one transaction
+        #    on SQLite, so readers keep the previous graph until it commits
+        #    (a failed write rolls it back and stops the rebuild). Without one
+        #    (Supabase) the stored state goes first: a rebuild that stops
+        #    halfway leaves no baseline, and the next run rebuilds again.
+        graph_touched = False
+        try:
+            with self.adapter.transaction():
+                self.adapter.save_synergy_state({}, replace=True)
+                graph_touched = True
+                self._cleanup_existing_synergies()
+            
+                # 6. Score candidate pairs in vectorised blocks
+                edges_to_insert = []
+                degree = Counter()
+                for block_edges in self._score_pairs(
+                    candidate_pairs, tools, tfidf_matrix, tool_arrays, pop_norm_factors, stats
+                ):
+                    edges_to_insert.extend(block_edges)
+                    degree.update(edge['tool_id_1'] for edge in block_edges)
+                    degree.update(edge['tool_id_2'] for edge in block_edges)
                 
-                # Batch insert for performance
-                if len(edges_to_insert) >= batch_size:
+                    # Batch insert for performance
+                    while len(edges_to_insert) >= batch_size:
+                        stats['inserted'] += self._batch_insert_edges(edges_to_insert[:batch_size])
+                        edges_to_insert = edges_to_insert[batch_size:]
+            
+                # Insert remaining edges
+                if edges_to_insert:
                     inserted = self._batch_insert_edges(edges_to_insert)
                     stats['inserted'] += inserted
-                    edges_to_insert = []
-                
-                # Progress reporting
-                if (i + 1) % 1000 == 0:
-                    progress = ((i + 1) / len(candidate_pairs)) * 100
-                    print(f"📈 Progress: {progress:.1f}% ({i + 1}/{len(candidate_pairs)} pairs)")
-                    
-            except Exception as e:
-                stats['errors'] += 1
-                print(f"❌ Error processing pair {tool1_idx}-{tool2_idx}: {e}")
-                continue
-        
-        # Insert remaining edges
-        if edges_to_insert:
-            inserted = self._batch_insert_edges(edges_to_insert)
-            stats['inserted'] += inserted
+            
+                # Baseline for later incremental runs, once every batch is written
+                # (a short or failed insert has raised by now). Pairs that failed to
+                # score are missing from the graph: store no baseline then, so
+                # the next --incremental run rebuilds instead of trusting it.
+                complete = stats['errors'] == 0
+                self.adapter.save_synergy_state(
+                    {tool.id: scoring_hash(tool) for tool in tools} if complete else {}, replace=True
+                )
+                if not complete:
+                    print(f"⚠️ {stats['errors']} pairs failed to score: synergy state cleared")
+        except Exception as e:
+            stats['errors'] += 1
+            if self.adapter.transactional:
+                outcome = "rolled back, previous graph kept"
+            elif graph_touched:
+                outcome = f"{stats['inserted']} edges written, graph incomplete; synergy state cleared"
+            else:
+                outcome = "previous graph kept"
+            print(f"❌ Edge rebuild aborted ({outcome}): {e}")
+            return stats
         
-        # 7. Refresh materialized view
+        # 7. Check the trigger-maintained degree aggregates
         self._refresh_materialized_view()
+        stats['degree'] = self._degree_distribution(degree, tools)
         
         print(f"\n🎯 Edge calculation complete:")
         print(f"   📊 Pairs calculated: {stats['calculated']}")
         print(f"   💾 Edges inserted: {stats['inserted']}")
         print(f"   🚫 Filtered out: {stats['filtered_out']}")
+        print(f"   ✂️ Pruned by upper bounds: {stats['pruned']}")
         print(f"   ❌ Errors: {stats['errors']}")
+        self._print_degree_distribution(stats['degree'])
         
         return stats
     
+    def calculate_changed_edges(self, tool_ids: Optional[Iterable[int]] = None, batch_size: int = 500,
+                                top_k: Optional[int] = CANDIDATE_TOP_K,
+                                workers: Optional[int] = None, sparsify: str = 'union',
+                                edge_budget: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Recompute only the edges incident to new, changed or deleted tools
+        
+        Changes are found by comparing scoring_hash of every tool with the
+        hashes the last run stored (ai_synergy_tool_state), or given as
+        tool_ids (ids no longer in ai_tool count as deleted). The changed
+        tools are scored against every tool; with top_k a pair is kept if it
+        is in the changed tool's top k, or in the partner's top k (ranked
+        with the partner's stored edges to unchanged tools).
+        The result is diffed with the stored edges of the changed tools,
+        and only the inserts, updates and deletes are written.
+        
+        Edges between unchanged tools keep the scores of the run that wrote
+        them (IDF and popularity range of that run); partners that lose an
+        edge are not back-filled. A full rebuild runs instead when there is
+        no stored state or more than INCREMENTAL_MAX_CHANGED_SHARE of the
+        tools changed. edge_budget is only enforced by full rebuilds (it
+        ranks every edge); incremental runs apply the per-tool sparsify mode.
+        
+        Args:
+            tool_ids: New, changed or deleted tool ids (None: detect by hash)
+            batch_size: Edges per write
+            top_k: Strongest edges kept per tool (None: every keyword-overlap pair)
+            workers: Processes for the top-k pass (None: one per CPU)
+            sparsify: Which top-k pairs survive, 'union' or 'mutual' (SPARSIFY_MODES)
+            edge_budget: Edge budget of the full rebuild this may fall back to
+            
+        Returns:
+            Statistics (calculated, inserted, updated, removed, ..., degree)
+        """
+        stats = {'calculated': 0, 'inserted': 0, 'updated': 0, 'removed': 0, 'unchanged': 0,
+                 'filtered_out': 0, 'pruned': 0, 'errors': 0, 'tools_changed': 0, 'tools_deleted': 0}
+        
+        print("🔄 Starting incremental edge scoring...")
+        
+        tools = self._load_all_tools()
+        if not tools:
+            print("⚠️ No tools found in database")
+            return stats
+        
+        hashes = {tool.id: scoring_hash(tool) for tool in tools}
+        state = self.adapter.load_synergy_state()
+        if not state:
+            print("ℹ️ No stored synergy state: running a full rebuild")
+            return self.calculate_all_edges(batch_size, top_k, workers, sparsify, edge_budget)
+        
+        # 1. New, changed and deleted tools
+        deleted = {tool_id for tool_id in state if tool_id not in hashes}
+        if tool_ids is None:
+            changed = {tool_id for tool_id, value in hashes.items() if state.get(tool_id) != value}
+        else:
+            tool_ids = set(tool_ids)
+            changed = {tool_id for tool_id in tool_ids if tool_id in hashes}
+            changed |= {tool_id for tool_id in hashes if tool_id not in state}
+            deleted |= {tool_id for tool_id in tool_ids if tool_id not in hashes}
+        stats['tools_changed'], stats['tools_deleted'] = len(changed), len(deleted)
+        print(f"📊 {len(tools)} tools: {len(changed)} new or changed, {len(deleted)} deleted")
+        
+        if not changed and not deleted:
+            print("✅ Synergies are up to date")
+            return stats
+        if len(changed) > INCREMENTAL_MAX_CHANGED_SHARE * len(tools):
+            print(f"ℹ️ More than {INCREMENTAL_MAX_CHANGED_SHARE:.0%} of the tools changed: running a full rebuild")
+            return self.calculate_all_edges(batch_size, top_k, workers, sparsify, edge_budget)
+        
+        # 2. Vectors and per-tool arrays over every tool (changed tools are scored against all of them)
+        try:
+            tfidf_matrix = self._feature_matrix(tools)
+        except Exception as e:
+            stats['errors'] += 1
+            print(f"❌ Error computing description vectors, synergies left unchanged: {e}")
+            return stats
+        if self.featurizer is None and self.vector_cache is not None and self.vector_cache.refitted:
+            print("ℹ️ Vectoriser refitted (IDF weights changed): running a full rebuild")
+            return self.calculate_all_edges(batch_size, top_k, workers, sparsify, edge_budget)
+        pop_norm_factors = self._calculate_popularity_normalization(tools)
+        tool_arrays = self._tool_arrays(tools, pop_norm_factors, tfidf_matrix)
+        index = {tool.id: i for i, tool in enumerate(tools)}
+        rows = np.array(sorted(index[tool_id] for tool_id in changed), dtype=np.int64)
+        
+        # 3. Candidate pairs of the changed tools
+        touched = changed | deleted
+        existing = self.adapter.load_synergies()
+        if len(rows) == 0:
+            candidate_pairs = []
+        elif top_k is not None:
+            candidate_pairs, stats['pruned'] = self._top_k_candidate_pairs(
+                tools, tfidf_matrix, tool_arrays, pop_norm_factors, top_k,
+                rows=rows, partner_edges=self._partner_edges(existing, index, touched, top_k), workers=workers,
+                sparsify=sparsify
+            )
+        else:
+            candidate_pairs = self._overlap_pairs_for_rows(tools, rows)
+        print(f"🔍 {len(candidate_pairs)} candidate pairs incident to changed tools")
+        
+        # 4. Score them and diff with the stored edges of the changed and deleted tools
+        new_edges = {}
+        for block_edges in self._score_pairs(
+            candidate_pairs, tools, tfidf_matrix, tool_arrays, pop_norm_factors, stats
+        ):
+            for edge in block_edges:
+                new_edges[(edge['tool_id_1'], edge['tool_id_2'])] = edge
+        
+        old_edges = {
+            (edge['tool_id_1'], edge['tool_id_2']): edge for edge in existing
+            if edge['tool_id_1'] in touched or edge['tool_id_2'] in touched
+        }
+        inserts = [edge for pair, edge in new_edges.items() if pair not in old_edges]
+        updates = [
+            dict(edge, id=old_edges[pair]['id']) for pair, edge in new_edges.items()
+            if pair in old_edges and (old_edges[pair]['strength'], old_edges[pair]['edge_type'])
+            != (edge['strength'], edge['edge_type'])
+        ]
+        deletes = [edge['id'] for pair, edge in old_edges.items() if pair not in new_edges]
+        stats['unchanged'] = len(new_edges) - len(inserts) - len(updates)
+        
+        # 5. Write the diff and the new hashes together; the hashes only after
+        #    every write (changed tools whose pairs failed to score stay changed).
+        #    A failed or short write raises before the hashes are saved, so
+        #    without a transaction the tools stay changed and the next run
+        #    diffs them again against whatever was written.
+        try:
+            with self.adapter.transaction():
+                for start in range(0, len(deletes), batch_size):
+                    stats['removed'] += self._batch_delete_edges(deletes[start:start + batch_size])
+                for start in range(0, len(updates), batch_size):
+                    stats['updated'] += self._batch_update_edges(updates[start:start + batch_size])
+                for start in range(0, len(inserts), batch_size):
+                    stats['inserted'] += self._batch_insert_edges(inserts[start:start + batch_size])
+                self.adapter.save_synergy_state(
+                    {tool_id: hashes[tool_id] for tool_id in changed} if not stats['errors'] else {},
+                    removed=sorted(deleted)
+                )
+        except Exception as e:
+            stats['errors'] += 1
+            outcome = ("rolled back" if self.adapter.transactional
+                       else "partly written, changed tools left to the next run")
+            print(f"❌ Incremental edge update aborted ({outcome}): {e}")
+            return stats
+        
+        self._refresh_materialized_view()
+        retained = [pair for pair in ((edge['tool_id_1'], edge['tool_id_2']) for edge in existing)
+                    if pair not in old_edges or pair in new_edges]
+        retained.extend(pair for pair in new_edges if pair not in old_edges)
+        stats['degree'] = self._degree_distribution(Counter(tool_id for pair in retained for tool_id in pair), tools)
+        
+        print(f"\n🎯 Incremental edge update complete:")
+        print(f"   📊 Pairs calculated: {stats['calculated']}")
+        print(f"   ➕ Edges inserted: {stats['inserted']}")
+        print(f"   🔁 Edges updated: {stats['updated']} ({stats['unchanged']} unchanged)")
+        print(f"   ➖ Edges removed: {stats['removed']}")
+        print(f"   ✂️ Pruned by upper bounds: {stats['pruned']}")
+        print(f"   ❌ Errors: {stats['errors']}")
+        self._print_degree_distribution(stats['degree'])
+        
+        return stats
+    
+    def _degree_distribution(self, degree: Counter, tools: List[ToolData]) -> Dict[str, Any]:
+        """Summary of the edges per tool (tool id -> degree) over every tool, isolated ones included"""
+        degrees = np.array([degree.get(tool.id, 0) for tool in tools], dtype=np.int64)
+        if len(degrees) == 0:
+            return {}
+        p50, p90, p99 = np.percentile(degrees, [50, 90, 99])
+        return {
+            'tools': len(degrees),
+            'isolated': int((degrees == 0).sum()),
+            'mean': round(float(degrees.mean()), 2),
+            'median': float(p50),
+            'p90': float(p90),
+            'p99': float(p99),
+            'max': int(degrees.max()),
+        }
+    
+    def _print_degree_distribution(self, distribution: Dict[str, Any]) -> None:
+        if distribution:
+            print(f"   🕸️ Degree: mean {distribution['mean']}, median {distribution['median']:g}, "
+                  f"p90 {distribution['p90']:g}, p99 {distribution['p99']:g}, max {distribution['max']} "
+                  f"({distribution['isolated']} isolated tools)")
+    
+    def _partner_edges(self, edges: List[Dict[str, Any]], index: Dict[int, int],
+                       touched: Set[int], top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (tool rows, strengths) of the top_k strongest stored edges of every
+        untouched tool, counting only edges between untouched tools
+        """
+        ends1, ends2, strengths = [], [], []
+        for edge in edges:
+            id1, id2 = edge['tool_id_1'], edge['tool_id_2']
+            if id1 in index and id2 in index and id1 not in touched and id2 not in touched:
+                ends1.append(index[id1])
+                ends2.append(index[id2])
+                strengths.append(edge['strength'])
+        
+        owners = np.concatenate([ends1, ends2]).astype(np.int64)
+        strength = np.tile(np.asarray(strengths, dtype=np.float64), 2)
+        order = np.lexsort((-strength, owners))
+        owners, strength = owners[order], strength[order]
+        top = np.arange(len(owners)) - np.searchsorted(owners, owners, side='left') < top_k
+        return owners[top], strength[top]
+    
+    def _overlap_pairs_for_rows(self, tools: List[ToolData], rows: np.ndarray) -> List[Tuple[int, int]]:
+        """_filter_pairs_by_category_overlap restricted to pairs with one end in rows"""
+        n = len(tools)
+        keywords, _ = self._category_keyword_matrices(tools)
+        shared = (keywords[rows] @ keywords.T).tocoo()
+        first, second = rows[shared.row], shared.col.astype(np.int64)
+        not_self = first != second
+        first, second = first[not_self], second[not_self]
+        codes = np.unique(np.minimum(first, second) * n + np.maximum(first, second))
+        return list(zip((codes // n).tolist(), (codes % n).tolist()))
+    
+    def _score_pairs(self, candidate_pairs: List[Tuple[int, int]], tools: List[ToolData],
+                     tfidf_matrix: sparse.csr_matrix, tool_arrays: Dict[str, np.ndarray],
+                     pop_norm_factors: Dict[str, Any], stats: Dict[str, int]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Score candidate pairs in SCORING_BLOCK_SIZE blocks
+        
+        Yields the above-threshold edges of each block (tool ids, strength,
+        edge_type) and counts calculated / filtered_out / errors in stats.
+        """
+        tool_ids = [tool.id for tool in tools]
+        pairs = np.asarray(candidate_pairs, dtype=np.int64).reshape(-1, 2)
+        
+        for start in range(0, len(pairs), SCORING_BLOCK_SIZE):
+            rows1 = pairs[start:start + SCORING_BLOCK_SIZE, 0]
+            rows2 = pairs[start:start + SCORING_BLOCK_SIZE, 1]
+            edges = []
+            try:
+                strength, semantic_sim = self._score_pair_block(
+                    rows1, rows2, tfidf_matrix, tool_arrays, pop_norm_factors
+                )
+                
+                # Filter by strength threshold
+                keep = strength >= self.STRENGTH_THRESHOLD
+                edge_types = self._classify_edge_types(rows1[keep], rows2[keep], semantic_sim[keep], tool_arrays)
+                
+                for idx1, idx2, edge_strength, edge_type in zip(
+                    rows1[keep].tolist(), rows2[keep].tolist(),
+                    strength[keep].tolist(), edge_types.tolist()
+                ):
+                    # Ensure tool_id_1 < tool_id_2 for consistent ordering
+                    id1, id2 = tool_ids[idx1], tool_ids[idx2]
+                    edges.append({
+                        'tool_id_1': min(id1, id2),
+                        'tool_id_2': max(id1, id2),
+                        'strength': round(edge_strength, 4),
+                        'edge_type': EDGE_TYPES[edge_type]
+                    })
+                
+                stats['calculated'] += len(rows1)
+                stats['filtered_out'] += len(rows1) - int(keep.sum())
+                
+            except Exception as e:
+                stats['errors'] += len(rows1)
+                print(f"❌ Error scoring pairs {start}-{start + SCORING_BLOCK_SIZE}: {e}")
+                continue
+            
+            yield edges
+            
+            # Progress reporting
+            done = min(len(pairs), start + SCORING_BLOCK_SIZE)
+            print(f"📈 Progress: {done / len(pairs) * 100:.1f}% ({done}/{len(pairs)} pairs)")
+    
     def _load_all_tools(self) -> List[ToolData]:
         """Load all tools from database"""
         try:
-            response = self.supabase.table('ai_tool').select(
-                'id, name, description, macro_domain, categories, monthly_users, popularity'
-            ).execute()
-            
             tools = []
-            for item in response.data:
+            for item in self.adapter.load_scoring_tools():
                 tools.append(ToolData(
                     id=item['id'],
                     name=item.get('name', ''),
@@ -261,45 +669,332 @@ class EdgeScoringEngine:
         
         return list(candidate_pairs)
     
-    def _compute_tfidf_matrix(self, descriptions: List[str]) -> np.ndarray:
-        """Compute TF-IDF matrix for all tool descriptions"""
-        try:
-            # Clean descriptions
-            cleaned_descriptions = []
-            for desc in descriptions:
-                if desc and isinstance(desc, str):
-                    cleaned_descriptions.append(desc.strip())
-                else:
-                    cleaned_descriptions.append('')
-            
-            # Fit and transform
-            tfidf_matrix = self.tfidf_vectorizer.fit_transform(cleaned_descriptions)
-            return tfidf_matrix.toarray()
-            
-        except Exception as e:
-            print(f"❌ Error computing TF-IDF matrix: {e}")
-            # Return zero matrix as fallback
-            return np.zeros((len(descriptions), 100))
-    
-    def _calculate_popularity_normalization(self, tools: List[ToolData]) -> Dict[str, float]:
-        """Calculate popularity normalization factors"""
-        # Compute log1p(monthly_users) for all tools
-        log_users = []
-        for tool in tools:
-            users = tool.monthly_users or 0
-            log_users.append(math.log1p(users))
-        
-        # Calculate all pairwise products for normalization
-        products = []
-        for i in range(len(log_users)):
-            for j in range(i + 1, len(log_users)):
-                products.append(log_users[i] * log_users[j])
-        
-        if not products:
-            return {'min_product': 0.0, 'max_product': 1.0}
-        
-        min_product = min(products)
-        max_product = max(products)
+    def _category_keyword_matrices(self, tools: List[ToolData]) -> Tuple[sparse.csr_matrix, sparse.csr_matrix]:
+        """
+        Tool × keyword incidence of the category words, as CSR
+        
+        Returns:
+            (every keyword, informative keywords only): the second drops
+            CATEGORY_STOP_TOKENS and keywords in more than MAX_KEYWORD_SHARE
+            of the tools
+        """
+        keyword_ids: Dict[str, int] = {}
+        rows, cols = [], []
+        for i, tool in enumerate(tools):
+            keywords = {keyword for category in tool.categories or [] for keyword in category.lower().split()}
+            for keyword in keywords:
+                rows.append(i)
+                cols.append(keyword_ids.setdefault(keyword, len(keyword_ids)))
+        
+        incidence = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(len(tools), len(keyword_ids))
+        )
+        document_frequency = np.asarray(incidence.sum(axis=0)).ravel()
+        informative = document_frequency <= max(2, MAX_KEYWORD_SHARE * len(tools))
+        for keyword, column in keyword_ids.items():
+            if keyword in CATEGORY_STOP_TOKENS:
+                informative[column] = False
+        return incidence, incidence @ sparse.diags(informative.astype(np.float32))
+    
+    def _top_k_candidate_pairs(self, tools: List[ToolData], tfidf_matrix: sparse.csr_matrix,
+                               tool_arrays: Dict[str, np.ndarray], pop_norm_factors: Dict[str, Any],
+                               top_k: int, rows: Optional[np.ndarray] = None,
+                               partner_edges: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                               workers: Optional[int] = None, sparsify: str = 'union',
+                               edge_budget: Optional[int] = None) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        The top_k strongest above-threshold pairs of every tool, as (i, j) with i < j
+        
+        Blocked sparse top-k: a block of tools is scored against every tool
+        (TF-IDF products, keyword overlaps and the strength formula over
+        TOP_K_BLOCK_ELEMENTS scores at most), then only each row's top k
+        survive. Eligible pairs share an informative category keyword, or
+        any category keyword plus BROAD_KEYWORD_MIN_SIMILARITY similarity.
+        A pair in either tool's top k is kept (sparsify='union': at most
+        N * top_k pairs), or only one in the top k of both tools
+        (sparsify='mutual': every tool keeps at most top_k). Each end
+        contributes a kept pair once, so mutual pairs are the codes
+        contributed twice. edge_budget then keeps the strongest pairs.
+        
+        Bounds skip work that cannot produce a kept pair: only tools whose
+        term bound reaches BROAD_KEYWORD_MIN_SIMILARITY enter the similarity
+        products, and an eligible pair is never scored when its strength
+        upper bound stays below the threshold or below its row's k-th best
+        lower bound (see _strength_bounds); k pairs are then known to
+        outrank it.
+        
+        Args:
+            rows: Only rank the pairs of these tools (incremental runs; default all)
+            partner_edges: (tool rows, strengths) of the stored edges of the
+                           tools outside rows, at most top_k per tool. A pair
+                           outside its row's top k is also kept when it ranks
+                           in the partner's top k among these edges and the
+                           new pairs of that partner.
+            workers: Processes scoring the row blocks (None: one per CPU, 1: in process)
+            sparsify: 'union' or 'mutual' (SPARSIFY_MODES)
+            edge_budget: Keep at most this many pairs, the strongest (ties: lower pair first)
+        
+        Returns:
+            (candidate pairs, number of eligible pairs pruned by the bounds)
+        """
+        if sparsify not in SPARSIFY_MODES:
+            raise ValueError(f"sparsify must be one of {SPARSIFY_MODES}, not {sparsify!r}")
+        n = len(tools)
+        if n < 2 or top_k <= 0:
+            return [], 0
+        
+        keywords, informative_keywords = self._category_keyword_matrices(tools)
+        
+        # Tools that cannot reach the similarity bar with anyone drop out of the products
+        can_be_similar = tool_arrays['term_bound'] >= BROAD_KEYWORD_MIN_SIMILARITY - BOUND_TOLERANCE
+        similarity_rows = sparse.diags(can_be_similar.astype(np.float64)) @ tfidf_matrix
+        similarity_rows.eliminate_zeros()
+        block = max(1, TOP_K_BLOCK_ELEMENTS // n)
+        if rows is None:
+            rows = np.arange(n, dtype=np.int64)
+        in_rows = np.zeros(n, dtype=bool)
+        in_rows[rows] = True
+        
+        # Read-only inputs of every block (memory-mapped by the worker processes)
+        inputs = {
+            'tfidf': tfidf_matrix,
+            'similarity_rows': similarity_rows,
+            'similarity_t': similarity_rows.T.tocsr(),
+            'keywords': keywords,
+            'informative': informative_keywords,
+            'informative_t': informative_keywords.T.tocsr(),
+            'in_rows': in_rows,
+            'tool_arrays': tool_arrays,
+        }
+        blocks = [rows[start:start + block] for start in range(0, len(rows), block)]
+        results = self._map_row_blocks(
+            blocks, inputs, pop_norm_factors, top_k, partner_edges is not None, workers
+        )
+        
+        # Merge in block order, so the result does not depend on the worker count
+        kept = [result[0] for result in results]
+        kept_strength = [result[1] for result in results]
+        pruned = sum(result[4] for result in results)
+        if partner_edges is not None and results:
+            partner_codes, partner_strength = self._partner_top_k(
+                np.concatenate([result[2] for result in results]),
+                np.concatenate([result[3] for result in results]),
+                partner_edges, in_rows, top_k
+            )
+            kept.append(partner_codes)
+            kept_strength.append(partner_strength)
+        
+        if not kept:
+            return [], pruned
+        codes, first, ends = np.unique(np.concatenate(kept), return_index=True, return_counts=True)
+        strength = np.concatenate(kept_strength)[first]
+        if sparsify == 'mutual':
+            codes, strength = codes[ends == 2], strength[ends == 2]
+        if edge_budget is not None and len(codes) > edge_budget:
+            codes = np.sort(codes[np.lexsort((codes, -strength))[:max(0, edge_budget)]])
+        return list(zip((codes // n).tolist(), (codes % n).tolist())), pruned
+    
+    def _map_row_blocks(self, blocks: List[np.ndarray], inputs: Dict[str, Any], pop_norm_factors: Dict[str, Any],
+                        top_k: int, with_partners: bool, workers: Optional[int]) -> List[Tuple]:
+        """
+        _top_k_block over every row block, in a process pool when there are several blocks
+        
+        The inputs are written once to .npy files in a temporary directory and
+        memory-mapped read-only by each worker, so they are shared through the
+        page cache instead of being pickled per block. Results come back in
+        block order.
+        """
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        if workers <= 1 or len(blocks) <= 1:
+            return [self._top_k_block(rows, inputs, pop_norm_factors, top_k, with_partners) for rows in blocks]
+        
+        with tempfile.TemporaryDirectory(prefix='synergy_shards_') as directory:
+            spec = _write_shared(inputs, directory)
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(blocks)), initializer=_init_shard_worker,
+                initargs=(self, spec, pop_norm_factors, top_k, with_partners)
+            ) as pool:
+                return list(pool.map(_top_k_shard, blocks))
+    
+    def _top_k_block(self, block_rows: np.ndarray, inputs: Dict[str, Any], pop_norm_factors: Dict[str, Any],
+                     top_k: int, with_partners: bool
+                     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, int]:
+        """
+        One row block of _top_k_candidate_pairs
+        
+        Returns:
+            (kept pair codes low * n + high, their strengths, codes of the
+            pairs whose partner is outside the scored rows, those pairs'
+            strengths, pairs pruned by the bounds)
+        """
+        tfidf_matrix, keywords, tool_arrays = inputs['tfidf'], inputs['keywords'], inputs['tool_arrays']
+        n = tfidf_matrix.shape[0]
+        empty = np.zeros(0, dtype=np.int64)
+        
+        # Pairs sharing an informative keyword, whatever their similarity
+        shared = (inputs['informative'][block_rows] @ inputs['informative_t']).tocoo()
+        shared_codes = block_rows[shared.row] * n + shared.col
+        
+        # Similar pairs (dot products of the block against every tool) that
+        # share any keyword count when they reach BROAD_KEYWORD_MIN_SIMILARITY
+        similar = (inputs['similarity_rows'][block_rows] @ inputs['similarity_t']).tocsr()
+        similar_rows = np.repeat(block_rows, np.diff(similar.indptr))
+        strong = (similar.data >= BROAD_KEYWORD_MIN_SIMILARITY) & (similar_rows != similar.indices)
+        broad = similar_rows[strong] * n + similar.indices[strong]
+        broad_similarity = similar.data[strong]
+        if len(broad):
+            broad_rows, broad_cols = broad // n, broad % n
+            shares_any = np.asarray(
+                keywords[broad_rows].multiply(keywords[broad_cols]).sum(axis=1)
+            ).ravel() > 0
+            broad, broad_similarity = broad[shares_any], broad_similarity[shares_any]
+        
+        codes = np.union1d(shared_codes, broad)
+        rows_global, cols = codes // n, codes % n
+        not_self = rows_global != cols
+        codes, rows_global, cols = codes[not_self], rows_global[not_self], cols[not_self]
+        if len(codes) == 0:
+            return empty, np.zeros(0), empty, np.zeros(0), 0
+        
+        # What the products already tell about each similarity: broad pairs
+        # carry theirs, and every other eligible pair shares a keyword, so it
+        # stayed below BROAD_KEYWORD_MIN_SIMILARITY (or one of its tools
+        # could not reach it and was left out of the products)
+        similarity_low = np.zeros(len(codes))
+        similarity_high = np.full(len(codes), BROAD_KEYWORD_MIN_SIMILARITY + BOUND_TOLERANCE)
+        at = np.searchsorted(codes, broad)
+        similarity_low[at] = similarity_high[at] = np.clip(broad_similarity, 0.0, 1.0)
+        lower, upper = self._strength_bounds(
+            rows_global, cols, tool_arrays, pop_norm_factors, similarity_low, similarity_high
+        )
+        
+        # Skip pairs that cannot reach the threshold, or that k pairs of their
+        # row provably outrank: the row's k-th largest lower bound is above
+        # their upper bound (pairs kept for a partner outside the rows are
+        # ranked by that partner, so they only face the threshold)
+        order = np.lexsort((-lower, rows_global))
+        rank = np.arange(len(order)) - np.searchsorted(rows_global[order], rows_global[order], side='left')
+        kth = order[rank == top_k - 1]
+        kth_lower = np.full(n, -np.inf)
+        kth_lower[rows_global[kth]] = lower[kth]
+        outranked = upper < kth_lower[rows_global] - BOUND_TOLERANCE
+        if with_partners:
+            outranked &= inputs['in_rows'][cols]
+        reachable = (upper >= self.STRENGTH_THRESHOLD - BOUND_TOLERANCE) & ~outranked
+        pruned = len(codes) - int(reachable.sum())
+        rows_global, cols = rows_global[reachable], cols[reachable]
+        
+        strength, _ = self._score_pair_block(rows_global, cols, tfidf_matrix, tool_arrays, pop_norm_factors)
+        above = strength >= self.STRENGTH_THRESHOLD
+        rows_global, cols, strength = rows_global[above], cols[above], strength[above]
+        
+        # Rank within each row by strength (ties: lower column first)
+        order = np.lexsort((cols, -strength, rows_global))
+        rows_global, cols, strength = rows_global[order], cols[order], strength[order]
+        row_starts = np.searchsorted(rows_global, rows_global, side='left')
+        top = np.arange(len(rows_global)) - row_starts < top_k
+        low = np.minimum(rows_global, cols)
+        high = np.maximum(rows_global, cols)
+        
+        if not with_partners:
+            return low[top] * n + high[top], strength[top], empty, np.zeros(0), pruned
+        outside = ~inputs['in_rows'][cols]
+        return (low[top] * n + high[top], strength[top],
+                low[outside] * n + high[outside], strength[outside], pruned)
+    
+    def _partner_top_k(self, codes: np.ndarray, strength: np.ndarray,
+                       partner_edges: Tuple[np.ndarray, np.ndarray], in_rows: np.ndarray,
+                       top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        New pairs (low * n + high codes, strengths) that rank in the top k of their end outside the scored rows
+        
+        Each partner's stored edges and its new pairs are ranked together by
+        strength (stored edges first on ties); new pairs within the first
+        top_k are kept.
+        """
+        n = len(in_rows)
+        low, high = codes // n, codes % n
+        partners = np.where(in_rows[low], high, low)
+        owners = np.concatenate([partner_edges[0], partners])
+        strengths = np.concatenate([partner_edges[1], strength])
+        is_new = np.concatenate([np.zeros(len(partner_edges[0]), dtype=bool), np.ones(len(codes), dtype=bool)])
+        new_codes = np.concatenate([np.full(len(partner_edges[0]), -1, dtype=np.int64), codes])
+        
+        order = np.lexsort((is_new, -strengths, owners))
+        owners, is_new, new_codes, strengths = owners[order], is_new[order], new_codes[order], strengths[order]
+        rank = np.arange(len(owners)) - np.searchsorted(owners, owners, side='left')
+        kept = is_new & (rank < top_k)
+        return new_codes[kept], strengths[kept]
+    
+    def _feature_matrix(self, tools: List[ToolData]) -> sparse.csr_matrix:
+        """
+        Description vectors of the tools, one L2-normalised CSR row each
+        
+        Hashed features streamed from the adapter when a featuriser is set
+        (no fit: new tools only update its document frequencies), otherwise
+        the TF-IDF matrix of the loaded descriptions.
+        
+        Errors propagate: scoring with zeroed similarities would replace
+        the whole graph with a wrong one.
+        """
+        if self.featurizer is None:
+            return self._compute_tfidf_matrix([tool.description or '' for tool in tools])
+        
+        feature_stats = self.featurizer.update(self.adapter.iter_tool_descriptions(STREAM_PAGE_SIZE))
+        print(f"#️⃣ Hashed features: {feature_stats['hashed']} hashed, {feature_stats['reused']} reused, "
+              f"{feature_stats['removed']} removed ({feature_stats['elapsed_s']}s)")
+        return self.featurizer.matrix([tool.id for tool in tools])
+    
+    def _compute_tfidf_matrix(self, descriptions: List[str]) -> sparse.csr_matrix:
+        """
+        Compute TF-IDF matrix for all tool descriptions
+        
+        Kept sparse (CSR): memory follows the non-zeros instead of
+        N × vocabulary, and rows are L2-normalised so a row dot product is
+        the cosine similarity. With a vector cache, stored rows are reused
+        and only new descriptions are vectorised. Errors propagate (see
+        _feature_matrix); only descriptions without a single term give an
+        all-zero matrix.
+        """
+        # Clean descriptions
+        cleaned_descriptions = []
+        for desc in descriptions:
+            if desc and isinstance(desc, str):
+                cleaned_descriptions.append(desc.strip())
+            else:
+                cleaned_descriptions.append('')
+        
+        if not any(cleaned_descriptions):
+            return sparse.csr_matrix((len(descriptions), 100))
+        
+        if self.vector_cache is not None:
+            tfidf_matrix = self.vector_cache.transform(cleaned_descriptions, self.tfidf_vectorizer)
+            cache_stats = self.vector_cache.last_stats
+            action = 'refitted' if cache_stats['refitted'] else f"{cache_stats['reused']} reused"
+            print(f"🗃️ Vector cache: {action}, {cache_stats['vectorised']} vectorised "
+                  f"(drift {cache_stats['drift']:.1%}, {cache_stats['elapsed_s']}s)")
+            return tfidf_matrix
+        
+        # Fit and transform
+        tfidf_matrix = self.tfidf_vectorizer.fit_transform(cleaned_descriptions).tocsr()
+        return normalize(tfidf_matrix, norm='l2', copy=False)
+    
+    def _calculate_popularity_normalization(self, tools: List[ToolData]) -> Dict[str, Any]:
+        """
+        Calculate popularity normalization factors
+        
+        Min and max of log1p(users_i) * log1p(users_j) over all pairs i < j.
+        The factors are non-negative, so they are the products of the two
+        smallest and of the two largest values.
+        """
+        log_users = np.log1p(np.array([tool.monthly_users or 0 for tool in tools], dtype=np.float64))
+        
+        if len(log_users) < 2:
+            return {'min_product': 0.0, 'max_product': 1.0, 'log_users': log_users}
+        
+        ordered = np.sort(log_users)
+        min_product = float(ordered[0] * ordered[1])
+        max_product = float(ordered[-1] * ordered[-2])
         
         # Avoid division by zero
         if max_product == min_product:
@@ -311,6 +1006,144 @@ class EdgeScoringEngine:
             'log_users': log_users
         }
     
+    def _tool_arrays(self, tools: List[ToolData], pop_norm_factors: Dict[str, Any],
+                     tfidf_matrix: sparse.csr_matrix) -> Dict[str, np.ndarray]:
+        """Per-tool arrays the block scorer and the upper bounds index by pair rows"""
+        domain_codes: Dict[str, int] = {}
+        domains = np.array([
+            domain_codes.setdefault(tool.macro_domain, len(domain_codes)) if tool.macro_domain else -1
+            for tool in tools
+        ], dtype=np.int64)
+        multimedia = np.array([
+            bool(tool.macro_domain) and tool.macro_domain.upper() in self.MULTIMEDIA_DOMAINS
+            for tool in tools
+        ], dtype=bool)
+        has_users = np.array([tool.monthly_users is not None for tool in tools], dtype=bool)
+        
+        # Similarity bounds: row norms and each term's largest weight in any tool
+        weights = abs(tfidf_matrix)
+        term_max = weights.max(axis=0).toarray().ravel()
+        
+        return {
+            'domain': domains,
+            'multimedia': multimedia,
+            'has_users': has_users,
+            'log_users': pop_norm_factors['log_users'],
+            'norm': np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).ravel()),
+            'l1': np.asarray(weights.sum(axis=1)).ravel(),
+            'max_weight': weights.max(axis=1).toarray().ravel(),
+            'term_bound': weights @ term_max
+        }
+    
+    def _pair_similarities(self, tfidf_matrix: sparse.csr_matrix, rows1: np.ndarray,
+                           rows2: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of many row pairs: dot products of the L2-normalised TF-IDF rows
+        
+        Row slices and their elementwise product stay CSR, so a block costs
+        O(non-zeros of its rows), never a dense copy.
+        """
+        products = tfidf_matrix[rows1].multiply(tfidf_matrix[rows2])
+        return np.asarray(products.sum(axis=1)).ravel()
+    
+    def _base_and_popularity(self, rows1: np.ndarray, rows2: np.ndarray, tool_arrays: Dict[str, np.ndarray],
+                             pop_norm_factors: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact base_flag and pop_score of many pairs (array lookups only)"""
+        domains = tool_arrays['domain']
+        multimedia = tool_arrays['multimedia']
+        base_flag = (
+            ((domains[rows1] == domains[rows2]) & (domains[rows1] >= 0)) |
+            (multimedia[rows1] & multimedia[rows2])
+        ).astype(np.float64)
+        
+        log_users = tool_arrays['log_users']
+        min_product = pop_norm_factors['min_product']
+        max_product = pop_norm_factors['max_product']
+        pop_score = np.clip(
+            (log_users[rows1] * log_users[rows2] - min_product) / (max_product - min_product), 0.0, 1.0
+        )
+        pop_score[~(tool_arrays['has_users'][rows1] & tool_arrays['has_users'][rows2])] = 0.0
+        return base_flag, pop_score
+    
+    def _similarity_upper_bound(self, rows1: np.ndarray, rows2: np.ndarray,
+                                tool_arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Upper bound of the TF-IDF similarity of many pairs, from per-tool values only
+        
+        min(1, |x_i|₂|x_j|₂, |x_i|∞|x_j|₁, |x_i|₁|x_j|∞, x_i·m, x_j·m), where m
+        holds each term's largest weight in any tool (Cauchy-Schwarz, Hölder
+        and the max-weight-term bound). Tools without terms bound to 0.
+        """
+        norm, l1, max_weight, term_bound = (
+            tool_arrays['norm'], tool_arrays['l1'], tool_arrays['max_weight'], tool_arrays['term_bound']
+        )
+        return np.minimum.reduce([
+            np.ones(len(rows1)),
+            norm[rows1] * norm[rows2],
+            max_weight[rows1] * l1[rows2],
+            l1[rows1] * max_weight[rows2],
+            term_bound[rows1],
+            term_bound[rows2],
+        ])
+    
+    def _strength_bounds(self, rows1: np.ndarray, rows2: np.ndarray, tool_arrays: Dict[str, np.ndarray],
+                         pop_norm_factors: Dict[str, Any], similarity_low: Any = 0.0,
+                         similarity_high: Any = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lower and upper bounds of the strength of many pairs, before any similarity is computed
+        
+        base_flag and pop_score are exact and cheap; the similarity term is
+        bounded by similarity_low (what is already known, 0 by default)
+        and by the smaller of similarity_high and _similarity_upper_bound.
+        """
+        base_flag, pop_score = self._base_and_popularity(rows1, rows2, tool_arrays, pop_norm_factors)
+        similarity_high = np.minimum(similarity_high, self._similarity_upper_bound(rows1, rows2, tool_arrays))
+        lower = (
+            self.BASE_WEIGHT * base_flag +
+            self.SEMANTIC_WEIGHT * similarity_low +
+            self.POPULARITY_WEIGHT * pop_score
+        )
+        upper = (
+            self.BASE_WEIGHT * base_flag +
+            self.SEMANTIC_WEIGHT * similarity_high +
+            self.POPULARITY_WEIGHT * pop_score
+        )
+        return lower, upper
+    
+    def _score_pair_block(self, rows1: np.ndarray, rows2: np.ndarray, tfidf_matrix: sparse.csr_matrix,
+                          tool_arrays: Dict[str, np.ndarray],
+                          pop_norm_factors: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorised _calculate_edge_strength for a block of pairs
+        
+        Returns:
+            (strength, semantic_sim) arrays, one value per pair
+        """
+        base_flag, pop_score = self._base_and_popularity(rows1, rows2, tool_arrays, pop_norm_factors)
+        semantic_sim = np.clip(self._pair_similarities(tfidf_matrix, rows1, rows2), 0.0, 1.0)
+        
+        strength = (
+            self.BASE_WEIGHT * base_flag +
+            self.SEMANTIC_WEIGHT * semantic_sim +
+            self.POPULARITY_WEIGHT * pop_score
+        )
+        return np.clip(strength, 0.0, 1.0), semantic_sim
+    
+    def _classify_edge_types(self, rows1: np.ndarray, rows2: np.ndarray, semantic_sim: np.ndarray,
+                             tool_arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """Vectorised _classify_edge_type: indexes into EDGE_TYPES, same priority order"""
+        domains = tool_arrays['domain']
+        multimedia = tool_arrays['multimedia']
+        return np.select(
+            [
+                (domains[rows1] == domains[rows2]) & (domains[rows1] >= 0),
+                multimedia[rows1] & multimedia[rows2],
+                semantic_sim >= 0.3,
+            ],
+            [0, 1, 2],
+            default=3
+        )
+    
     def _calculate_edge_strength(self, tool1: ToolData, tool2: ToolData, 
                                 tfidf1: np.ndarray, tfidf2: np.ndarray,
                                 pop_norm_factors: Dict[str, Any]) -> float:
@@ -402,31 +1235,34 @@ class EdgeScoringEngine:
     
     def _cleanup_existing_synergies(self) -> None:
         """Remove existing synergies for recalculation"""
-        try:
-            print("🧹 Cleaning existing synergies...")
-            self.supabase.table('ai_synergy').delete().gte('id', 0).execute()
-            print("✅ Existing synergies cleaned")
-        except Exception as e:
-            print(f"⚠️ Error cleaning synergies (continuing): {e}")
+        print("🧹 Cleaning existing synergies...")
+        removed = self.adapter.clear_synergies()
+        print(f"✅ Existing synergies cleaned ({removed} removed)")
     
     def _batch_insert_edges(self, edges: List[Dict[str, Any]]) -> int:
-        """Batch insert edges into database"""
-        try:
-            response = self.supabase.table('ai_synergy').insert(edges).execute()
-            return len(response.data) if response.data else 0
-        except Exception as e:
-            print(f"❌ Error inserting edge batch: {e}")
-            return 0
+        """Batch insert edges into database; raises when the batch was not fully written"""
+        written = self.adapter.insert_synergies(edges)
+        if written < len(edges):
+            raise RuntimeError(f"edge batch insert wrote {written} of {len(edges)} rows")
+        return written
+    
+    def _batch_update_edges(self, edges: List[Dict[str, Any]]) -> int:
+        """Re-score stored edges; raises when fewer rows were written than requested"""
+        written = self.adapter.update_synergies(edges)
+        if written < len(edges):
+            raise RuntimeError(f"edge batch update wrote {written} of {len(edges)} rows")
+        return written
+    
+    def _batch_delete_edges(self, edge_ids: List[int]) -> int:
+        """Delete stored edges by id; raises when fewer rows were removed than requested"""
+        removed = self.adapter.delete_synergies(edge_ids)
+        if removed < len(edge_ids):
+            raise RuntimeError(f"edge batch delete removed {removed} of {len(edge_ids)} rows")
+        return removed
     
     def _refresh_materialized_view(self) -> None:
-        """Refresh materialized view ai_tool_degree"""
-        try:
-            print("🔄 Refreshing materialized view ai_tool_degree...")
-            # Note: This assumes the view exists in your Supabase schema
-            self.supabase.rpc('refresh_materialized_view', {'view_name': 'ai_tool_degree'}).execute()
-            print("✅ Materialized view refreshed")
-        except Exception as e:
-            print(f"⚠️ Error refreshing materialized view: {e}")
+        """Bring ai_tool_degree up to date (a repair check; triggers keep it current)"""
+        self.adapter.refresh_tool_degree()
     
     def _classify_edge_type(self, tool1: ToolData, tool2: ToolData, 
                            tfidf1: np.ndarray, tfidf2: np.ndarray, 
@@ -479,37 +1315,17 @@ class EdgeScoringEngine:
     def get_edge_statistics(self) -> Dict[str, Any]:
         """Get statistics about calculated edges"""
         try:
-            # Total edges
-            total_response = self.supabase.table('ai_synergy').select('id', count='exact').execute()
-            total_edges = total_response.count
-            
-            # Strength statistics
-            strength_response = self.supabase.table('ai_synergy').select('strength').execute()
-            strengths = [item['strength'] for item in strength_response.data]
-            
-            if strengths:
-                avg_strength = sum(strengths) / len(strengths)
-                max_strength = max(strengths)
-                min_strength = min(strengths)
-                
-                # Distribution by strength ranges
-                strong_edges = len([s for s in strengths if s >= 0.7])
-                medium_edges = len([s for s in strengths if 0.4 <= s < 0.7])
-                weak_edges = len([s for s in strengths if 0.25 <= s < 0.4])
-            else:
-                avg_strength = max_strength = min_strength = 0
-                strong_edges = medium_edges = weak_edges = 0
+            # Count, strength range and distribution computed by the backend
+            summary = self.adapter.get_synergy_summary()
+            if not summary:
+                return {}
             
             return {
-                'total_edges': total_edges,
-                'avg_strength': round(avg_strength, 4),
-                'max_strength': round(max_strength, 4),
-                'min_strength': round(min_strength, 4),
-                'distribution': {
-                    'strong_edges': strong_edges,   # >= 0.7
-                    'medium_edges': medium_edges,   # 0.4-0.7  
-                    'weak_edges': weak_edges        # 0.25-0.4
-                },
+                'total_edges': summary['total_edges'],
+                'avg_strength': round(summary['avg_strength'], 4),
+                'max_strength': round(summary['max_strength'], 4),
+                'min_strength': round(summary['min_strength'], 4),
+                'distribution': summary['distribution'],  # strong >= 0.7, medium 0.4-0.7, weak 0.25-0.4
                 'algorithm': {
                     'base_weight': self.BASE_WEIGHT,
                     'semantic_weight': self.SEMANTIC_WEIGHT,
@@ -523,29 +1339,98 @@ class EdgeScoringEngine:
             return {}
 
 
+# Process-pool sharding of the top-k pass (EdgeScoringEngine._map_row_blocks)
+
+_shard_worker: Dict[str, Any] = {}
+
+
+def _write_shared(value: Any, path: str) -> Tuple:
+    """Save a CSR matrix, array or dict of them under path; returns the spec _read_shared maps back"""
+    if sparse.issparse(value):
+        os.makedirs(path, exist_ok=True)
+        for part in ('data', 'indices', 'indptr'):
+            np.save(os.path.join(path, f'{part}.npy'), getattr(value, part))
+        return ('csr', path, value.shape)
+    if isinstance(value, dict):
+        os.makedirs(path, exist_ok=True)
+        return ('dict', {key: _write_shared(item, os.path.join(path, key)) for key, item in value.items()})
+    np.save(f'{path}.npy', np.asarray(value))
+    return ('array', f'{path}.npy')
+
+
+def _read_shared(spec: Tuple) -> Any:
+    """Read-only memory-mapped view of what _write_shared saved"""
+    if spec[0] == 'csr':
+        _, path, shape = spec
+        parts = [np.load(os.path.join(path, f'{part}.npy'), mmap_mode='r') for part in ('data', 'indices', 'indptr')]
+        return sparse.csr_matrix(tuple(parts), shape=shape, copy=False)
+    if spec[0] == 'dict':
+        return {key: _read_shared(item) for key, item in spec[1].items()}
+    return np.load(spec[1], mmap_mode='r')
+
+
+def _init_shard_worker(engine: 'EdgeScoringEngine', spec: Tuple, pop_norm_factors: Dict[str, Any],
+                       top_k: int, with_partners: bool) -> None:
+    _shard_worker.update(
+        engine=engine, inputs=_read_shared(spec), pop_norm_factors=pop_norm_factors,
+        top_k=top_k, with_partners=with_partners
+    )
+
+
+def _top_k_shard(block_rows: np.ndarray) -> Tuple:
+    return _shard_worker['engine']._top_k_block(
+        block_rows, _shard_worker['inputs'], _shard_worker['pop_norm_factors'],
+        _shard_worker['top_k'], _shard_worker['with_partners']
+    )
+
+
 # Convenience functions for external use
-def build_synergies(batch_size: int = 500) -> Dict[str, int]:
+def build_synergies(batch_size: int = 500, adapter: Optional[DatabaseAdapter] = None,
+                    top_k: Optional[int] = CANDIDATE_TOP_K, incremental: bool = False,
+                    workers: Optional[int] = None,
+                    vector_cache: Optional[str] = DEFAULT_CACHE_DIR,
+                    hashed_features: Optional[str] = None, sparsify: str = 'union',
+                    edge_budget: Optional[int] = None) -> Dict[str, Any]:
     """
     Build all synergies using the formal edge-scoring algorithm
     
     Args:
         batch_size: Batch size for processing
+        adapter: Database to read tools from and write edges to (Supabase when omitted)
+        top_k: Strongest edges kept per tool (None: every keyword-overlap pair)
+        incremental: Only rescore the tools changed since the last run
+        workers: Processes for the top-k pass (None: one per CPU)
+        vector_cache: Directory of the stored vectoriser and vectors (None: refit every run)
+        hashed_features: Directory of the hashed featuriser's state; streams
+                         hashed features instead of TF-IDF when given
+        sparsify: Which top-k pairs survive, 'union' or 'mutual' (SPARSIFY_MODES)
+        edge_budget: Keep at most this many edges, the strongest (full rebuilds)
         
     Returns:
         Statistics about the operation
     """
-    engine = EdgeScoringEngine()
-    return engine.calculate_all_edges(batch_size)
+    engine = EdgeScoringEngine(
+        adapter,
+        VectorCache(vector_cache) if vector_cache else None,
+        HashedFeaturizer(hashed_features) if hashed_features else None
+    )
+    if incremental:
+        return engine.calculate_changed_edges(batch_size=batch_size, top_k=top_k, workers=workers,
+                                              sparsify=sparsify, edge_budget=edge_budget)
+    return engine.calculate_all_edges(batch_size, top_k, workers, sparsify, edge_budget)
 
 
-def get_synergy_stats() -> Dict[str, Any]:
+def get_synergy_stats(adapter: Optional[DatabaseAdapter] = None) -> Dict[str, Any]:
     """
     Get statistics about calculated synergies
     
+    Args:
+        adapter: Database holding ai_synergy (Supabase when omitted)
+    
     Returns:
         Statistics dictionary
     """
-    engine = EdgeScoringEngine()
+    engine = EdgeScoringEngine(adapter)
     return engine.get_edge_statistics()
 
 
@@ -553,8 +1438,8 @@ def get_synergy_stats() -> Dict[str, Any]:
 class SynergyBuilder:
     """Legacy compatibility wrapper"""
     
-    def __init__(self):
-        self.engine = EdgeScoringEngine()
+    def __init__(self, adapter: Optional[DatabaseAdapter] = None):
+        self.engine = EdgeScoringEngine(adapter)
     
     def calculate_all_synergies(self, batch_size: int = 500) -> Dict[str, int]:
         return self.engine.calculate_all_edges(batch_size)
@@ -563,50 +1448,22 @@ class SynergyBuilder:
         return self.engine.get_edge_statistics()
 
 
-def get_tool_synergies(tool_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+def get_tool_synergies(tool_id: str, limit: int = 10,
+                       adapter: Optional[DatabaseAdapter] = None) -> List[Dict[str, Any]]:
     """
     Get synergies for a specific tool
     
     Args:
         tool_id: Tool ID (UUID)
         limit: Maximum number of synergies to return
+        adapter: Database holding ai_synergy (Supabase when omitted)
         
     Returns:
         List of synergies ordered by strength
     """
     try:
-        engine = EdgeScoringEngine()
-        
-        # Query synergies where tool appears as tool_id_1 or tool_id_2
-        response1 = engine.supabase.table('ai_synergy').select(
-            'strength, tool_id_2, ai_tool!ai_synergy_tool_id_2_fkey(id, name, description)'
-        ).eq('tool_id_1', tool_id).order('strength', desc=True).limit(limit).execute()
-        
-        response2 = engine.supabase.table('ai_synergy').select(
-            'strength, tool_id_1, ai_tool!ai_synergy_tool_id_1_fkey(id, name, description)'
-        ).eq('tool_id_2', tool_id).order('strength', desc=True).limit(limit).execute()
-        
-        synergies = []
-        
-        # Process results where tool is tool_id_1
-        for item in response1.data:
-            synergies.append({
-                'strength': item['strength'],
-                'related_tool_id': item['tool_id_2'],
-                'related_tool': item['ai_tool']
-            })
-        
-        # Process results where tool is tool_id_2
-        for item in response2.data:
-            synergies.append({
-                'strength': item['strength'],
-                'related_tool_id': item['tool_id_1'],
-                'related_tool': item['ai_tool']
-            })
-        
-        # Sort by strength and return top N
-        synergies.sort(key=lambda x: x['strength'], reverse=True)
-        return synergies[:limit]
+        engine = EdgeScoringEngine(adapter)
+        return engine.adapter.get_tool_synergies(tool_id, limit)
         
     except Exception as e:
         print(f"❌ Error getting tool synergies for {tool_id}: {e}")
@@ -614,11 +1471,64 @@ def get_tool_synergies(tool_id: str, limit: int = 10) -> List[Dict[str, Any]]:
 
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Formal edge-scoring algorithm')
+    parser.add_argument('--sqlite', action='store_true', help='Score the local SQLite database instead of Supabase')
+    parser.add_argument('--db', default='database/ai_tools.db', help='SQLite database path (with --sqlite)')
+    parser.add_argument('--shards', metavar='DIR',
+                        help='Score the per-source SQLite shards in DIR (edges go to DIR/catalog.db)')
+    parser.add_argument('--mirror', nargs='?', const='database/supabase_mirror.db', metavar='PATH',
+                        help='Read Supabase tools from an incrementally synced local mirror (database/mirror.py)')
+    parser.add_argument('--top-k', type=int, default=CANDIDATE_TOP_K,
+                        help='Strongest edges kept per tool (0: every keyword-overlap pair)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only rescore tools changed since the last run and write the edge diff')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Processes for the top-k similarity pass (0: one per CPU)')
+    parser.add_argument('--vector-cache', default=DEFAULT_CACHE_DIR, metavar='DIR',
+                        help='Directory of the stored vectoriser and description vectors')
+    parser.add_argument('--no-vector-cache', action='store_true',
+                        help='Refit the vectoriser on every description (no stored vectors)')
+    parser.add_argument('--refit-drift', type=float, default=DEFAULT_REFIT_DRIFT,
+                        help='Refit when more than this share of the descriptions is new since the last fit')
+    parser.add_argument('--hashed', nargs='?', const=DEFAULT_HASHED_DIR, metavar='DIR',
+                        help='Stream hashed term features with a maintained document-frequency counter '
+                             'instead of fitting TF-IDF (state in DIR)')
+    parser.add_argument('--hash-features', type=int, default=DEFAULT_N_FEATURES,
+                        help='Hashed feature columns (with --hashed)')
+    parser.add_argument('--sparsify', choices=SPARSIFY_MODES, default='union',
+                        help="Keep pairs in the top k of either tool (union) or of both (mutual)")
+    parser.add_argument('--edge-budget', type=int,
+                        help='Keep at most this many edges overall, the strongest (full rebuilds)')
+    args = parser.parse_args()
+    
     print("🎯 Testing Formal Edge-Scoring Algorithm")
     print("=" * 50)
     
-    engine = EdgeScoringEngine()
-    stats = engine.calculate_all_edges()
+    if args.shards:
+        from database.shards import ShardedSQLiteAdapter
+        adapter = ShardedSQLiteAdapter(args.shards)
+    elif args.mirror and not args.sqlite:
+        from database.mirror import MirroredSupabaseAdapter
+        adapter = MirroredSupabaseAdapter(args.mirror)
+    else:
+        adapter = SQLiteAdapter(args.db) if args.sqlite else None
+    vector_cache = None if args.no_vector_cache else VectorCache(args.vector_cache, args.refit_drift)
+    featurizer = HashedFeaturizer(args.hashed, args.hash_features) if args.hashed else None
+    engine = EdgeScoringEngine(adapter, vector_cache, featurizer)
+    if args.incremental:
+        stats = engine.calculate_changed_edges(top_k=args.top_k or None, workers=args.workers or None,
+                                               sparsify=args.sparsify, edge_budget=args.edge_budget)
+    else:
+        stats = engine.calculate_all_edges(top_k=args.top_k or None, workers=args.workers or None,
+                                           sparsify=args.sparsify, edge_budget=args.edge_budget)
+    
+    if args.sqlite and not args.shards:
+        # Let the API switch to the new graph
+        from database.snapshot import publish_snapshot
+        manifest = publish_snapshot(args.db, stage='synergy')
+        print(f"📸 Published snapshot v{manifest['version']} ({manifest['edges']} edges)")
     
     print(f"\n📊 Final Results:")
     print(f"   Calculated: {stats['calculated']}")
@@ -0,0 +1,248 @@
+"""
+Streaming hashed featuriser for out-of-core synergy builds
+
+A fitted TfidfVectorizer holds every description and every candidate n-gram
+of the corpus in memory while fitting, and its vocabulary and IDF weights
+only change by refitting. HashedFeaturizer replaces both:
+
+- term features come from the hashing trick (HashingVectorizer, unigrams +
+  bigrams, n_features columns): no vocabulary, nothing to fit
+- document frequencies are a separately maintained counter (one int64 per
+  feature), adjusted by each tool's own row when it is added, edited or
+  deleted, so the IDF weights stay exact without a refit
+
+Descriptions are streamed from the database in pages
+(DatabaseAdapter.iter_tool_descriptions); only tools whose description hash
+changed since the last run are hashed. The raw term counts of every tool
+are stored with the counter, and the IDF weights are applied when the matrix
+is assembled:
+
+    idf = ln((1 + documents) / (1 + df)) + 1     (sklearn's smooth_idf)
+    row = normalize(counts * idf)                 (L2, like _compute_tfidf_matrix)
+
+Features in fewer than min_df descriptions get weight 0: an n-gram no other
+tool uses (typically the tool's own name) cannot add to any similarity and
+would only dilute the norm, the way max_features drops it from the fitted
+vocabulary. Their counts are kept, so they weigh in once a second tool
+uses them. The result is a CSR matrix the block-wise scorer uses as is (row dot
+products are cosine similarities).
+
+State lives in one directory (meta.json, df.npy, counts.npz, tool_ids.npy,
+hashes.npy), saved as one generation with vector_cache.write_atomically:
+the counter is only ever adjusted incrementally, so it must never be read
+next to counts or tool ids from another save.
+
+Usage:
+    featurizer = HashedFeaturizer('database/synergy_cache/hashed')
+    featurizer.update(adapter.iter_tool_descriptions())
+    matrix = featurizer.matrix([tool.id for tool in tools])
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from synergy.vector_cache import current_generation, description_hash, write_atomically
+
+
+DEFAULT_HASHED_DIR = 'database/synergy_cache/hashed'
+
+# Hashed feature columns. Two n-grams sharing a column make their
+# descriptions look alike (1,312 local tools: 3 pairs off by > 0.05 at 2**20,
+# 13 at 2**18); the counter and per-feature arrays cost 8 bytes a column.
+DEFAULT_N_FEATURES = 2 ** 20
+
+# Descriptions a feature must appear in to get a non-zero weight
+DEFAULT_MIN_DF = 2
+
+# Descriptions per page streamed from the database
+STREAM_PAGE_SIZE = 2000
+
+
+class HashedFeaturizer:
+    """Hashed term counts per tool plus an incrementally maintained document-frequency counter"""
+
+    def __init__(self, state_dir: Optional[str] = DEFAULT_HASHED_DIR, n_features: int = DEFAULT_N_FEATURES,
+                 min_df: int = DEFAULT_MIN_DF):
+        """
+        Args:
+            state_dir: Directory holding the counter and counts (None: kept in memory only)
+            n_features: Hashed feature columns (a change discards the stored state)
+            min_df: Descriptions a feature must appear in to be weighted
+        """
+        self.state_dir = state_dir
+        self.n_features = n_features
+        self.min_df = min_df
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features,
+            stop_words='english',
+            ngram_range=(1, 2),
+            lowercase=True,
+            token_pattern=r'\b[a-zA-Z][a-zA-Z0-9]*\b',
+            alternate_sign=False,
+            norm=None,
+        )
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self.tool_ids = np.zeros(0, dtype=np.int64)
+        self.hashes = np.zeros(0, dtype='U16')
+        self.counts = sparse.csr_matrix((0, n_features), dtype=np.float32)
+        self.last_stats: Dict[str, Any] = {}
+        if state_dir:
+            self._load()
+
+    @property
+    def documents(self) -> int:
+        return len(self.tool_ids)
+
+    def update(self, pages: Iterable[List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Bring counts and document frequencies up to date with a stream of tools
+
+        Args:
+            pages: Pages of {id, description} covering every tool, in any order;
+                   stored tools missing from the stream count as deleted
+
+        Returns:
+            Statistics (documents, hashed, reused, removed, elapsed_s)
+        """
+        started = time.perf_counter()
+        stored_row = {tool_id: i for i, tool_id in enumerate(self.tool_ids.tolist())}
+        stored_hash = self.hashes.tolist()
+        seen = np.zeros(len(stored_row), dtype=bool)
+        # Adjusted on a copy: a stream that fails halfway leaves the state untouched
+        document_frequency = self.document_frequency.copy()
+        ids: List[np.ndarray] = []
+        hashes: List[np.ndarray] = []
+        pieces: List[sparse.csr_matrix] = []
+        hashed = reused = 0
+
+        for page in pages:
+            page_ids = [row['id'] for row in page]
+            page_hashes = [description_hash((row.get('description') or '').strip()) for row in page]
+            keep, fresh = [], []
+            for position, (tool_id, key) in enumerate(zip(page_ids, page_hashes)):
+                row = stored_row.get(tool_id)
+                if row is not None:
+                    seen[row] = True
+                    if stored_hash[row] == key:
+                        keep.append(position)
+                        continue
+                    # Edited: its old row no longer counts
+                    self._count(document_frequency, self.counts[row], -1)
+                fresh.append(position)
+
+            parts = []
+            if keep:
+                parts.append(self.counts[[stored_row[page_ids[position]] for position in keep]])
+            if fresh:
+                texts = [(page[position].get('description') or '').strip() for position in fresh]
+                counts = self.vectorizer.transform(texts).astype(np.float32).tocsr()
+                self._count(document_frequency, counts, +1)
+                parts.append(counts)
+            if parts:
+                piece = sparse.vstack(parts, format='csr')
+                pieces.append(piece[np.argsort(np.array(keep + fresh))])
+                ids.append(np.array(page_ids, dtype=np.int64))
+                hashes.append(np.array(page_hashes, dtype='U16'))
+            hashed += len(fresh)
+            reused += len(keep)
+
+        # Deleted tools
+        removed = np.flatnonzero(~seen)
+        if len(removed):
+            self._count(document_frequency, self.counts[removed], -1)
+
+        self.document_frequency = document_frequency
+        self.tool_ids = np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)
+        self.hashes = np.concatenate(hashes) if hashes else np.zeros(0, dtype='U16')
+        self.counts = (sparse.vstack(pieces, format='csr') if pieces
+                       else sparse.csr_matrix((0, self.n_features), dtype=np.float32))
+        if self.state_dir and (hashed or len(removed)):
+            self._save()
+
+        self.last_stats = {
+            'documents': self.documents,
+            'hashed': hashed,
+            'reused': reused,
+            'removed': int(len(removed)),
+            'elapsed_s': round(time.perf_counter() - started, 3),
+        }
+        return self.last_stats
+
+    def idf(self) -> np.ndarray:
+        """Smoothed IDF weight of every feature from the current counter (0 below min_df)"""
+        weights = np.log((1 + self.documents) / (1 + self.document_frequency)) + 1
+        weights[self.document_frequency < self.min_df] = 0.0
+        return weights
+
+    def matrix(self, tool_ids: List[int]) -> sparse.csr_matrix:
+        """L2-normalised TF-IDF rows of the given tools (empty rows for tools not streamed)"""
+        row_of = {tool_id: i for i, tool_id in enumerate(self.tool_ids.tolist())}
+        rows = np.array([row_of.get(tool_id, -1) for tool_id in tool_ids], dtype=np.int64)
+        present = rows >= 0
+        if present.all():
+            counts = self.counts[rows].astype(np.float64)
+        else:
+            # Scatter the streamed rows into place; the rest stay empty
+            selection = sparse.csr_matrix(
+                (np.ones(int(present.sum())), (np.flatnonzero(present), rows[present])),
+                shape=(len(tool_ids), self.documents)
+            )
+            counts = (selection @ self.counts.astype(np.float64)).tocsr()
+        # Weighted in place: counts is already a private float64 copy
+        counts.data *= self.idf()[counts.indices]
+        counts.eliminate_zeros()
+        return normalize(counts, norm='l2', copy=False)
+
+    def _count(self, document_frequency: np.ndarray, counts: sparse.csr_matrix, sign: int) -> None:
+        """Add (+1) or remove (-1) the documents of counts from document_frequency"""
+        counts = counts.tocsr()
+        counts.sum_duplicates()
+        document_frequency += sign * np.bincount(counts.indices, minlength=self.n_features)
+
+    def _params(self) -> Dict[str, Any]:
+        params = self.vectorizer.get_params()
+        names = ('n_features', 'stop_words', 'ngram_range', 'lowercase', 'token_pattern', 'alternate_sign')
+        return json.loads(json.dumps({name: params.get(name) for name in names}, default=str))
+
+    def _load(self) -> None:
+        """Stored state, unless missing, unreadable or hashed with other parameters"""
+        try:
+            generation = current_generation(self.state_dir)
+            with open(os.path.join(generation, 'meta.json')) as handle:
+                meta = json.load(handle)
+            if meta.get('params') != self._params():
+                print("ℹ️ Hashing parameters changed: rehashing every description")
+                return
+            document_frequency = np.load(os.path.join(generation, 'df.npy'))
+            tool_ids = np.load(os.path.join(generation, 'tool_ids.npy'))
+            hashes = np.load(os.path.join(generation, 'hashes.npy'))
+            counts = sparse.load_npz(os.path.join(generation, 'counts.npz')).tocsr()
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"⚠️ Hashed feature state unreadable, rehashing: {e}")
+            return
+        self.document_frequency, self.tool_ids, self.hashes, self.counts = document_frequency, tool_ids, hashes, counts
+
+    def _save(self) -> None:
+        try:
+            write_atomically(self.state_dir, {
+                'df.npy': lambda handle: np.save(handle, self.document_frequency),
+                'tool_ids.npy': lambda handle: np.save(handle, self.tool_ids),
+                'hashes.npy': lambda handle: np.save(handle, self.hashes),
+                'counts.npz': lambda handle: sparse.save_npz(handle, self.counts, compressed=False),
+                'meta.json': lambda handle: handle.write(json.dumps({
+                    'params': self._params(),
+                    'documents': self.documents,
+                    'features_used': int(np.count_nonzero(self.document_frequency)),
+                }).encode('utf-8')),
+            })
+        except Exception as e:
+            print(f"⚠️ Error saving hashed feature state: {e}")
@@ -0,0 +1,240 @@
+"""
+Persistent TF-IDF vectoriser and per-description vector store for the synergy builder
+
+EdgeScoringEngine used to refit its TfidfVectorizer (unigrams + bigrams) on
+every description on every run. VectorCache keeps, in one generation
+directory of the cache directory:
+
+- ``vectorizer.npz``: the fitted vocabulary (terms in column order) and IDF
+  weights, from which the vectoriser is rebuilt without refitting
+- ``vectors.npz`` / ``vector_keys.npy``: the L2-normalised TF-IDF row of
+  every description, keyed by a hash of the description text
+- ``meta.json``: vectoriser parameters, fit time and size, and the hashes
+  of the descriptions the IDF weights were fitted on
+
+A run only vectorises descriptions whose hash is not stored yet. The
+vectoriser is refitted (and every vector recomputed) only when the drift
+since the last fit, the share of current descriptions the fit never saw,
+exceeds ``refit_drift``, or when the vectoriser parameters changed.
+
+After a run that changed the store, every file is written to a new
+generation directory and ``CURRENT`` (the name of the generation to read) is
+switched to it with one os.replace, so the files are only ever read as a
+set: a save interrupted halfway leaves the previous generation current.
+Files are uncompressed (saving is on the critical path); descriptions no
+tool uses any more are dropped from the store.
+
+Usage:
+    cache = VectorCache('database/synergy_cache', refit_drift=0.1)
+    matrix = cache.transform(descriptions, vectorizer)   # CSR, one row per description
+    cache.refitted                                       # whether this call refitted
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+
+DEFAULT_CACHE_DIR = 'database/synergy_cache'
+
+# Share of current descriptions unseen by the last fit that triggers a refit
+DEFAULT_REFIT_DRIFT = 0.1
+
+# Pointer to the generation directory holding the current files
+CURRENT_FILE = 'CURRENT'
+GENERATION_PREFIX = 'gen-'
+
+# Vectoriser parameters that change the vectors (a mismatch forces a refit)
+_VECTORIZER_PARAMS = ('max_features', 'stop_words', 'ngram_range', 'lowercase', 'token_pattern', 'min_df', 'max_df')
+
+
+def description_hash(description: str) -> str:
+    """Key of a description in the vector store"""
+    return hashlib.md5(description.encode('utf-8')).hexdigest()[:16]
+
+
+def write_atomically(directory: str, files: Dict[str, Callable[[BinaryIO], None]]) -> None:
+    """
+    Replace the file set of directory as a unit
+
+    Each file is written through its writer into a new generation directory
+    and fsync'ed; then CURRENT is replaced to name that generation, and the
+    superseded generations (and files of the old flat layout) are removed.
+    """
+    os.makedirs(directory, exist_ok=True)
+    generation = f"{GENERATION_PREFIX}{time.time_ns():x}-{os.getpid()}"
+    target = os.path.join(directory, generation)
+    os.makedirs(target)
+    for name, write in files.items():
+        with open(os.path.join(target, name), 'wb') as handle:
+            write(handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    pointer = os.path.join(directory, f'.{CURRENT_FILE}.{generation}.tmp')
+    with open(pointer, 'w') as handle:
+        handle.write(generation)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(pointer, os.path.join(directory, CURRENT_FILE))
+
+    for entry in os.listdir(directory):
+        path = os.path.join(directory, entry)
+        if entry.startswith(GENERATION_PREFIX) and entry != generation:
+            shutil.rmtree(path, ignore_errors=True)
+        elif entry in files and os.path.isfile(path):
+            os.remove(path)
+
+
+def current_generation(directory: str) -> str:
+    """Directory of the generation CURRENT names (FileNotFoundError before the first save)"""
+    with open(os.path.join(directory, CURRENT_FILE)) as handle:
+        return os.path.join(directory, handle.read().strip())
+
+
+class VectorCache:
+    """Fitted vocabulary/IDF plus stored TF-IDF rows, keyed by description hash"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, refit_drift: float = DEFAULT_REFIT_DRIFT):
+        """
+        Args:
+            cache_dir: Directory holding the cache files (created on first save)
+            refit_drift: Refit when more than this share of the current
+                         descriptions was not part of the last fit
+        """
+        self.cache_dir = cache_dir
+        self.refit_drift = refit_drift
+        self.refitted = False
+        self.last_stats: Dict[str, Any] = {}
+
+    def transform(self, descriptions: List[str], vectorizer: TfidfVectorizer) -> sparse.csr_matrix:
+        """
+        L2-normalised TF-IDF rows of the descriptions, from the store where possible
+
+        Args:
+            descriptions: Cleaned description of every tool
+            vectorizer: Unfitted vectoriser with the parameters to use (fitted in place on refit)
+        """
+        started = time.perf_counter()
+        keys = [description_hash(description) for description in descriptions]
+        unique_keys = set(keys)
+        state = self._load(vectorizer)
+
+        drift = 1.0
+        if state is not None:
+            fit_keys = state['fit_keys']
+            drift = sum(1 for key in unique_keys if key not in fit_keys) / max(1, len(unique_keys))
+
+        self.refitted = state is None or drift > self.refit_drift
+        if self.refitted:
+            matrix = normalize(vectorizer.fit_transform(descriptions).tocsr(), norm='l2', copy=False)
+            terms = np.array(sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get))
+            state = {
+                'terms': terms, 'idf': vectorizer.idf_,
+                'fit_keys': unique_keys, 'fitted_at': datetime.now().isoformat(), 'fit_documents': len(descriptions),
+            }
+            first_row = {}
+            for i, key in enumerate(keys):
+                first_row.setdefault(key, i)
+            stored_keys = list(first_row)
+            stored = matrix[list(first_row.values())]
+            vectorised = len(descriptions)
+            changed = True
+        else:
+            self._restore(vectorizer, state)
+            row_of = {key: i for i, key in enumerate(state['keys'])}
+            missing = [key for key in dict.fromkeys(keys) if key not in row_of]
+            text_of = dict(zip(keys, descriptions))
+            if missing:
+                fresh = normalize(vectorizer.transform([text_of[key] for key in missing]).tocsr(), norm='l2', copy=False)
+                for key in missing:
+                    row_of[key] = len(row_of)
+                store = sparse.vstack([state['vectors'], fresh], format='csr')
+            else:
+                store = state['vectors']
+            matrix = store[[row_of[key] for key in keys]]
+
+            # Keep only the descriptions in use
+            stored_keys = [key for key in row_of if key in unique_keys]
+            stored = store[[row_of[key] for key in stored_keys]]
+            vectorised = len(missing)
+            changed = bool(missing) or len(stored_keys) != len(state['keys'])
+
+        if changed:
+            self._save(vectorizer, state, stored_keys, stored)
+        self.last_stats = {
+            'refitted': self.refitted,
+            'drift': round(drift, 4),
+            'vectorised': vectorised,
+            'reused': 0 if self.refitted else len(unique_keys) - vectorised,
+            'elapsed_s': round(time.perf_counter() - started, 3),
+        }
+        return matrix
+
+    def _load(self, vectorizer: TfidfVectorizer) -> Optional[Dict[str, Any]]:
+        """Stored state, or None when missing, unreadable or fitted with other parameters"""
+        try:
+            generation = current_generation(self.cache_dir)
+            with open(os.path.join(generation, 'meta.json')) as handle:
+                meta = json.load(handle)
+            if meta.get('params') != self._params(vectorizer):
+                print("ℹ️ Vectoriser parameters changed: refitting the vector cache")
+                return None
+            fitted = np.load(os.path.join(generation, 'vectorizer.npz'))
+            return {
+                'terms': fitted['terms'],
+                'idf': fitted['idf'],
+                'fit_keys': set(meta['fit_keys']),
+                'fitted_at': meta['fitted_at'],
+                'fit_documents': meta['fit_documents'],
+                'keys': np.load(os.path.join(generation, 'vector_keys.npy')).tolist(),
+                'vectors': sparse.load_npz(os.path.join(generation, 'vectors.npz')).tocsr(),
+            }
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Vector cache unreadable, refitting: {e}")
+            return None
+
+    def _restore(self, vectorizer: TfidfVectorizer, state: Dict[str, Any]) -> None:
+        """Make vectorizer transform with the stored vocabulary and IDF weights"""
+        vectorizer.vocabulary_ = {term: i for i, term in enumerate(state['terms'].tolist())}
+        vectorizer.idf_ = state['idf']
+
+    def _save(self, vectorizer: TfidfVectorizer, state: Dict[str, Any], keys: List[str],
+              vectors: sparse.csr_matrix) -> None:
+        """Persist the fitted vectoriser and the vectors in use"""
+        try:
+            write_atomically(self.cache_dir, {
+                'vectorizer.npz': lambda handle: np.savez(handle, terms=state['terms'], idf=state['idf']),
+                'vectors.npz': lambda handle: sparse.save_npz(handle, vectors, compressed=False),
+                'vector_keys.npy': lambda handle: np.save(handle, np.array(keys, dtype='U16')),
+                'meta.json': lambda handle: self._write_meta(handle, vectorizer, state, len(keys)),
+            })
+        except Exception as e:
+            print(f"⚠️ Error saving vector cache: {e}")
+
+    def _write_meta(self, handle, vectorizer: TfidfVectorizer, state: Dict[str, Any], stored: int) -> None:
+        handle.write(json.dumps({
+            'params': self._params(vectorizer),
+            'fitted_at': state['fitted_at'],
+            'fit_documents': state['fit_documents'],
+            'vocabulary_size': len(state['terms']),
+            'stored_vectors': stored,
+            'fit_keys': sorted(state['fit_keys']),
+        }).encode('utf-8'))
+
+    @staticmethod
+    def _params(vectorizer: TfidfVectorizer) -> Dict[str, Any]:
+        params = clone(vectorizer).get_params()
+        return json.loads(json.dumps({name: params.get(name) for name in _VECTORIZER_PARAMS}, default=str))
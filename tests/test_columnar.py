@@ -0,0 +1,90 @@
+"""
+Parquet round trip of database/columnar.py (skipped without pyarrow)
+"""
+
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from database.adapters import SQLiteAdapter
+from database.columnar import export_parquet, import_parquet
+from database.content_hash import combine_field_hashes, compute_field_hashes
+from scrapers.common import AITool
+
+
+TOOL_QUERY = """
+    SELECT id, ext_id, name, description, price, popularity, categories, source, macro_domain,
+           url, rank, upvotes, monthly_users, editor_score, maturity, platform, features,
+           last_scraped, created_at, field_hashes, community_id
+    FROM ai_tool ORDER BY id
+"""
+EDGE_QUERY = "SELECT id, tool_id_1, tool_id_2, strength, edge_type FROM ai_synergy ORDER BY id"
+
+
+def make_tool(i: int) -> AITool:
+    return AITool(
+        ext_id=f"tool-{i}", name=f"Tool {i}", description=f"Writes video scripts, number {i}",
+        price='Free', popularity=float(i), categories=['video', f"group {i % 2}"], source='test',
+        macro_domain='VIDEO', url=f"https://example.com/{i}", monthly_users=100 * i,
+        platform=['web'], features={'free_tier': True}, last_scraped=datetime(2025, 1, 2, 3, 4, 5, 678901),
+    )
+
+
+@pytest.fixture
+def exported(tmp_path):
+    """A database with tools, communities and an edge, exported to tmp_path / 'export'"""
+    db_path = str(tmp_path / 'source.db')
+    adapter = SQLiteAdapter(db_path)
+    for i in range(1, 5):
+        field_hashes = compute_field_hashes(make_tool(i))
+        assert adapter.insert_tool(make_tool(i), combine_field_hashes(field_hashes), field_hashes)
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE ai_tool SET community_id = id % 3")
+    conn.execute("UPDATE ai_tool SET created_at = '2025-01-02 03:04:05.123456' WHERE id % 2 = 0")
+    ids = [row[0] for row in conn.execute("SELECT id FROM ai_tool WHERE source = 'test' ORDER BY id")]
+    conn.execute("INSERT INTO ai_synergy (tool_id_1, tool_id_2, strength, edge_type) VALUES (?, ?, 0.5, 'similar')",
+                  (ids[0], ids[1]))
+    conn.commit()
+    conn.close()
+
+    export_dir = str(tmp_path / 'export')
+    export_parquet(db_path, export_dir)
+    return db_path, export_dir
+
+
+def rows(db_path: str, query: str):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(query).fetchall()
+    finally:
+        conn.close()
+
+
+def test_round_trip_keeps_tools_edges_and_communities(exported, tmp_path):
+    db_path, export_dir = exported
+    target = str(tmp_path / 'target.db')
+
+    result = import_parquet(target, export_dir)
+
+    assert result['ai_tool'] == len(rows(db_path, TOOL_QUERY))
+    assert rows(target, TOOL_QUERY) == rows(db_path, TOOL_QUERY)
+    assert rows(target, EDGE_QUERY) == rows(db_path, EDGE_QUERY)
+    assert {row[-1] for row in rows(target, TOOL_QUERY)} >= {0, 1, 2}
+
+
+def test_import_accepts_exports_without_community_id(exported, tmp_path):
+    db_path, export_dir = exported
+    path = f"{export_dir}/ai_tool.parquet"
+    table = pq.read_table(path)
+    pq.write_table(table.drop(['community_id']), path)
+    target = str(tmp_path / 'target.db')
+
+    import_parquet(target, export_dir)
+
+    imported = rows(target, TOOL_QUERY)
+    assert [row[:-1] for row in imported] == [row[:-1] for row in rows(db_path, TOOL_QUERY)]
+    assert all(row[-1] is None for row in imported)